@@ -0,0 +1,174 @@
+"""Token buckets and concurrency leases for admission control.
+
+Two interchangeable backends:
+
+- MemoryBackend: dicts under a lock; limits apply per web process.
+- SQLiteBackend: one small SQLite file shared by every worker on the host;
+  BEGIN IMMEDIATE takes the database write lock, so bucket updates and lease
+  counts are atomic across processes.
+
+Kept free of Flask/app imports; the policy (which buckets, which limits, what
+to reply) lives in app.py.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class Bucket:
+    """Token bucket: `burst` tokens, refilled at `rate` tokens per second."""
+    __slots__ = ('key', 'rate', 'burst')
+
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+
+def refill(bucket, tokens, updated, now):
+    if tokens is None:
+        return bucket.burst
+    return min(bucket.burst, tokens + max(now - updated, 0.0) * bucket.rate)
+
+
+def full_at(bucket, tokens, now):
+    """When the bucket is back at `burst`; from then on it equals a fresh one."""
+    if tokens >= bucket.burst:
+        return now
+    return now + (bucket.burst - tokens) / bucket.rate if bucket.rate > 0 else float('inf')
+
+
+def shortfall(bucket, tokens):
+    """Seconds until one token is available (inf for a zero-rate bucket)."""
+    if tokens >= 1:
+        return 0.0
+    return (1 - tokens) / bucket.rate if bucket.rate > 0 else float('inf')
+
+
+class MemoryBackend:
+    """Per-process state. Keys are per client, so idle entries are dropped:
+    buckets once they have refilled to `burst` (a missing bucket starts full),
+    lease counters when they fall back to zero."""
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._buckets = {}  # key -> (tokens, updated, full_at)
+        self._leases = {}
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def take(self, buckets):
+        """Take one token from every bucket, or none of them.
+
+        Returns 0.0 when admitted, else the seconds until all buckets could admit.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            levels = [refill(b, *self._buckets.get(b.key, (None, now))[:2], now) for b in buckets]
+            wait = max((shortfall(b, t) for b, t in zip(buckets, levels)), default=0.0)
+            for b, t in zip(buckets, levels):
+                tokens = t - 1 if not wait else t
+                self._buckets[b.key] = (tokens, now, full_at(b, tokens, now))
+            return wait
+
+    def _sweep(self, now):
+        self._buckets = {key: state for key, state in self._buckets.items() if state[2] > now}
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
+    def acquire(self, key, limit, timeout, ttl):
+        """Hold one of `limit` slots for `key`, waiting up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._leases.get(key, 0) >= limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            self._leases[key] = self._leases.get(key, 0) + 1
+            return key
+
+    def release(self, lease):
+        with self._cond:
+            held = self._leases[lease] - 1
+            if held:
+                self._leases[lease] = held
+            else:
+                del self._leases[lease]
+            self._cond.notify()
+
+
+class SQLiteBackend:
+    """Shared state in a SQLite file; one connection per thread and process.
+
+    Leases carry an expiry (`ttl`), so slots held by a worker that died
+    mid-request are reclaimed instead of leaking.
+    """
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS lease (id TEXT PRIMARY KEY, key TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_lease_key ON lease (key, expires)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return _Transaction(conn)
+
+    def take(self, buckets):
+        # Wall clock rather than monotonic: the values are compared across processes
+        now = time.time()
+        with self._connect() as conn:
+            levels = []
+            for b in buckets:
+                row = conn.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (b.key,)).fetchone()
+                levels.append(refill(b, *(row or (None, now)), now))
+            wait = max((shortfall(b, t) for b, t in zip(buckets, levels)), default=0.0)
+            conn.executemany("INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)",
+                             [(b.key, t - 1 if not wait else t, now) for b, t in zip(buckets, levels)])
+            return wait
+
+    def acquire(self, key, limit, timeout, ttl):
+        deadline = time.monotonic() + timeout
+        lease = uuid.uuid4().hex
+        while True:
+            with self._connect() as conn:
+                now = time.time()
+                conn.execute("DELETE FROM lease WHERE key = ? AND expires < ?", (key, now))
+                held = conn.execute("SELECT COUNT(*) FROM lease WHERE key = ?", (key,)).fetchone()[0]
+                if held < limit:
+                    conn.execute("INSERT INTO lease (id, key, expires) VALUES (?, ?, ?)", (lease, key, now + ttl))
+                    return lease
+            if time.monotonic() + self.POLL_INTERVAL > deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
+
+    def release(self, lease):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM lease WHERE id = ?", (lease,))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error) around a connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -6,10 +6,29 @@ import io
 import json
 import datetime
 import re
-import base64
+import shutil
+import tempfile
+import threading
+import time
+import hashlib
+import math
+import multiprocessing
+import random
+import zlib
+import statistics
+import secrets
+import bisect
+import difflib
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, wraps
 from flask import (Flask, render_template, redirect, url_for,
-                   flash, request, abort, make_response, session, jsonify)
+                   flash, request, abort, make_response, session, jsonify,
+                   send_file, after_this_request, has_request_context, g)
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSqlaSession
 from flask_bcrypt import Bcrypt
 from flask_login import (LoginManager, login_user, current_user,
                          logout_user, login_required, UserMixin)
@@ -23,14 +42,21 @@ from wtforms.fields import DateField
 from wtforms.validators import (DataRequired, Length, EqualTo,
                             ValidationError, Optional)
 from sqlalchemy import text, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, selectinload, Session as OrmSession
+from sqlalchemy.orm.attributes import set_committed_value, flag_modified
+from email.message import EmailMessage
+from flask.cli import AppGroup
+import click
 from werkzeug.utils import secure_filename
-# === PDF and RTL Imports ===
-from fpdf import FPDF
-from fpdf.enums import XPos, YPos
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-# ===========================
+from werkzeug.http import is_resource_modified
+from jinja2 import FileSystemBytecodeCache
+import passwords
+import admission
+import revisions
+from pdf_service import PdfRenderClient, LocalRenderService, asset_ref, to_file_url
+# === PDF and RTL imports (fpdf2, arabic_reshaper, python-bidi, pyppeteer)
+# are deferred to first use: see pdf_native.py and pdf_service.py ===
 # =========================================
 #          END IMPORTS SECTION
 # =========================================
@@ -41,7 +67,17 @@ app = Flask(__name__)
 # --- App Configuration ---
 app.config['SECRET_KEY'] = 'a_very_secret_key_for_development_12345'
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'site.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'site.db')
+# Read replicas (comma-separated URLs; for a local test, another SQLite file kept in
+# sync with `flask replica sync`). GET requests to the endpoints below read from a
+# random replica; everything else, and any request of a client that wrote within
+# the last DB_REPLICA_STICKY_SECONDS, stays on the primary.
+app.config['SQLALCHEMY_BINDS'] = {f"replica_{i}": url.strip() for i, url in
+                                  enumerate(u for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip())}
+app.config['DB_REPLICA_BINDS'] = list(app.config['SQLALCHEMY_BINDS'])
+app.config['DB_REPLICA_ENDPOINTS'] = {'index', 'meetings_list', 'meeting_detail', 'generate_meeting_pdf',
+                                      'api_meeting_changes', 'attendee_suggest'}
+app.config['DB_REPLICA_STICKY_SECONDS'] = 10
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = os.path.join(basedir, 'static', 'images', 'custom')
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -49,22 +85,110 @@ ALLOWED_LOGO_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
 app.config['AVATAR_UPLOAD_FOLDER'] = os.path.join(basedir, 'static', 'images', 'avatars')
 os.makedirs(app.config['AVATAR_UPLOAD_FOLDER'], exist_ok=True)
 ALLOWED_AVATAR_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # whole request body
+app.config['UPLOAD_MAX_BYTES'] = 5 * 1024 * 1024  # per uploaded image
+app.config['UPLOAD_MAX_DIMENSION'] = 2048  # larger images are downscaled on re-encode
+app.config['UPLOAD_WORKERS'] = 1  # background threads validating/re-encoding uploads
+app.config['UPLOAD_ORPHAN_GRACE_SECONDS'] = 3600  # unreferenced files younger than this are kept
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # target work factor
+app.config['PASSWORD_HASH_WORKERS'] = 2  # processes in the hashing pool; 0 = hash on the request thread
+app.config['PASSWORD_HASH_MAX_PENDING'] = 16  # queued + running hashes per web process before shedding load
+app.config['PASSWORD_HASH_TIMEOUT'] = 10  # seconds
 app.config['LANGUAGES'] = {
     'en': 'English',
     'fa': 'فارسی'
 }
 app.config['BABEL_DEFAULT_LOCALE'] = 'en'
 # app.config['BABEL_DEFAULT_TIMEZONE'] = 'UTC'
+# PDF export engine: 'chromium' (pyppeteer, HTML template) or 'fpdf' (native, no browser).
+# Can be overridden per request with ?engine=fpdf
+PDF_ENGINES = ('chromium', 'fpdf')
+app.config['PDF_ENGINE'] = os.environ.get('PDF_ENGINE', 'chromium')
+app.config['PDF_ENGINE_FALLBACK'] = True  # fall back to fpdf when Chromium cannot start
+app.config['PDF_TMP_DIR'] = None  # where exports are rendered before streaming; None = system temp dir
+# Rendered exports are kept here, one file per meeting version, language and engine,
+# so Range/conditional requests and repeat downloads serve the same bytes without a render
+app.config['PDF_CACHE_DIR'] = os.path.join(basedir, '.pdf_cache')
+# Renderer nodes (python pdf_service.py serve), comma-separated 'http://host:port' or 'unix:/path';
+# empty = render in the web process with a one-shot Chromium
+app.config['PDF_RENDERER_URLS'] = [u.strip() for u in os.environ.get('PDF_RENDERER_URLS', '').split(',') if u.strip()]
+app.config['PDF_RENDER_TIMEOUT'] = 60  # seconds per render attempt
+app.config['PDF_RENDER_RETRIES'] = 2  # further attempts on other nodes after a failure
+# Admission control for expensive routes, keyed by endpoint name. Per-user and global
+# token buckets (requests per minute, with a burst allowance) plus an optional cap on
+# concurrent requests; a request waits up to queue_timeout seconds for a slot.
+# Backend 'memory' limits each web process on its own; 'sqlite' shares the limits
+# between all workers on the host through ADMISSION_DB. Only logged-in users are
+# counted unless a rule sets 'anonymous': True (then per client address only).
+# Rules with 'in_view': True are charged by the view itself (via admit()), e.g. only
+# when a PDF actually has to be rendered rather than served from the cache.
+app.config['ADMISSION_ENABLED'] = True
+app.config['ADMISSION_BACKEND'] = os.environ.get('ADMISSION_BACKEND', 'memory')
+app.config['ADMISSION_DB'] = os.path.join(basedir, 'admission.db')
+app.config['ADMISSION_RULES'] = {
+    'generate_meeting_pdf': {'user_per_minute': 6, 'user_burst': 3, 'global_per_minute': 60, 'global_burst': 10,
+                             'concurrency': 2, 'queue_timeout': 15, 'lease_ttl': 300, 'in_view': True},
+    'bulk_update_actions': {'user_per_minute': 60, 'user_burst': 20, 'global_per_minute': 1200, 'global_burst': 100},
+    'api_meeting_batch': {'user_per_minute': 30, 'user_burst': 10, 'global_per_minute': 600, 'global_burst': 50},
+}
+# Dynamic responses (HTML/JSON/calendar) are compressed when the client accepts it:
+# brotli if the optional `brotli` package is installed, else gzip. Streamed bodies
+# are compressed chunk by chunk; buffered ones only above COMPRESS_MIN_SIZE bytes.
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_MIMETYPES'] = {'text/html', 'application/json', 'text/calendar', 'text/plain', 'text/css',
+                                    'application/javascript', 'text/javascript'}
+app.config['COMPRESS_GZIP_LEVEL'] = 6
+app.config['COMPRESS_BROTLI_QUALITY'] = 5
+# Compiled templates are kept on disk so a fresh worker loads bytecode instead of
+# parsing and compiling every template again. Entries are keyed by template name and
+# source checksum, so an edited template simply misses. Empty = no cache.
+# Fill it at deploy time with `flask templates compile`.
+app.config['JINJA_BYTECODE_CACHE_DIR'] = os.environ.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
+
+# --- Jinja bytecode cache (must be set up before app.jinja_env is first used) ---
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    def dump_bytecode(self, bucket):
+        # A read-only deploy dir must not turn a cache miss into a failed request
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            app.logger.warning("Could not write template bytecode cache: %s", e)
+
+def make_bytecode_cache(directory):
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        app.logger.warning("Template bytecode cache disabled: %s", e)
+        return None
+    return TemplateBytecodeCache(directory, pattern='meeting_%s.cache')
+
+app.jinja_options = {**app.jinja_options, 'bytecode_cache': make_bytecode_cache(app.config['JINJA_BYTECODE_CACHE_DIR'])}
+
+# --- Read/write routing session ---
+class RoutingSession(FlaskSqlaSession):
+    """Sends plain SELECTs to the replica picked for the request (g.db_replica).
+
+    Flushes, DML, raw text() statements and anything outside a routed request
+    use the primary.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context() and g.get('db_replica')
+                and getattr(clause, 'is_select', False)):
+            return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
 # --- Initialize Extensions (without app object first) ---
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 babel = Babel()
 
 # --- Define Babel Locale Selector Function ---
 def select_locale():
-    if 'language' in session and session['language'] in app.config['LANGUAGES'].keys():
+    # CLI jobs (digest emails) translate with the default locale
+    if has_request_context() and 'language' in session and session['language'] in app.config['LANGUAGES'].keys():
         return session['language']
     return app.config['BABEL_DEFAULT_LOCALE']
 
@@ -87,7 +211,17 @@ def ensure_meeting_company_logo_column():
         # Fail silently to avoid startup crash; user may recreate DB in dev
         pass
 
-ensure_meeting_company_logo_column()
+def ensure_meeting_updated_at_column():
+    try:
+        with app.app_context():
+            inspector = inspect(db.engine)
+            cols = [c['name'] for c in inspector.get_columns('meeting')]
+            if 'updated_at' not in cols:
+                with db.engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN updated_at DATETIME"))
+                    conn.execute(text("UPDATE meeting SET updated_at = date_posted WHERE updated_at IS NULL"))
+    except Exception:
+        pass
 
 def ensure_meeting_company_other_name_column():
     try:
@@ -100,8 +234,6 @@ def ensure_meeting_company_other_name_column():
     except Exception:
         pass
 
-ensure_meeting_company_other_name_column()
-
 # --- Lightweight migration for user extra columns ---
 def ensure_user_extra_columns():
     try:
@@ -115,12 +247,179 @@ def ensure_user_extra_columns():
                     conn.execute(text("ALTER TABLE user ADD COLUMN email VARCHAR(120)"))
                 if 'avatar_path' not in cols:
                     conn.execute(text("ALTER TABLE user ADD COLUMN avatar_path VARCHAR(255)"))
+                if 'data_revision' not in cols:
+                    conn.execute(text("ALTER TABLE user ADD COLUMN data_revision INTEGER NOT NULL DEFAULT 0"))
+                if 'data_changed_at' not in cols:
+                    conn.execute(text("ALTER TABLE user ADD COLUMN data_changed_at DATETIME"))
+                if 'calendar_token' not in cols:
+                    conn.execute(text("ALTER TABLE user ADD COLUMN calendar_token VARCHAR(64)"))
+                conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_user_calendar_token ON user (calendar_token)"))
+    except Exception:
+        pass
+
+# --- Lightweight migration: company registry table, seed rows, meeting.company_id FK ---
+DEFAULT_COMPANIES = [
+    # (name as stored in meeting.company, Persian display name, logo in static/images)
+    ('Rabe Al Mustaqbal', 'ربیع المستقبل', 'rabe_al_mustaqbal.png'),
+    ('Rahkar Gasht', 'راهکار گشت', 'rahkar_gasht.png'),
+    ('EazyMig', 'ایزی میگ', 'eazymig.png'),
+    ('Abu Dhabi', 'هلدینگ ابوظبی', 'abu_dhabi.png'),
+]
+
+def ensure_company_table():
+    try:
+        with app.app_context():
+            Company.__table__.create(db.engine, checkfirst=True)
+            if Company.query.count() == 0:
+                for order, (name, name_fa, logo) in enumerate(DEFAULT_COMPANIES):
+                    db.session.add(Company(name=name, name_fa=name_fa, logo_filename=logo, sort_order=order))
+                db.session.commit()
+            inspector = inspect(db.engine)
+            cols = [c['name'] for c in inspector.get_columns('meeting')]
+            with db.engine.begin() as conn:
+                if 'company_id' not in cols:
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN company_id INTEGER REFERENCES company(id)"))
+                # Backfill meetings saved by code that only set the company name
+                conn.execute(text("UPDATE meeting SET company_id = (SELECT company.id FROM company WHERE company.name = meeting.company) "
+                                  "WHERE company_id IS NULL AND company IN (SELECT name FROM company)"))
+    except Exception:
+        pass
+
+# --- Lightweight migration: action_deadline mirror + digest tables, backfilled from meeting JSON ---
+def ensure_digest_tables():
+    try:
+        with app.app_context():
+            inspector = inspect(db.engine)
+            backfill = not inspector.has_table('action_deadline')
+            for model in (ActionDeadline, OverdueDigest, DigestRun):
+                model.__table__.create(db.engine, checkfirst=True)
+            if not backfill and 'item_key' not in [c['name'] for c in inspector.get_columns('action_deadline')]:
+                with db.engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE action_deadline ADD COLUMN item_key VARCHAR(16)"))
+                backfill = True  # existing rows are matched by position once, then keep their key
+            if backfill:
+                for meeting in Meeting.query.options(selectinload(Meeting.archive)).all():
+                    sync_action_deadlines(load_archived_text(meeting))
+                db.session.commit()
+    except Exception:
+        pass
+
+# --- Lightweight migration: revision history table ---
+def ensure_revision_table():
+    try:
+        with app.app_context():
+            MeetingRevision.__table__.create(db.engine, checkfirst=True)
+    except Exception:
+        pass
+
+# --- Lightweight migration: delta sync (meeting.change_seq, change counter, tombstones) ---
+def ensure_sync_tables():
+    try:
+        with app.app_context():
+            ChangeCounter.__table__.create(db.engine, checkfirst=True)
+            MeetingTombstone.__table__.create(db.engine, checkfirst=True)
+            inspector = inspect(db.engine)
+            cols = [c['name'] for c in inspector.get_columns('meeting')]
+            with db.engine.begin() as conn:
+                if 'change_seq' not in cols:
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+                    conn.execute(text("UPDATE meeting SET change_seq = id"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_meeting_user_change_seq ON meeting (user_id, change_seq)"))
+                conn.execute(text("INSERT INTO change_counter (id, value) SELECT 1, COALESCE(MAX(change_seq), 0) FROM meeting "
+                                  "WHERE NOT EXISTS (SELECT 1 FROM change_counter)"))
     except Exception:
         pass
 
-ensure_user_extra_columns()
+# --- Lightweight migration: archive tier (meeting_archive table, hot counters) ---
+def ensure_meeting_archive_columns():
+    try:
+        with app.app_context():
+            MeetingArchive.__table__.create(db.engine, checkfirst=True)
+            inspector = inspect(db.engine)
+            cols = [c['name'] for c in inspector.get_columns('meeting')]
+            archive_cols = [c['name'] for c in inspector.get_columns('meeting_archive')]
+            with db.engine.begin() as conn:
+                if 'terms' not in archive_cols:
+                    # NULL terms: searched by decompressing, until the meeting is archived again
+                    conn.execute(text("ALTER TABLE meeting_archive ADD COLUMN terms TEXT"))
+                if 'archived' not in cols:
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN archived BOOLEAN NOT NULL DEFAULT 0"))
+                if 'action_total' not in cols:
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN action_total INTEGER NOT NULL DEFAULT 0"))
+                    conn.execute(text("ALTER TABLE meeting ADD COLUMN action_done INTEGER NOT NULL DEFAULT 0"))
+                    for meeting_id, action_items_json in conn.execute(text("SELECT id, action_items FROM meeting")).all():
+                        total, done = action_item_counts(action_items_json)
+                        conn.execute(text("UPDATE meeting SET action_total = :total, action_done = :done WHERE id = :id"),
+                                     {'total': total, 'done': done, 'id': meeting_id})
+    except Exception:
+        pass
+
+# --- Run the lightweight migrations once per process, on first request (or prewarm) ---
+# Not at import time: inspecting the schema would slow down every worker boot.
+_schema_lock = threading.Lock()
+_schema_checked = False
+
+def ensure_schema():
+    global _schema_checked
+    if _schema_checked:
+        return
+    with _schema_lock:
+        if not _schema_checked:
+            ensure_meeting_company_logo_column()
+            ensure_meeting_company_other_name_column()
+            ensure_meeting_updated_at_column()
+            ensure_user_extra_columns()
+            ensure_company_table()
+            ensure_sync_tables()
+            ensure_meeting_archive_columns()
+            ensure_digest_tables()
+            ensure_revision_table()
+            _schema_checked = True
+
+@app.before_request
+def ensure_schema_before_request():
+    ensure_schema()
+
+# --- Replica routing: choose the bind per request, stick to the primary after writes ---
+@app.before_request
+def route_database_reads():
+    replicas = app.config['DB_REPLICA_BINDS']
+    if (replicas and request.method in ('GET', 'HEAD') and request.endpoint in app.config['DB_REPLICA_ENDPOINTS']
+            and session.get('db_primary_until', 0) < time.time()):
+        g.db_replica = random.choice(replicas)
+
+@db.event.listens_for(RoutingSession, 'after_flush')
+def note_database_write(db_session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+@app.after_request
+def stick_to_primary_after_write(response):
+    # Read-your-writes: this client's next reads go to the primary until replicas catch up
+    if g.get('db_wrote') and app.config['DB_REPLICA_BINDS']:
+        session['db_primary_until'] = time.time() + app.config['DB_REPLICA_STICKY_SECONDS']
+    return response
+
+replica_cli = AppGroup('replica', help='Read replicas.')
+
+@replica_cli.command('sync')
+def sync_replicas_command():
+    """Copy the primary into each SQLite replica (local stand-in for replication)."""
+    primary = db.engines[None]
+    if primary.dialect.name != 'sqlite':
+        raise click.ClickException('only SQLite replicas can be synced this way')
+    for key in app.config['DB_REPLICA_BINDS']:
+        replica = db.engines[key]
+        if replica.dialect.name != 'sqlite':
+            raise click.ClickException(f"{key} is not a SQLite database")
+        with primary.connect() as src, replica.connect() as dst:
+            src.connection.driver_connection.backup(dst.connection.driver_connection)
+        click.echo(f"Synced {key} ({replica.url.database})")
+
+app.cli.add_command(replica_cli)
 
 # --- Font discovery helpers and context ---
+@lru_cache(maxsize=1)  # static/fonts only changes on deploy
 def discover_fa_fonts():
     fonts_dir = os.path.join(basedir, 'static', 'fonts')
     families = {}
@@ -238,14 +537,6 @@ def format_jalali(d: datetime.datetime) -> str:
     jy, jm, jd = gregorian_to_jalali(d.year, d.month, d.day)
     return f"{jy:04d}-{jm:02d}-{jd:02d}"
 
-# --- Helper function for RTL text processing ---
-def shape_text(text):
-    if text is None: return ""
-    text = str(text)
-    reshaped_text = arabic_reshaper.reshape(text)
-    bidi_text = get_display(reshaped_text)
-    return bidi_text
-
 # --- Configure Login Manager ---
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -254,6 +545,9 @@ class User(db.Model, UserMixin):
     display_name = db.Column(db.String(50), nullable=True)
     email = db.Column(db.String(120), nullable=True)
     avatar_path = db.Column(db.String(255), nullable=True)
+    data_revision = db.Column(db.Integer, nullable=False, default=0)  # bumped on every change to the user's meetings
+    data_changed_at = db.Column(db.DateTime, nullable=True)
+    calendar_token = db.Column(db.String(64), unique=True, nullable=True)  # secret in the .ics feed URL
     meetings = db.relationship('Meeting', backref='author', lazy=True)
     def __repr__(self): return f"User('{self.username}')"
 
@@ -266,6 +560,15 @@ login_manager.login_message_category = 'info'
 
 
 # === Model Definitions ===
+class Company(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # canonical (English) name, also stored in meeting.company
+    name_fa = db.Column(db.String(120), nullable=True)
+    logo_filename = db.Column(db.String(255), nullable=True)  # relative to static/images
+    sort_order = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    def __repr__(self): return f"Company('{self.name}')"
+
 class Meeting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -279,8 +582,1559 @@ class Meeting(db.Model):
     company = db.Column(db.String(100), nullable=True)
     company_logo = db.Column(db.String(255), nullable=True)
     company_other_name = db.Column(db.String(120), nullable=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    action_total = db.Column(db.Integer, nullable=False, default=0)  # counters kept hot for list views
+    action_done = db.Column(db.Integer, nullable=False, default=0)
+    archived = db.Column(db.Boolean, nullable=False, default=False)  # agenda/minutes/action_items live in meeting_archive
+    change_seq = db.Column(db.Integer, nullable=False, default=0)  # global change sequence, stamped on every flush (delta sync)
+    deadlines = db.relationship('ActionDeadline', backref='meeting', lazy=True, cascade='all, delete-orphan')
+    archive = db.relationship('MeetingArchive', uselist=False, lazy=True, cascade='all, delete-orphan')
+    revisions = db.relationship('MeetingRevision', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (db.Index('ix_meeting_user_change_seq', 'user_id', 'change_seq'),)
     def __repr__(self): return f"Meeting('{self.title}', '{self.meeting_date}', Company: '{self.company}')"
 
+class ActionDeadline(db.Model):
+    # Action items that have a deadline, mirrored from Meeting.action_items on every save
+    # so overdue detection is an index scan instead of parsing every meeting's JSON.
+    __tablename__ = 'action_deadline'
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    item_index = db.Column(db.Integer, nullable=False)  # position in Meeting.action_items
+    item_key = db.Column(db.String(16), nullable=True)  # action_item_key(): identity that survives reordering
+    deadline = db.Column(db.Date, nullable=False)
+    is_done = db.Column(db.Boolean, nullable=False, default=False)
+    overdue_on = db.Column(db.Date, nullable=True)  # set by the digest job on the day it found the item overdue
+    __table_args__ = (
+        db.Index('ix_action_deadline_pending', 'is_done', 'overdue_on', 'deadline'),
+        db.Index('ix_action_deadline_user', 'user_id', 'is_done', 'overdue_on'),
+    )
+
+class OverdueDigest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    digest_date = db.Column(db.Date, nullable=False)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    items = db.Column(db.Text, nullable=False)  # JSON list of the newly overdue items
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('user_id', 'digest_date', name='uq_overdue_digest_user_date'),)
+
+class MeetingArchive(db.Model):
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False, default='zlib')
+    payload = db.Column(db.LargeBinary, nullable=False)  # compressed JSON of agenda/minutes/action_items
+    terms = db.Column(db.Text, nullable=True)  # distinct casefolded words of the minutes, uncompressed (search)
+    raw_size = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+class MeetingRevision(db.Model):
+    # One row per save; payload is a compressed snapshot or delta (see revisions.py)
+    __tablename__ = 'meeting_revision'
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)  # 1, 2, ... per meeting
+    kind = db.Column(db.String(10), nullable=False)  # 'snapshot' or 'delta'
+    payload = db.Column(db.LargeBinary, nullable=False)
+    changed = db.Column(db.String(200), nullable=False, default='')  # comma-separated field names
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('meeting_id', 'number', name='uq_meeting_revision_number'),)
+
+class ChangeCounter(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # single row, id 1
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class MeetingTombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    change_seq = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    __table_args__ = (db.Index('ix_meeting_tombstone_user_change_seq', 'user_id', 'change_seq'),)
+
+class DigestRun(db.Model):
+    run_date = db.Column(db.Date, primary_key=True)  # one row per day doubles as the run lock
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+
+# === Company registry ===
+# The company table is small and read on every list/detail/PDF render, so each
+# process keeps it in memory with logos resolved once at load time: per-row logo
+# resolution is a dict lookup, never a filesystem call. Changes made through this
+# process invalidate the cache immediately; other processes notice them through a
+# cheap revision check (row count + newest updated_at) at most every TTL seconds.
+DEFAULT_LOGO_FILENAME = 'default_logo.png'
+app.config['COMPANY_CACHE_TTL'] = 30  # seconds
+
+class CompanyRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name = None
+        self._by_id = {}
+        self._revision = None
+        self._checked_at = 0.0
+        self.default_logo = None
+
+    def invalidate(self):
+        self._by_name = None
+
+    def _current_revision(self):
+        return tuple(db.session.query(db.func.count(Company.id), db.func.max(Company.updated_at)).one())
+
+    def _load(self, revision):
+        images_dir = os.path.join(basedir, 'static', 'images')
+        default_logo = DEFAULT_LOGO_FILENAME if os.path.exists(os.path.join(images_dir, DEFAULT_LOGO_FILENAME)) else None
+        by_name = {}
+        for c in Company.query.order_by(Company.sort_order, Company.name).all():
+            logo = c.logo_filename if c.logo_filename and os.path.exists(os.path.join(images_dir, c.logo_filename)) else default_logo
+            logo_fs_path = os.path.join(images_dir, logo) if logo else None
+            by_name[c.name] = {
+                'id': c.id,
+                'name': c.name,
+                'names': {'en': c.name, 'fa': c.name_fa or c.name},
+                'logo_filename': logo,
+                'logo_fs_path': logo_fs_path,
+                'logo_file_url': to_file_url(logo_fs_path) if logo_fs_path else None,
+            }
+        self.default_logo = default_logo
+        self._by_id = {entry['id']: entry for entry in by_name.values()}
+        self._by_name = by_name
+        self._revision = revision
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._by_name is not None and now - self._checked_at < app.config['COMPANY_CACHE_TTL']:
+            return
+        with self._lock:
+            revision = self._current_revision()
+            if self._by_name is None or revision != self._revision:
+                self._load(revision)
+            self._checked_at = now
+
+    def all(self):
+        self._ensure_fresh()
+        return list(self._by_name.values())
+
+    def revision(self):
+        self._ensure_fresh()
+        return self._revision
+
+    def get(self, name=None, company_id=None):
+        self._ensure_fresh()
+        if company_id is not None and company_id in self._by_id:
+            return self._by_id[company_id]
+        return self._by_name.get(name) if name else None
+
+company_registry = CompanyRegistry()
+
+@db.event.listens_for(Company, 'after_insert')
+@db.event.listens_for(Company, 'after_update')
+@db.event.listens_for(Company, 'after_delete')
+def invalidate_company_registry(mapper, connection, target):
+    company_registry.invalidate()
+
+def company_choices(locale):
+    choices = [('', _('-- Select Company --'))]
+    choices += [(c['name'], c['names'].get(locale) or c['name']) for c in company_registry.all()]
+    choices.append(('Other', _('Other')))
+    return choices
+
+def resolve_meeting_logo(meeting):
+    """Logo for a meeting, relative to static/images (custom upload first, then registry)."""
+    if meeting.company_logo:
+        return meeting.company_logo
+    company = company_registry.get(meeting.company, meeting.company_id)
+    if company:
+        return company['logo_filename']
+    return company_registry.default_logo
+
+def meeting_company_display(meeting, locale):
+    if meeting.company_other_name:
+        return meeting.company_other_name
+    company = company_registry.get(meeting.company, meeting.company_id)
+    if company:
+        return company['names'].get(locale) or company['name']
+    return _(meeting.company) if meeting.company else None
+
+company_cli = AppGroup('company', help='Manage the company registry.')
+
+@company_cli.command('list')
+def company_list_command():
+    ensure_schema()
+    for c in Company.query.order_by(Company.sort_order, Company.name).all():
+        click.echo(f"{c.id:>4}  {c.name:<30} {c.name_fa or '':<30} {c.logo_filename or ''}")
+
+@company_cli.command('add')
+@click.argument('name')
+@click.option('--fa', 'name_fa', help='Persian display name.')
+@click.option('--logo', help='Logo file name under static/images.')
+@click.option('--order', type=int, default=0, help='Sort order in pickers.')
+def company_add_command(name, name_fa, logo, order):
+    ensure_schema()
+    company = Company.query.filter_by(name=name).first() or Company(name=name)
+    company.name_fa = name_fa or company.name_fa
+    company.logo_filename = logo or company.logo_filename
+    company.sort_order = order
+    db.session.add(company)
+    db.session.commit()
+    db.session.execute(text("UPDATE meeting SET company_id = :id WHERE company = :name AND company_id IS NULL"), {'id': company.id, 'name': name})
+    db.session.commit()
+    click.echo(f"saved {company.name} (id {company.id})")
+
+@company_cli.command('remove')
+@click.argument('name')
+def company_remove_command(name):
+    ensure_schema()
+    company = Company.query.filter_by(name=name).first()
+    if not company:
+        raise click.ClickException(f"no company named {name!r}")
+    Meeting.query.filter_by(company_id=company.id).update({'company_id': None})
+    db.session.delete(company)
+    db.session.commit()
+    click.echo(f"removed {name}")
+
+app.cli.add_command(company_cli)
+
+
+# === Attendee autocomplete index ===
+# Each process keeps, per user, a sorted array of normalized name keys (the full
+# name plus every word start, so "رضا" finds "علی رضایی") and answers a keystroke
+# with one bisect. Saves in this process patch the array in place; user.data_revision
+# (loaded with current_user anyway) tells other processes to rebuild it.
+app.config['ATTENDEE_SUGGEST_LIMIT'] = 10
+app.config['ATTENDEE_SUGGEST_SCAN'] = 256  # matching keys ranked per lookup; bounds one-letter prefixes
+
+_PERSIAN_NAME_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    '\u200c': ' ', '\u200d': None, '\u0640': None,  # ZWNJ, ZWJ, tatweel
+})
+_ARABIC_DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670]')
+
+def normalize_person_name(name):
+    """Matching key for a name: Arabic/Persian letter variants unified, diacritics dropped, casefolded."""
+    name = unicodedata.normalize('NFKC', name or '')
+    name = _ARABIC_DIACRITICS_RE.sub('', name).translate(_PERSIAN_NAME_MAP)
+    return ' '.join(name.casefold().split())
+
+def name_keys(name):
+    words = normalize_person_name(name).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+def meeting_people(attendees_json, action_items_json):
+    """Attendee and assignee names of one meeting (stored JSON columns)."""
+    try: attendees = json.loads(attendees_json or '[]')
+    except Exception: attendees = []
+    try: items = json.loads(action_items_json or '[]')
+    except Exception: items = []
+    names = {a.strip() for a in attendees if isinstance(a, str) and a.strip()}
+    names.update(it['assigned_to'].strip() for it in items
+                 if isinstance(it, dict) and isinstance(it.get('assigned_to'), str) and it['assigned_to'].strip())
+    return names
+
+class AttendeeIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # user id -> {'revision', 'keys': sorted [(key, name)], 'counts': {name: meetings}, 'full': {name: key}}
+
+    def _add(self, entry, name):
+        entry['counts'][name] = entry['counts'].get(name, 0) + 1
+        if entry['counts'][name] == 1:
+            entry['full'][name] = normalize_person_name(name)
+            for key in name_keys(name):
+                bisect.insort(entry['keys'], (key, name))
+
+    def _remove(self, entry, name):
+        count = entry['counts'].get(name, 0) - 1
+        if count > 0:
+            entry['counts'][name] = count
+            return
+        entry['counts'].pop(name, None)
+        entry['full'].pop(name, None)
+        for key in name_keys(name):
+            i = bisect.bisect_left(entry['keys'], (key, name))
+            if i < len(entry['keys']) and entry['keys'][i] == (key, name):
+                del entry['keys'][i]
+
+    def _build(self, user_id, revision):
+        counts = Counter()
+        # Assignees of archived meetings are in the compressed payload (attendees stay hot)
+        rows = (db.session.query(Meeting.attendees, Meeting.action_items, MeetingArchive.payload)
+                .outerjoin(MeetingArchive, db.and_(MeetingArchive.meeting_id == Meeting.id, Meeting.archived == True))
+                .filter(Meeting.user_id == user_id))
+        for attendees_json, action_items_json, archived_payload in rows:
+            if archived_payload is not None:
+                action_items_json = json.loads(zlib.decompress(archived_payload).decode('utf-8')).get('action_items')
+            counts.update(meeting_people(attendees_json, action_items_json))
+        keys = sorted((key, name) for name in counts for key in name_keys(name))
+        return {'revision': revision, 'keys': keys, 'counts': dict(counts),
+                'full': {name: normalize_person_name(name) for name in counts}}
+
+    def _entry(self, user):
+        revision = user.data_revision or 0
+        entry = self._users.get(user.id)
+        if entry is None or entry['revision'] != revision:
+            with self._lock:
+                entry = self._users.get(user.id)
+                if entry is None or entry['revision'] != revision:
+                    entry = self._users[user.id] = self._build(user.id, revision)
+        return entry
+
+    def update(self, user, previous_revision, old_names=(), new_names=()):
+        """Patch a user's index after a committed save that bumped data_revision from previous_revision."""
+        with self._lock:
+            entry = self._users.get(user.id)
+            if entry is None:
+                return
+            if entry['revision'] != previous_revision or user.data_revision != previous_revision + 1:
+                # Another process changed this user's meetings in between; rebuild on next lookup
+                self._users.pop(user.id, None)
+                return
+            old_names, new_names = set(old_names), set(new_names)
+            for name in old_names - new_names:
+                self._remove(entry, name)
+            for name in new_names - old_names:
+                self._add(entry, name)
+            entry['revision'] = user.data_revision
+
+    def suggest(self, user, prefix, limit=10):
+        prefix = normalize_person_name(prefix)
+        if not prefix:
+            return []
+        entry = self._entry(user)
+        keys, counts, full = entry['keys'], entry['counts'], entry['full']
+        lo = bisect.bisect_left(keys, (prefix,))
+        hi = min(bisect.bisect_left(keys, (prefix + '\U0010ffff',), lo), lo + app.config['ATTENDEE_SUGGEST_SCAN'])
+        seen = {}
+        for _key, name in keys[lo:hi]:
+            # One suggestion per spelling variant ("علي" / "علی"): keep the most used
+            other = seen.get(full[name])
+            if other is None or counts[name] > counts[other]:
+                seen[full[name]] = name
+        ranked = sorted(seen.values(), key=lambda n: (-counts[n], full[n]))
+        return ranked[:limit]
+
+attendee_index = AttendeeIndex()
+
+def bump_data_revision(user):
+    """Mark the user's meetings as changed (before commit); returns the previous revision."""
+    previous = user.data_revision or 0
+    user.data_revision = User.data_revision + 1
+    user.data_changed_at = datetime.datetime.utcnow()
+    return previous
+
+
+# === Calendar feed (action-item deadlines as iCalendar) ===
+# Calendar apps poll the feed often, so a poll costs one indexed token lookup:
+# the ETag is the user's data_revision and an unchanged feed is answered from the
+# per-process cache (or with 304) without touching the meeting table. When the
+# revision moves, only meetings whose updated_at changed are re-serialized.
+CALENDAR_FEED_VERSION = 1  # bump when the VEVENT layout changes
+
+def action_item_done(it):
+    return bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
+
+def ics_escape(value):
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def ics_fold(line):
+    """Fold a content line at 75 octets (RFC 5545 3.1) without splitting UTF-8 sequences."""
+    out, current, size = [], [], 0
+    for ch in line:
+        n = len(ch.encode('utf-8'))
+        if size + n > 75:
+            out.append(''.join(current))
+            current, size = [' '], 1
+        current.append(ch)
+        size += n
+    out.append(''.join(current))
+    return '\r\n'.join(out) + '\r\n'
+
+def meeting_ics_events(meeting):
+    """VEVENT blocks for the open action items of one meeting that have a deadline."""
+    try: items = json.loads(meeting.action_items or '[]')
+    except Exception: items = []
+    stamp = (meeting.updated_at or meeting.date_posted).strftime('%Y%m%dT%H%M%SZ')
+    url = url_for('meeting_detail', meeting_id=meeting.id, _external=True)
+    chunks = []
+    for index, it in enumerate(items):
+        if not isinstance(it, dict) or not it.get('deadline'):
+            continue
+        if action_item_done(it):
+            continue
+        try:
+            deadline = datetime.date.fromisoformat(it['deadline'])
+        except Exception:
+            continue
+        description = meeting.title
+        if it.get('assigned_to'):
+            description += f"\n{it['assigned_to']}"
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:meeting-{meeting.id}-action-{index}@meeting-minutes",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{deadline.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(deadline + datetime.timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{ics_escape(it.get('description') or meeting.title)}",
+            f"DESCRIPTION:{ics_escape(description)}",
+            f"URL:{url}",
+            'END:VEVENT',
+        ]
+        chunks.append(''.join(ics_fold(line) for line in lines))
+    return ''.join(chunks)
+
+class CalendarFeedCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._feeds = {}  # user id -> {'revision', 'body': bytes, 'events': {meeting id: (updated_at, ics)}}
+
+    def etag(self, user):
+        return f"cal-{CALENDAR_FEED_VERSION}-{user.id}-{user.data_revision or 0}"
+
+    def _build(self, user, previous):
+        old_events = previous['events'] if previous else {}
+        rows = db.session.query(Meeting.id, Meeting.updated_at).filter_by(user_id=user.id).order_by(Meeting.id).all()
+        stale = [mid for mid, updated_at in rows if mid not in old_events or old_events[mid][0] != updated_at]
+        fresh = {}
+        for start in range(0, len(stale), 500):
+            for m in Meeting.query.options(selectinload(Meeting.archive)).filter(Meeting.id.in_(stale[start:start + 500])):
+                load_archived_text(m)
+                fresh[m.id] = (m.updated_at, meeting_ics_events(m))
+        events = {mid: fresh.get(mid) or old_events[mid] for mid, _updated_at in rows}
+        name = ics_escape(user.display_name or user.username)
+        body = ('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Meeting Minutes//Action Items//EN\r\n'
+                'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n' + ics_fold(f"X-WR-CALNAME:{name}")
+                + ''.join(ics for _updated_at, ics in events.values()) + 'END:VCALENDAR\r\n')
+        return {'revision': user.data_revision or 0, 'body': body.encode('utf-8'), 'events': events}
+
+    def feed(self, user):
+        entry = self._feeds.get(user.id)
+        if entry is not None and entry['revision'] == (user.data_revision or 0):
+            return entry
+        with self._lock:
+            entry = self._feeds.get(user.id)
+            if entry is None or entry['revision'] != (user.data_revision or 0):
+                entry = self._feeds[user.id] = self._build(user, entry)
+        return entry
+
+calendar_feeds = CalendarFeedCache()
+
+
+# === Overdue digests ===
+# Overdue state is decided once a day by a batch job, not per request: the
+# scheduler (`flask digest scheduler`) scans action_deadline for open items whose
+# deadline passed and that were not flagged yet, stamps them with overdue_on,
+# stores one digest row per user for the dashboard and, if DIGEST_OUTBOX_DIR is
+# set, writes an .eml file per user with an email address for a mailer to pick up.
+app.config['DIGEST_RUN_AT'] = '06:00'  # local time of the daily run
+app.config['DIGEST_OUTBOX_DIR'] = None
+app.config['DIGEST_DASHBOARD_COUNT'] = 5
+app.config['DIGEST_RUN_TIMEOUT'] = 3600  # seconds before an unfinished run (killed job) may be taken over
+
+def action_item_counts(action_items_json):
+    try: items = json.loads(action_items_json or '[]')
+    except Exception: items = []
+    items = [it for it in items if isinstance(it, dict)] if isinstance(items, list) else []
+    return len(items), sum(1 for it in items if action_item_done(it))
+
+def sync_action_deadlines(meeting, items=None):
+    """Mirror a meeting's action items into its hot counters and action_deadline rows (call before commit)."""
+    if items is None:
+        try: items = json.loads(meeting.action_items or '[]')
+        except Exception: items = []
+    meeting.action_total = sum(1 for it in items if isinstance(it, dict))
+    meeting.action_done = sum(1 for it in items if isinstance(it, dict) and action_item_done(it))
+    # Keep the overdue flag of items that are still there (same task, assignee and deadline),
+    # wherever they moved in the list; rows from before item keys fall back to their position
+    flagged = {}
+    for d in meeting.deadlines:
+        flagged.setdefault(d.item_key or (d.item_index, d.deadline), []).append(d.overdue_on)
+    user_id = meeting.user_id or meeting.author.id
+    deadlines = []
+    for index, it in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(it, dict) or not it.get('deadline'):
+            continue
+        try:
+            deadline = it['deadline'] if isinstance(it['deadline'], datetime.date) else datetime.date.fromisoformat(it['deadline'])
+        except Exception:
+            continue
+        key = action_item_key(it, deadline)
+        previous = flagged.get(key) or flagged.get((index, deadline)) or [None]
+        deadlines.append(ActionDeadline(user_id=user_id, item_index=index, item_key=key, deadline=deadline,
+                                        is_done=action_item_done(it), overdue_on=previous.pop(0)))
+    meeting.deadlines = deadlines
+
+def action_item_key(item, deadline):
+    raw = json.dumps([item.get('description') or '', item.get('assigned_to') or '', deadline.isoformat()], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+def overdue_filter(query):
+    return query.filter(ActionDeadline.is_done == False, ActionDeadline.overdue_on.isnot(None))
+
+def overdue_item_indices(meeting_id):
+    return {i for (i,) in overdue_filter(db.session.query(ActionDeadline.item_index)).filter(ActionDeadline.meeting_id == meeting_id)}
+
+def action_counters(items, overdue_indices):
+    total = sum(1 for it in items if isinstance(it, dict))
+    done = sum(1 for it in items if isinstance(it, dict) and action_item_done(it))
+    return {'total': total, 'done': done, 'overdue': len(overdue_indices)}
+
+def write_digest_email(user, digest_date, items):
+    outbox = app.config['DIGEST_OUTBOX_DIR']
+    os.makedirs(outbox, exist_ok=True)
+    msg = EmailMessage()
+    msg['To'] = user.email
+    msg['Subject'] = _('Overdue action items (%(count)s)', count=len(items))
+    msg['Date'] = datetime.datetime.now(datetime.timezone.utc)
+    lines = [_('These action items became overdue:'), '']
+    for it in items:
+        lines.append(f"- {it['description'] or '-'} [{it['meeting_title']}] {it['deadline']}"
+                     + (f" ({it['assigned_to']})" if it.get('assigned_to') else ''))
+    msg.set_content('\n'.join(lines))
+    path = os.path.join(outbox, f"{digest_date.isoformat()}-{user.id}-{secure_filename(user.username)}.eml")
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(msg.as_bytes())
+    os.replace(tmp, path)  # a mailer polling the outbox never sees half-written files
+    return path
+
+def run_overdue_digest(today=None):
+    """Flag newly overdue items and write today's digests. Returns the DigestRun, or None if today already ran."""
+    today = today or datetime.date.today()
+    run = db.session.get(DigestRun, today)
+    if run is not None:
+        run = take_over_digest_run(run)
+        if run is None:
+            return None
+    else:
+        run = DigestRun(run_date=today)
+        db.session.add(run)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None
+    try:
+        _run_overdue_digest(run, today)
+    except Exception:
+        # Release the day so the next attempt can redo it
+        db.session.rollback()
+        DigestRun.query.filter_by(run_date=today).delete()
+        db.session.commit()
+        raise
+    if app.config['DIGEST_OUTBOX_DIR'] and run.user_count:
+        try:
+            write_digest_outbox(run)
+        except OSError:
+            # Digests are already on the dashboard; a broken outbox must not undo the run
+            app.logger.exception('could not write digest emails to %s', app.config['DIGEST_OUTBOX_DIR'])
+    return run
+
+def take_over_digest_run(run):
+    """Claim a run left unfinished by a killed job once DIGEST_RUN_TIMEOUT passed; None if not ours."""
+    now = datetime.datetime.utcnow()
+    if run.finished_at is not None or run.started_at > now - datetime.timedelta(seconds=app.config['DIGEST_RUN_TIMEOUT']):
+        return None
+    # Compare-and-set on started_at: of several schedulers noticing the stale run, one wins
+    claimed = (DigestRun.query.filter_by(run_date=run.run_date, started_at=run.started_at, finished_at=None)
+               .update({'started_at': now}, synchronize_session=False))
+    db.session.commit()
+    if not claimed:
+        return None
+    app.logger.warning('taking over the unfinished digest run of %s', run.run_date)
+    db.session.refresh(run)
+    return run
+
+def _run_overdue_digest(run, today):
+    rows = (ActionDeadline.query
+            .filter(ActionDeadline.is_done == False, ActionDeadline.overdue_on.is_(None), ActionDeadline.deadline < today)
+            .order_by(ActionDeadline.user_id, ActionDeadline.deadline).all())
+    meetings = {}
+    meeting_ids = sorted({r.meeting_id for r in rows})
+    for start in range(0, len(meeting_ids), 500):
+        for m in Meeting.query.options(selectinload(Meeting.archive)).filter(Meeting.id.in_(meeting_ids[start:start + 500])):
+            load_archived_text(m)
+            try: items = json.loads(m.action_items or '[]')
+            except Exception: items = []
+            meetings[m.id] = (m.title, items)
+    by_user = {}
+    for r in rows:
+        r.overdue_on = today
+        title, items = meetings.get(r.meeting_id, ('', []))
+        it = items[r.item_index] if r.item_index < len(items) and isinstance(items[r.item_index], dict) else {}
+        by_user.setdefault(r.user_id, []).append({
+            'meeting_id': r.meeting_id, 'meeting_title': title, 'item_index': r.item_index,
+            'description': it.get('description') or '', 'assigned_to': it.get('assigned_to') or '',
+            'deadline': r.deadline.isoformat(),
+        })
+    # Per-item 'overdue' is part of the sync payload: move the flagged meetings past every cursor
+    bump_change_seq(meeting_ids)
+    for user_id, items in by_user.items():
+        db.session.add(OverdueDigest(user_id=user_id, digest_date=today, item_count=len(items), items=json.dumps(items)))
+    if by_user:
+        # Overdue badges changed: let per-user caches keyed on data_revision refresh
+        User.query.filter(User.id.in_(list(by_user))).update(
+            {User.data_revision: User.data_revision + 1, User.data_changed_at: datetime.datetime.utcnow()},
+            synchronize_session=False)
+    run.item_count = len(rows)
+    run.user_count = len(by_user)
+    run.finished_at = datetime.datetime.utcnow()
+    db.session.commit()
+    return run
+
+def write_digest_outbox(run):
+    """Email-ready copies of a run's digests, for users with an email address."""
+    digests = (db.session.query(OverdueDigest, User).join(User, User.id == OverdueDigest.user_id)
+               .filter(OverdueDigest.digest_date == run.run_date, User.email.isnot(None)))
+    paths = []
+    for digest, user in digests:
+        # One bad address (or a full disk) must not cost everyone else their email
+        try:
+            paths.append(write_digest_email(user, run.run_date, json.loads(digest.items)))
+        except Exception:
+            app.logger.exception('could not write digest email for user %s', user.id)
+    return paths
+
+DIGEST_RETRY_SECONDS = 300
+
+def seconds_until_next_digest(now=None):
+    now = now or datetime.datetime.now()
+    hour, minute = (int(part) for part in app.config['DIGEST_RUN_AT'].split(':'))
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += datetime.timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+digest_cli = AppGroup('digest', help='Overdue action-item digests.')
+
+@digest_cli.command('run')
+@click.option('--date', 'run_date', help='Run as of this day (YYYY-MM-DD) instead of today.')
+def digest_run_command(run_date):
+    ensure_schema()
+    run = run_overdue_digest(datetime.date.fromisoformat(run_date) if run_date else None)
+    if run is None:
+        click.echo('digest already ran for that day')
+    else:
+        click.echo(f"{run.run_date}: {run.item_count} newly overdue items for {run.user_count} users")
+
+@digest_cli.command('scheduler')
+def digest_scheduler_command():
+    """Run the daily digest at DIGEST_RUN_AT, catching up on start if today's run is missing."""
+    ensure_schema()
+    while True:
+        try:
+            run = run_overdue_digest()
+            if run is not None:
+                click.echo(f"{run.run_date}: {run.item_count} newly overdue items for {run.user_count} users")
+            delay = seconds_until_next_digest()
+        except Exception:
+            # Keep the daemon alive; the failed day was released and is retried
+            app.logger.exception('overdue digest run failed')
+            delay = DIGEST_RETRY_SECONDS
+        finally:
+            db.session.remove()
+        time.sleep(delay)
+
+app.cli.add_command(digest_cli)
+
+
+# === Archive tier ===
+# Meetings older than ARCHIVE_AFTER_DAYS (by meeting date and last edit) move
+# their agenda, minutes and action_items into meeting_archive as one compressed
+# blob; title, date, company, attendees and the action counters stay in the hot
+# table, so list views and scans read narrow rows. Readers call
+# load_archived_text() (values are set as if loaded, nothing is written back);
+# writers call restore_meeting() first, which makes the meeting hot again.
+app.config['ARCHIVE_AFTER_DAYS'] = 365
+app.config['ARCHIVE_BATCH_SIZE'] = 200
+ARCHIVED_TEXT_COLUMNS = ('agenda', 'minutes', 'action_items')
+
+def load_archived_text(meeting):
+    if not meeting.archived or meeting.archive is None:
+        return meeting
+    body = json.loads(zlib.decompress(meeting.archive.payload).decode('utf-8'))
+    for column in ARCHIVED_TEXT_COLUMNS:
+        set_committed_value(meeting, column, body.get(column))
+    return meeting
+
+def search_terms(value):
+    return re.findall(r'\w+', (value or '').casefold())
+
+def search_archived_minutes(query, q):
+    """Ids of the archived meetings in `query` whose minutes contain `q` (case-insensitive).
+
+    The uncompressed word list narrows the candidates in SQL (every word of `q`
+    must occur in it); only those payloads are decompressed to match the phrase.
+    """
+    needle = q.casefold()
+    candidates = (query.filter(Meeting.archived == True).join(MeetingArchive, MeetingArchive.meeting_id == Meeting.id)
+                  .filter(db.or_(MeetingArchive.terms.is_(None),
+                                 db.and_(*[MeetingArchive.terms.like(f"%{term}%") for term in search_terms(q)])))
+                  .with_entities(MeetingArchive.meeting_id))
+    rows = (db.session.query(MeetingArchive.meeting_id, MeetingArchive.payload)
+            .filter(MeetingArchive.meeting_id.in_(candidates.scalar_subquery())).yield_per(100))
+    return [meeting_id for meeting_id, payload in rows
+            if needle in (json.loads(zlib.decompress(payload).decode('utf-8')).get('minutes') or '').casefold()]
+
+def restore_meeting(meeting):
+    """Bring an archived meeting's text back into the hot table before modifying it."""
+    if not meeting.archived:
+        return meeting
+    load_archived_text(meeting)
+    for column in ARCHIVED_TEXT_COLUMNS:
+        flag_modified(meeting, column)
+    meeting.archived = False
+    meeting.archive = None
+    return meeting
+
+def archive_meeting(meeting):
+    raw = json.dumps({column: getattr(meeting, column) for column in ARCHIVED_TEXT_COLUMNS}, ensure_ascii=False).encode('utf-8')
+    db.session.add(MeetingArchive(meeting_id=meeting.id, payload=zlib.compress(raw, 9), raw_size=len(raw),
+                                  terms=' '.join(sorted(set(search_terms(meeting.minutes))))))
+    # Core UPDATE so updated_at keeps its value: archiving is not a content change.
+    # It bypasses the before_flush stamping, so take the sync sequence by hand ('archived' is synced)
+    db.session.execute(db.update(Meeting).where(Meeting.id == meeting.id).values(
+        agenda='[]', minutes=None, action_items=None, archived=True, updated_at=Meeting.updated_at,
+        change_seq=next_change_seq(db.session.connection())))
+    return len(raw)
+
+def archive_old_meetings(max_age_days=None, now=None):
+    cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=max_age_days or app.config['ARCHIVE_AFTER_DAYS'])
+    archived = raw_bytes = 0
+    while True:
+        batch = (Meeting.query.filter(Meeting.archived == False, Meeting.meeting_date < cutoff,
+                                      db.or_(Meeting.updated_at.is_(None), Meeting.updated_at < cutoff))
+                 .order_by(Meeting.id).limit(app.config['ARCHIVE_BATCH_SIZE']).all())
+        if not batch:
+            return archived, raw_bytes
+        for meeting in batch:
+            raw_bytes += archive_meeting(meeting)
+        db.session.commit()
+        archived += len(batch)
+
+def archive_stats():
+    byte_len = lambda col: db.func.coalesce(db.func.length(db.cast(col, db.LargeBinary)), 0)
+    hot_count, hot_bytes = db.session.query(
+        db.func.count(Meeting.id),
+        db.func.coalesce(db.func.sum(byte_len(Meeting.agenda) + byte_len(Meeting.minutes) + byte_len(Meeting.action_items)), 0),
+    ).filter(Meeting.archived == False).one()
+    cold_count, cold_raw, cold_stored = db.session.query(
+        db.func.count(MeetingArchive.meeting_id),
+        db.func.coalesce(db.func.sum(MeetingArchive.raw_size), 0),
+        db.func.coalesce(db.func.sum(db.func.length(MeetingArchive.payload) + byte_len(MeetingArchive.terms)), 0),
+    ).one()
+    return {'hot_meetings': hot_count, 'hot_text_bytes': hot_bytes, 'archived_meetings': cold_count,
+            'archived_raw_bytes': cold_raw, 'archived_stored_bytes': cold_stored}
+
+def time_list_queries(runs=20):
+    """Median ms of the meetings_list queries for the user with the most meetings."""
+    row = (db.session.query(Meeting.user_id, db.func.count(Meeting.id)).group_by(Meeting.user_id)
+           .order_by(db.func.count(Meeting.id).desc()).first())
+    if row is None:
+        return {}
+    user_id = row[0]
+    base = Meeting.query.filter_by(user_id=user_id).order_by(Meeting.meeting_date.desc())
+    queries = {
+        'list': lambda: base.options(defer(Meeting.agenda), defer(Meeting.minutes), defer(Meeting.action_items)).all(),
+        'search': lambda: base.filter(db.or_(Meeting.title.ilike('%zz-no-match%'), Meeting.minutes.ilike('%zz-no-match%'),
+                                             Meeting.id.in_(search_archived_minutes(base, 'zz-no-match')))).all(),
+    }
+    timings = {}
+    for label, run in queries.items():
+        samples = []
+        for _run in range(runs):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+            db.session.expunge_all()
+        timings[label] = statistics.median(samples)
+    return timings
+
+def print_archive_report(stats, before=None, after=None):
+    saved = stats['archived_raw_bytes'] - stats['archived_stored_bytes']
+    click.echo(f"hot meetings      {stats['hot_meetings']:>8}   text {stats['hot_text_bytes'] / 1024:10.1f} KiB")
+    click.echo(f"archived meetings {stats['archived_meetings']:>8}   raw  {stats['archived_raw_bytes'] / 1024:10.1f} KiB"
+               f"   stored {stats['archived_stored_bytes'] / 1024:10.1f} KiB   saved {saved / 1024:10.1f} KiB")
+    for label, ms in (after or before or {}).items():
+        if before and after:
+            click.echo(f"{label:<17} {before[label]:8.2f} ms -> {ms:8.2f} ms")
+        else:
+            click.echo(f"{label:<17} {ms:8.2f} ms")
+
+archive_cli = AppGroup('archive', help='Move old meetings to compressed cold storage.')
+
+@archive_cli.command('run')
+@click.option('--age-days', type=int, help='Archive meetings older than this (default ARCHIVE_AFTER_DAYS).')
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards so SQLite returns the freed pages.')
+def archive_run_command(age_days, vacuum):
+    ensure_schema()
+    before = time_list_queries()
+    count, raw_bytes = archive_old_meetings(age_days)
+    if vacuum and db.engine.dialect.name == 'sqlite':
+        db.session.remove()
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('VACUUM')
+    click.echo(f"archived {count} meetings ({raw_bytes / 1024:.1f} KiB of text)")
+    print_archive_report(archive_stats(), before, time_list_queries())
+
+@archive_cli.command('report')
+def archive_report_command():
+    ensure_schema()
+    print_archive_report(archive_stats(), time_list_queries())
+
+app.cli.add_command(archive_cli)
+
+
+# === Revision history ===
+# Every save appends a revision. Most are small deltas against the previous
+# version; a full snapshot is written every REVISION_SNAPSHOT_INTERVAL revisions,
+# so rebuilding any version reads one snapshot plus a bounded run of deltas.
+app.config['REVISION_SNAPSHOT_INTERVAL'] = 20
+REVISION_FIELD_LABELS = {
+    'title': _l('Title'), 'meeting_date': _l('Meeting Date'), 'company': _l('Company'),
+    'company_other_name': _l('Company'), 'company_logo': _l('Logo'), 'minutes': _l('Minutes'),
+    'agenda': _l('Agenda'), 'attendees': _l('Attendees'), 'action_items': _l('Action Items'),
+}
+
+def meeting_state(meeting):
+    def as_list(raw):
+        try:
+            value = json.loads(raw or '[]')
+        except ValueError:
+            value = []
+        return value if isinstance(value, list) else []
+    meeting_date = meeting.meeting_date
+    if meeting_date is not None and not isinstance(meeting_date, datetime.datetime):
+        meeting_date = datetime.datetime.combine(meeting_date, datetime.time())  # form gives a date, the DB a datetime
+    return {
+        'title': meeting.title,
+        'meeting_date': meeting_date.isoformat() if meeting_date else None,
+        'company': meeting.company,
+        'company_other_name': meeting.company_other_name,
+        'company_logo': meeting.company_logo,
+        'minutes': meeting.minutes or '',
+        'agenda': as_list(meeting.agenda),
+        'attendees': as_list(meeting.attendees),
+        'action_items': as_list(meeting.action_items),
+    }
+
+def revision_chain(meeting_id, number=None):
+    """Rows needed to rebuild revision `number` (default: the latest): last snapshot up to it."""
+    query = MeetingRevision.query.filter(MeetingRevision.meeting_id == meeting_id)
+    if number is not None:
+        query = query.filter(MeetingRevision.number <= number)
+    start = (query.filter(MeetingRevision.kind == 'snapshot')
+             .with_entities(db.func.max(MeetingRevision.number)).scalar())
+    if start is None:
+        return []
+    return query.filter(MeetingRevision.number >= start).order_by(MeetingRevision.number).all()
+
+def meeting_version(meeting_id, number):
+    chain = revision_chain(meeting_id, number)
+    if not chain or chain[-1].number != number:
+        return None
+    return revisions.rebuild([(r.kind, r.payload) for r in chain])
+
+REVISION_NUMBER_ATTEMPTS = 3
+
+def record_revision(meeting, before=None):
+    """Append a revision for the meeting's current state; call before commit.
+
+    `before` is the state prior to this change. Meetings saved before history
+    existed get it recorded as their first revision, so the edit is diffable.
+    A concurrent save can take the same revision number first: the insert runs
+    in a savepoint and, on the unique-constraint error, is redone on top of
+    the revision that won.
+    """
+    db.session.flush()  # new meetings need their id
+    for attempt in range(REVISION_NUMBER_ATTEMPTS):
+        try:
+            with db.session.begin_nested():
+                return _record_revision(meeting, before)
+        except IntegrityError:
+            if attempt + 1 == REVISION_NUMBER_ATTEMPTS:
+                raise
+
+def _record_revision(meeting, before):
+    interval = app.config['REVISION_SNAPSHOT_INTERVAL']
+    chain = revision_chain(meeting.id)
+    if chain:
+        head = revisions.rebuild([(r.kind, r.payload) for r in chain])
+        number, since_snapshot = chain[-1].number, chain[-1].number - chain[0].number
+    elif before is not None:
+        kind, payload, _changed = revisions.encode_revision(None, before, 0, interval)
+        db.session.add(MeetingRevision(meeting_id=meeting.id, number=1, kind=kind, payload=payload, changed=''))
+        head, number, since_snapshot = before, 1, 0
+    else:
+        head, number, since_snapshot = None, 0, 0
+    state = meeting_state(meeting)
+    if head == state:
+        return None
+    kind, payload, changed = revisions.encode_revision(head, state, since_snapshot, interval)
+    if head is None:
+        changed = []  # the first recorded version is the original, whatever fields it fills
+    revision = MeetingRevision(meeting_id=meeting.id, number=number + 1, kind=kind, payload=payload,
+                               changed=','.join(changed)[:200])
+    db.session.add(revision)
+    db.session.flush()  # surface a taken revision number inside the savepoint
+    return revision
+
+def action_item_text(item):
+    if not isinstance(item, dict):
+        return str(item)
+    parts = [item.get('description') or '']
+    if item.get('assigned_to'):
+        parts.append(f"({item['assigned_to']})")
+    if item.get('deadline'):
+        parts.append(str(item['deadline']))
+    if action_item_done(item):
+        parts.append('✓')
+    return ' '.join(p for p in parts if p)
+
+def revision_diff(old, new):
+    """Display rows per changed field: [{'field', 'label', 'rows': [(tag, text)]}], tag in ' ', '-', '+'."""
+    sections = []
+    for field in revisions.FIELDS:
+        a, b = (old or {}).get(field), new.get(field)
+        if a == b or (not a and not b):
+            continue
+        if field in revisions.TEXT_FIELDS:
+            a_lines, b_lines = (a or '').splitlines(), (b or '').splitlines()
+        elif field in revisions.LIST_FIELDS:
+            fmt = action_item_text if field == 'action_items' else str
+            a_lines, b_lines = [fmt(x) for x in a or []], [fmt(x) for x in b or []]
+        else:
+            a_lines, b_lines = ([str(a)] if a else []), ([str(b)] if b else [])
+        rows = [(line[0], line[2:]) for line in difflib.ndiff(a_lines, b_lines) if line[0] in ' -+']
+        sections.append({'field': field, 'label': REVISION_FIELD_LABELS[field], 'rows': rows})
+    return sections
+
+
+# === Delta sync API ===
+# Every flushed change to a meeting takes the next value of one global counter and
+# stores it in meeting.change_seq; deleting a meeting leaves a tombstone with its
+# own sequence value. The counter row is incremented inside the writing transaction,
+# so a concurrent writer waits for the commit and sequence values become visible in
+# order. Clients keep the largest value they have seen as their cursor and
+# GET /api/v1/meetings?since=<cursor> returns only what changed after it.
+API_VERSION = 1
+app.config['SYNC_PAGE_SIZE'] = 100
+
+class MutationError(ValueError):
+    def __init__(self, code, status=400):
+        super().__init__(code)
+        self.code = code
+        self.status = status
+
+def next_change_seq(connection):
+    if connection.execute(text("UPDATE change_counter SET value = value + 1 WHERE id = 1")).rowcount == 0:
+        connection.execute(text("INSERT INTO change_counter (id, value) VALUES (1, 1)"))
+    return connection.execute(text("SELECT value FROM change_counter WHERE id = 1")).scalar()
+
+def bump_change_seq(meeting_ids):
+    """Re-stamp meetings whose synced fields changed outside an ORM flush of the Meeting row."""
+    connection = db.session.connection()
+    for meeting_id in meeting_ids:
+        db.session.execute(db.update(Meeting).where(Meeting.id == meeting_id).values(
+            change_seq=next_change_seq(connection), updated_at=Meeting.updated_at))
+
+@db.event.listens_for(OrmSession, 'before_flush')
+def stamp_meeting_changes(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, Meeting)]
+    changed += [obj for obj in session.dirty
+                if isinstance(obj, Meeting) and session.is_modified(obj, include_collections=False)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Meeting)]
+    if not changed and not deleted:
+        return
+    connection = session.connection()
+    for meeting in changed:
+        meeting.change_seq = next_change_seq(connection)
+    for meeting in deleted:
+        session.add(MeetingTombstone(meeting_id=meeting.id, user_id=meeting.user_id, change_seq=next_change_seq(connection)))
+
+def iso_utc(value):
+    return value.isoformat() + 'Z' if value else None
+
+def meeting_to_json(meeting, overdue_indices=()):
+    load_archived_text(meeting)
+    def load(value):
+        try: return json.loads(value or '[]')
+        except Exception: return []
+    action_items = []
+    for index, it in enumerate(load(meeting.action_items)):
+        if isinstance(it, dict):
+            action_items.append({
+                'index': index, 'description': it.get('description') or '', 'assigned_to': it.get('assigned_to') or '',
+                'deadline': it.get('deadline') or None, 'is_done': action_item_done(it), 'done_at': it.get('done_at'),
+                'overdue': index in overdue_indices,
+            })
+    return {
+        'id': meeting.id, 'title': meeting.title, 'meeting_date': meeting.meeting_date.date().isoformat(),
+        'company': meeting.company, 'company_other_name': meeting.company_other_name,
+        'attendees': load(meeting.attendees), 'agenda': load(meeting.agenda), 'minutes': meeting.minutes or '',
+        'action_items': action_items, 'archived': bool(meeting.archived),
+        'updated_at': iso_utc(meeting.updated_at), 'change_seq': meeting.change_seq,
+    }
+
+def meeting_changes(user, since, limit):
+    """Meetings and deletions of a user with change_seq > since, oldest first, at most limit entries."""
+    meetings = (Meeting.query.options(selectinload(Meeting.archive))
+                .filter(Meeting.user_id == user.id, Meeting.change_seq > since)
+                .order_by(Meeting.change_seq).limit(limit + 1).all())
+    tombstones = (MeetingTombstone.query.filter(MeetingTombstone.user_id == user.id, MeetingTombstone.change_seq > since)
+                  .order_by(MeetingTombstone.change_seq).limit(limit + 1).all())
+    entries = sorted(meetings + tombstones, key=lambda e: e.change_seq)
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    page_meetings = [e for e in entries if isinstance(e, Meeting)]
+    overdue = {}
+    if page_meetings:
+        rows = (overdue_filter(db.session.query(ActionDeadline.meeting_id, ActionDeadline.item_index))
+                .filter(ActionDeadline.meeting_id.in_([m.id for m in page_meetings])))
+        for meeting_id, item_index in rows:
+            overdue.setdefault(meeting_id, set()).add(item_index)
+    # SQLite may reuse the id of a deleted meeting; a later upsert supersedes the tombstone
+    live_ids = {m.id for m in page_meetings}
+    return {
+        'ok': True, 'api_version': API_VERSION, 'since': since,
+        'cursor': entries[-1].change_seq if entries else since, 'has_more': has_more,
+        'meetings': [meeting_to_json(m, overdue.get(m.id, ())) for m in page_meetings],
+        'deleted': [e.meeting_id for e in entries if isinstance(e, MeetingTombstone) and e.meeting_id not in live_ids],
+    }
+
+def parse_name_list(value):
+    if not isinstance(value, list):
+        raise MutationError('invalid_list')
+    return [v.strip() for v in value if isinstance(v, str) and v.strip()]
+
+def apply_meeting_fields(meeting, fields):
+    """Apply API fields with the same normalization as the meeting form."""
+    allowed = {'title', 'meeting_date', 'company', 'company_other_name', 'attendees', 'agenda', 'minutes', 'action_items'}
+    if not isinstance(fields, dict) or set(fields) - allowed:
+        raise MutationError('unknown_field')
+    if 'title' in fields:
+        title = fields['title'].strip() if isinstance(fields['title'], str) else ''
+        if not title or len(title) > 100:
+            raise MutationError('invalid_title')
+        meeting.title = title
+    if 'meeting_date' in fields:
+        try:
+            meeting.meeting_date = datetime.datetime.fromisoformat(fields['meeting_date'])
+        except (TypeError, ValueError):
+            raise MutationError('invalid_meeting_date')
+    if 'company' in fields:
+        company = company_registry.get(fields['company']) if fields['company'] else None
+        if fields['company'] and not company and fields['company'] != 'Other':
+            raise MutationError('invalid_company')
+        meeting.company = fields['company'] or None
+        meeting.company_id = company['id'] if company else None
+    if 'company_other_name' in fields:
+        meeting.company_other_name = fields['company_other_name'] or None
+    if 'minutes' in fields:
+        meeting.minutes = fields['minutes'] if isinstance(fields['minutes'], str) else None
+    if 'agenda' in fields:
+        meeting.agenda = json.dumps(parse_name_list(fields['agenda']))
+    if 'attendees' in fields:
+        meeting.attendees = json.dumps(parse_name_list(fields['attendees']))
+    if 'action_items' in fields or 'attendees' in fields:
+        attendees = json.loads(meeting.attendees or '[]')
+        if 'action_items' in fields:
+            if not isinstance(fields['action_items'], list):
+                raise MutationError('invalid_list')
+            raw_items = fields['action_items']
+        else:
+            raw_items = json.loads(meeting.action_items or '[]')
+        items = []
+        for raw in raw_items:
+            if not isinstance(raw, dict):
+                raise MutationError('invalid_action_item')
+            deadline = raw.get('deadline') or None
+            if deadline:
+                try: deadline = datetime.date.fromisoformat(deadline).isoformat()
+                except (TypeError, ValueError): raise MutationError('invalid_deadline')
+            assigned_to = raw.get('assigned_to') or ''
+            item = {'description': raw.get('description') or '',
+                    'assigned_to': assigned_to if assigned_to in attendees else '',
+                    'deadline': deadline}
+            if action_item_done(raw):
+                item['is_done'] = True
+                item['done_at'] = raw.get('done_at') or datetime.datetime.utcnow().isoformat()
+            items.append(item)
+        meeting.action_items = json.dumps(items)
+    sync_action_deadlines(meeting)
+
+def owned_meeting(meeting_id):
+    meeting = db.session.get(Meeting, meeting_id) if isinstance(meeting_id, int) else None
+    if meeting is None or meeting.user_id != current_user.id:
+        raise MutationError('not_found', 404)
+    return meeting
+
+def apply_mutation(mutation, orphan_logos):
+    op = mutation.get('op') if isinstance(mutation, dict) else None
+    if op == 'create_meeting':
+        fields = mutation.get('fields') or {}
+        if not isinstance(fields, dict) or 'title' not in fields or 'meeting_date' not in fields:
+            raise MutationError('missing_field')
+        meeting = Meeting(agenda='[]', attendees='[]', action_items='[]', user_id=current_user.id)
+        apply_meeting_fields(meeting, fields)
+        db.session.add(meeting)
+        record_revision(meeting)
+        return {'op': op, 'id': meeting.id, 'client_ref': mutation.get('client_ref')}
+    meeting = owned_meeting(mutation.get('meeting_id') if isinstance(mutation, dict) else None)
+    if op == 'update_meeting':
+        restore_meeting(meeting)
+        before = meeting_state(meeting)
+        apply_meeting_fields(meeting, mutation.get('fields'))
+        record_revision(meeting, before)
+    elif op == 'set_action_done':
+        restore_meeting(meeting)
+        before = meeting_state(meeting)
+        items = json.loads(meeting.action_items or '[]')
+        index = mutation.get('index')
+        if not isinstance(index, int) or not 0 <= index < len(items) or not isinstance(items[index], dict):
+            raise MutationError('index_out_of_range')
+        done = bool(mutation.get('done'))
+        items[index]['is_done'] = done
+        items[index]['done_at'] = datetime.datetime.utcnow().isoformat() if done else None
+        meeting.action_items = json.dumps(items)
+        sync_action_deadlines(meeting, items)
+        record_revision(meeting, before)
+    elif op == 'delete_meeting':
+        if meeting.company_logo:
+            orphan_logos.add(meeting.company_logo)
+        db.session.delete(meeting)
+    else:
+        raise MutationError('unknown_op')
+    return {'op': op, 'id': meeting.id}
+
+
+# === Response compression and conditional GET ===
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+class GzipStream:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data):
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+class BrotliStream:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_chunks(chunks, stream):
+    # Each chunk is flushed through so streamed pages still render progressively
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield stream.compress(chunk)
+        yield stream.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+@app.after_request
+def compress_response(response):
+    if (request.method == 'HEAD' or response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    if not response.is_streamed and response.content_length is not None \
+            and response.content_length < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    stream = BrotliStream(app.config['COMPRESS_BROTLI_QUALITY']) if encoding == 'br' \
+        else GzipStream(app.config['COMPRESS_GZIP_LEVEL'])
+    tag, weak = response.get_etag()
+    if tag and not weak:
+        response.set_etag(tag, weak=True)  # the bytes differ per encoding
+    response.headers['Content-Encoding'] = encoding
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, stream)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(stream.compress(response.get_data()) + stream.finish())
+    return response
+
+@lru_cache(maxsize=1)
+def template_fingerprint():
+    # Templates only change on deploy; part of every page ETag
+    loader = app.jinja_loader
+    stamps = [(name, os.path.getmtime(os.path.join(loader.searchpath[0], name)))
+              for name in sorted(app.jinja_env.list_templates(extensions=['html']))]
+    return hashlib.sha1(repr(stamps).encode('utf-8')).hexdigest()[:12]
+
+def page_etag():
+    """Weak validator for a logged-in page: changes with the user's data and UI prefs."""
+    user = current_user
+    parts = (request.full_path, user.id, user.data_revision or 0, user.display_name, user.avatar_path,
+             select_locale(), session.get('ui_font_fa'), session.get('ui_font_en'),
+             company_registry.revision(), datetime.date.today(), template_fingerprint())
+    return 'page-' + hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+def conditional_page(view):
+    # Unchanged pages return 304 before the view queries anything or runs its template
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated or session.get('_flashes'):
+            return view(*args, **kwargs)
+        etag = page_etag()
+        if not is_resource_modified(request.environ, etag=etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+        if response.status_code in (200, 304):
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+
+# === Password hashing pool ===
+# bcrypt is deliberately CPU-bound. Hashes run in a small process pool with a cap
+# on pending jobs, so a login burst cannot monopolise every CPU; past the cap,
+# requests are turned away with 503 instead of queueing without bound.
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+_password_executor = None
+_password_executor_pid = None
+_password_executor_lock = threading.Lock()
+_password_slots = None
+
+def password_executor(broken=None):
+    """The process's hashing pool; `broken` is a pool that died and must be replaced."""
+    global _password_executor, _password_executor_pid, _password_slots
+    with _password_executor_lock:
+        # Created lazily and per process: a pool does not survive a fork
+        if _password_executor is None or _password_executor_pid != os.getpid():
+            _password_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_MAX_PENDING'])
+        elif _password_executor is not broken:
+            return _password_executor, _password_slots
+        elif broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        # Pool workers are started by a forkserver (or spawned), never forked from a
+        # multi-threaded web worker. They re-import the __main__ module (see passwords.py):
+        # entry-point scripts need an `if __name__ == '__main__':` guard
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _password_executor = ProcessPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'], mp_context=context)
+        _password_executor_pid = os.getpid()
+        return _password_executor, _password_slots
+
+def run_password_job(fn, *args):
+    if app.config['PASSWORD_HASH_WORKERS'] <= 0:
+        return fn(*args)
+    executor, slots = password_executor()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    # The slot is held until the job itself ends, not until this request gives up
+    # waiting, so PASSWORD_HASH_MAX_PENDING bounds the work queued in the pool
+    for attempt in range(2):
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            executor = password_executor(broken=executor)[0]
+            continue
+        future.add_done_callback(lambda _f: slots.release())
+        try:
+            return future.result(timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeoutError:
+            raise PasswordHasherBusy()
+        except BrokenProcessPool:
+            # A pool worker died (e.g. OOM-killed): replace the pool, retry once
+            executor = password_executor(broken=executor)[0]
+            if not slots.acquire(blocking=False):
+                raise PasswordHasherBusy()
+    slots.release()
+    raise PasswordHasherBusy()
+
+def generate_password_hash(password):
+    return run_password_job(passwords.hash_password, password, app.config['BCRYPT_LOG_ROUNDS'])
+
+def check_password_hash(pw_hash, password):
+    return run_password_job(passwords.check_password, pw_hash, password)
+
+def password_needs_rehash(pw_hash):
+    return passwords.hash_rounds(pw_hash) != app.config['BCRYPT_LOG_ROUNDS']
+
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    return _('The server is busy. Please try again in a few seconds.'), 503, {'Retry-After': '5'}
+
+
+# === Admission control ===
+# Checked before the view runs for every endpoint listed in ADMISSION_RULES, so a
+# route is limited by configuration alone ('in_view' rules: when the view calls
+# admit()). Rejections are 429 with Retry-After.
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = max(1, int(math.ceil(min(retry_after, 3600))))
+
+_admission_backend = None
+_admission_backend_pid = None
+_admission_backend_lock = threading.Lock()
+
+def admission_backend():
+    global _admission_backend, _admission_backend_pid
+    with _admission_backend_lock:
+        if _admission_backend is None or _admission_backend_pid != os.getpid():
+            if app.config['ADMISSION_BACKEND'] == 'sqlite':
+                _admission_backend = admission.SQLiteBackend(app.config['ADMISSION_DB'])
+            else:
+                _admission_backend = admission.MemoryBackend()
+            _admission_backend_pid = os.getpid()
+        return _admission_backend
+
+def admission_buckets(endpoint, rule):
+    # Anonymous callers (rules with 'anonymous': True) only get a per-address bucket,
+    # so they can never drain the global budget shared by logged-in users
+    if current_user.is_authenticated:
+        client = f"user:{current_user.id}"
+    else:
+        client = f"addr:{request.remote_addr}"
+    buckets = []
+    if rule.get('user_per_minute'):
+        buckets.append(admission.Bucket(f"{endpoint}:{client}", rule['user_per_minute'] / 60, rule.get('user_burst', 1)))
+    if rule.get('global_per_minute') and current_user.is_authenticated:
+        buckets.append(admission.Bucket(f"{endpoint}:*", rule['global_per_minute'] / 60, rule.get('global_burst', 1)))
+    return buckets
+
+@app.before_request
+def admit_request():
+    rule = app.config['ADMISSION_RULES'].get(request.endpoint)
+    if rule and not rule.get('in_view'):
+        admit(request.endpoint)
+    return None
+
+def admit(endpoint):
+    """Charge the current request against `endpoint`'s rule; raises AdmissionRejected."""
+    rule = app.config['ADMISSION_RULES'].get(endpoint)
+    if not rule or not app.config['ADMISSION_ENABLED']:
+        return
+    if not current_user.is_authenticated and not rule.get('anonymous'):
+        return  # login-protected route: the view redirects to the login page anyway
+    backend = admission_backend()
+    wait = backend.take(admission_buckets(endpoint, rule))
+    if wait:
+        raise AdmissionRejected(wait)
+    if rule.get('concurrency') and current_user.is_authenticated:
+        lease = backend.acquire(f"{endpoint}:slots", rule['concurrency'],
+                                rule.get('queue_timeout', 0), rule.get('lease_ttl', 300))
+        if lease is None:
+            raise AdmissionRejected(rule.get('queue_timeout') or 5)
+        g.admission_lease = lease
+
+@app.teardown_request
+def release_admission(exc=None):
+    lease = g.pop('admission_lease', None)
+    if lease is not None:
+        admission_backend().release(lease)
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    headers = {'Retry-After': str(e.retry_after)}
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify({'ok': False, 'error': 'rate_limited', 'retry_after': e.retry_after}), 429, headers
+    return _('Too many requests. Please try again in a few seconds.'), 429, headers
+
+
+# === Upload processing pipeline ===
+# Uploads are streamed to a temp file (size-capped, hashed on the fly) and stored
+# under their content hash, so the same logo uploaded ten times is one file.
+# Decoding, validation and re-encoding with Pillow run on a background thread.
+class UploadTooLarge(ValueError):
+    pass
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_IMAGE_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.webp': 'WEBP'}
+# Formats Pillow reports for files that are valid for the extension: phone cameras
+# write MPO (JPEG with extra frames); re-encoding keeps the first frame as plain JPEG
+UPLOAD_DECODED_FORMATS = {'JPEG': ('JPEG', 'MPO')}
+
+_upload_executor = None
+_upload_executor_pid = None
+_upload_executor_lock = threading.Lock()
+
+def submit_upload_job(fn, *args):
+    # Created lazily and per process: threads do not survive a fork
+    global _upload_executor, _upload_executor_pid
+    with _upload_executor_lock:
+        if _upload_executor is None or _upload_executor_pid != os.getpid():
+            _upload_executor = ThreadPoolExecutor(max_workers=app.config['UPLOAD_WORKERS'], thread_name_prefix='upload')
+            _upload_executor_pid = os.getpid()
+        return _upload_executor.submit(fn, *args)
+
+def store_upload(file, folder, subdir, allowed_extensions):
+    """Store an uploaded image content-addressed; returns e.g. 'custom/<hash>.png'.
+
+    Returns None if the extension is not allowed, raises UploadTooLarge past
+    UPLOAD_MAX_BYTES. New files are queued for validation/re-encoding once the
+    current request has finished (i.e. after the view committed its reference).
+    """
+    _, ext = os.path.splitext(secure_filename(file.filename or ''))
+    ext = ext.lower()
+    if ext not in allowed_extensions:
+        return None
+    max_bytes = app.config['UPLOAD_MAX_BYTES']
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-', suffix=ext)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        unique_name = f"{digest.hexdigest()[:32]}{ext}"
+        final_path = os.path.join(folder, unique_name)
+        relpath = f"{subdir}/{unique_name}"
+        if os.path.exists(final_path):
+            # Duplicate: reuse the stored file; touching it keeps the GC grace period honest
+            os.remove(tmp_path)
+            os.utime(final_path)
+        else:
+            os.replace(tmp_path, final_path)
+
+            @after_this_request
+            def queue_processing(response):
+                submit_upload_job(process_uploaded_image, final_path, relpath)
+                return response
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return relpath
+
+def process_uploaded_image(path, relpath):
+    """Background job: decode-validate, strip metadata, downscale and re-encode in place.
+
+    Files that do not decode as the image type their extension claims are
+    deleted and any references to them are cleared; other failures (disk,
+    memory) are logged and leave the file as uploaded.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    ext = os.path.splitext(path)[1].lower()
+    fmt = UPLOAD_IMAGE_FORMATS[ext]
+    max_dim = app.config['UPLOAD_MAX_DIMENSION']
+    tmp_path = None
+    try:
+        with Image.open(path) as img:
+            if img.format not in UPLOAD_DECODED_FORMATS.get(fmt, (fmt,)):
+                raise ValueError(f"{img.format} data in a {ext} file")
+            img.verify()
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_dim, max_dim))
+            if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.reencode-', suffix=ext)
+            os.close(fd)
+            options = {'optimize': True} if fmt == 'PNG' else {'quality': 90}
+            img.save(tmp_path, fmt, **options)
+        os.replace(tmp_path, path)
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError, ValueError) as e:
+        app.logger.warning("Rejected upload %s: %s", relpath, e)
+        for p in (tmp_path, path):
+            if p and os.path.exists(p):
+                os.remove(p)
+        with app.app_context():
+            clear_upload_references(relpath)
+    except Exception:
+        app.logger.exception("Could not process upload %s; keeping it as uploaded", relpath)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def clear_upload_references(relpath):
+    """Unset a rejected upload wherever it is used, through the ORM like a user's edit.
+
+    The flush stamps change_seq, the edit gets a revision and data_revision moves,
+    so sync clients and cached pages stop pointing at the deleted file.
+    """
+    for meeting in Meeting.query.filter_by(company_logo=relpath).all():
+        load_archived_text(meeting)
+        before = meeting_state(meeting)
+        meeting.company_logo = None
+        record_revision(meeting, before)
+        bump_data_revision(meeting.author)
+    for user in User.query.filter_by(avatar_path=relpath).all():
+        user.avatar_path = None
+    db.session.commit()
+
+def collect_orphan_uploads(candidates=None, grace_seconds=None):
+    """Delete logo/avatar files no meeting or user references; returns the removed paths.
+
+    candidates limits the sweep to the given relative paths (e.g. the logo of a
+    meeting that was just deleted). Files younger than the grace period are kept,
+    so uploads whose referencing row is not committed yet are never collected.
+    """
+    if grace_seconds is None:
+        grace_seconds = app.config['UPLOAD_ORPHAN_GRACE_SECONDS']
+    referenced = {p for (p,) in db.session.query(Meeting.company_logo).filter(Meeting.company_logo.isnot(None))}
+    referenced |= {p for (p,) in db.session.query(User.avatar_path).filter(User.avatar_path.isnot(None))}
+    now = time.time()
+    removed = []
+    for subdir, folder in (('custom', app.config['UPLOAD_FOLDER']), ('avatars', app.config['AVATAR_UPLOAD_FOLDER'])):
+        for fname in os.listdir(folder):
+            relpath = f"{subdir}/{fname}"
+            path = os.path.join(folder, fname)
+            if candidates is not None and relpath not in candidates:
+                continue
+            if relpath in referenced or not os.path.isfile(path):
+                continue
+            try:
+                if now - os.path.getmtime(path) < grace_seconds:
+                    continue
+                os.remove(path)
+                removed.append(relpath)
+            except FileNotFoundError:
+                pass
+    return removed
+
+@app.cli.command('gc-uploads')
+def gc_uploads_command():
+    """Delete orphaned files in static/images/custom and static/images/avatars."""
+    ensure_schema()
+    removed = collect_orphan_uploads()
+    for relpath in removed:
+        click.echo(f"removed {relpath}")
+    click.echo(f"{len(removed)} orphaned upload(s) removed")
+
+
 # === Form Definitions (Using _l directly inside class definitions) ===
 class RegistrationForm(FlaskForm):
     username = StringField(_l('Username'),
@@ -310,14 +2164,7 @@ class MeetingForm(FlaskForm):
     title = StringField(_l('Title'), validators=[DataRequired()])
     meeting_date = DateField(_l('Meeting Date'), format='%Y-%m-%d', validators=[DataRequired()])
     company = SelectField(_l('Company'),
-                          choices=[
-                              ('', _l('-- Select Company --')),
-                              ('Rabe Al Mustaqbal', _l('Rabe Al Mustaqbal')),
-                              ('Rahkar Gasht', _l('Rahkar Gasht')),
-                              ('EazyMig', _l('EazyMig')),
-                              ('Abu Dhabi', _l('Abu Dhabi')),
-                              ('Other', _l('Other'))
-                          ],
+                          choices=[],  # filled from the company registry per request (company_choices)
                           default='',
                           validators=[Optional()])
     attendees = FieldList(StringField(_l('Attendee')), min_entries=0, label=_l('Attendees'))
@@ -333,34 +2180,23 @@ class MeetingForm(FlaskForm):
 
 # === Route Definitions (Using _ where needed) ===
 @app.route('/')
+@conditional_page
 def index():
     meeting_count = 0
     recent_meetings = []
     total_actions = 0
     overdue_actions = 0
+    digests = []
     if current_user.is_authenticated:
-        user_meetings = Meeting.query.filter_by(author=current_user).order_by(Meeting.meeting_date.desc()).all()
-        meeting_count = len(user_meetings)
-        recent_meetings = user_meetings[:5]
-        today = datetime.date.today()
-        for m in user_meetings:
-            try:
-                items = json.loads(m.action_items or '[]')
-            except Exception:
-                items = []
-            for it in items:
-                if isinstance(it, dict):
-                    total_actions += 1
-                    # Skip overdue if already done
-                    is_done = bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
-                    if not is_done:
-                        dl = it.get('deadline')
-                        try:
-                            if dl and datetime.date.fromisoformat(dl) < today:
-                                overdue_actions += 1
-                        except Exception:
-                            pass
-    return render_template('index.html', title=_('Home'), meeting_count=meeting_count, recent_meetings=recent_meetings, total_actions=total_actions, overdue_actions=overdue_actions)
+        meeting_count, total_actions = db.session.query(db.func.count(Meeting.id), db.func.coalesce(db.func.sum(Meeting.action_total), 0)).filter(Meeting.user_id == current_user.id).one()
+        recent_meetings = (Meeting.query.filter_by(author=current_user).options(defer(Meeting.agenda), defer(Meeting.minutes), defer(Meeting.action_items))
+                           .order_by(Meeting.meeting_date.desc()).limit(5).all())
+        # Overdue state comes from the daily digest job (see run_overdue_digest)
+        overdue_actions = overdue_filter(ActionDeadline.query).filter(ActionDeadline.user_id == current_user.id).count()
+        for digest in (OverdueDigest.query.filter_by(user_id=current_user.id)
+                       .order_by(OverdueDigest.digest_date.desc()).limit(app.config['DIGEST_DASHBOARD_COUNT'])):
+            digests.append({'date': digest.digest_date, 'date_jalali': format_jalali(digest.digest_date), 'items': json.loads(digest.items)})
+    return render_template('index.html', title=_('Home'), meeting_count=meeting_count, recent_meetings=recent_meetings, total_actions=total_actions, overdue_actions=overdue_actions, digests=digests)
 
 @app.route('/set_language/<lang_code>')
 def set_language(lang_code):
@@ -377,7 +2213,7 @@ def set_language(lang_code):
 def register():
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = generate_password_hash(form.password.data)
         user = User(username=form.username.data, password_hash=hashed_password)
         db.session.add(user); db.session.commit()
         flash(_('Account created for %(username)s! You can now log in.', username=form.username.data), 'success')
@@ -390,7 +2226,11 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user and bcrypt.check_password_hash(user.password_hash, form.password.data):
+        if user and check_password_hash(user.password_hash, form.password.data):
+            if password_needs_rehash(user.password_hash):
+                # Transparently move the stored hash to the configured work factor
+                user.password_hash = generate_password_hash(form.password.data)
+                db.session.commit()
             login_user(user, remember=form.remember.data)
             next_page = request.args.get('next')
             flash(_('Login Successful!'), 'success')
@@ -409,6 +2249,7 @@ def logout():
 @login_required
 def new_meeting():
     form = MeetingForm()
+    form.company.choices = company_choices(select_locale())
     if form.validate_on_submit():
         agenda_list_from_form = form.agenda_items.data; agenda_list_filtered = [item for item in agenda_list_from_form if isinstance(item, str) and item.strip()]; agenda_json_string = json.dumps(agenda_list_filtered)
         attendees_list_from_form = form.attendees.data; attendees_list_filtered = [item for item in attendees_list_from_form if isinstance(item, str) and item.strip()]; attendees_json_string = json.dumps(attendees_list_filtered)
@@ -425,15 +2266,16 @@ def new_meeting():
         if form.company.data == 'Other':
             file = request.files.get('company_logo')
             if file and file.filename:
-                filename = secure_filename(file.filename)
-                name, ext = os.path.splitext(filename)
-                if ext.lower() in ALLOWED_LOGO_EXTENSIONS:
-                    unique_name = f"{name}_{int(datetime.datetime.utcnow().timestamp())}{ext.lower()}"
-                    save_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_name)
-                    file.save(save_path)
-                    uploaded_logo_relpath = f"custom/{unique_name}"
-        meeting = Meeting(title=form.title.data, meeting_date=form.meeting_date.data, attendees=attendees_json_string, agenda=agenda_json_string, minutes=form.minutes.data, action_items=action_items_json_string, company=form.company.data, company_logo=uploaded_logo_relpath, company_other_name=request.form.get('company_other_name') or None, author=current_user)
-        db.session.add(meeting); db.session.commit()
+                try:
+                    uploaded_logo_relpath = store_upload(file, app.config['UPLOAD_FOLDER'], 'custom', ALLOWED_LOGO_EXTENSIONS)
+                except UploadTooLarge:
+                    flash(_('The uploaded logo is too large.'), 'warning')
+        company = company_registry.get(form.company.data)
+        meeting = Meeting(title=form.title.data, meeting_date=form.meeting_date.data, attendees=attendees_json_string, agenda=agenda_json_string, minutes=form.minutes.data, action_items=action_items_json_string, company=form.company.data, company_id=company['id'] if company else None, company_logo=uploaded_logo_relpath, company_other_name=request.form.get('company_other_name') or None, author=current_user)
+        sync_action_deadlines(meeting, serializable_action_items)
+        previous_revision = bump_data_revision(current_user)
+        db.session.add(meeting); record_revision(meeting); db.session.commit()
+        attendee_index.update(current_user, previous_revision, new_names=meeting_people(attendees_json_string, action_items_json_string))
         flash(_('Your meeting has been created!'), 'success')
         return redirect(url_for('meetings_list'))
     # Pass translated title and legend
@@ -441,6 +2283,7 @@ def new_meeting():
 
 @app.route("/meetings")
 @login_required
+@conditional_page
 def meetings_list():
     page = request.args.get('page', default=1, type=int)
     per_page = 9
@@ -452,11 +2295,9 @@ def meetings_list():
 
     query = Meeting.query.filter_by(author=current_user)
 
-    if q:
-        like = f"%{q}%"
-        query = query.filter(db.or_(Meeting.title.ilike(like), Meeting.minutes.ilike(like)))
     if company_filter:
-        query = query.filter(Meeting.company == company_filter)
+        company = company_registry.get(company_filter)
+        query = query.filter(Meeting.company_id == company['id'] if company else Meeting.company == company_filter)
     try:
         if date_from:
             df = datetime.datetime.fromisoformat(date_from)
@@ -469,51 +2310,28 @@ def meetings_list():
             query = query.filter(Meeting.meeting_date < dt)
     except Exception:
         pass
+    if q:
+        like = f"%{q}%"
+        # Archived minutes live compressed in meeting_archive: match those in Python,
+        # limited to the archived meetings that passed the other filters
+        query = query.filter(db.or_(Meeting.title.ilike(like), Meeting.minutes.ilike(like),
+                                    Meeting.id.in_(search_archived_minutes(query, q))))
 
     query = query.order_by(Meeting.meeting_date.desc())
-    # Fetch all, then filter by action status in Python (JSON field)
-    all_meetings = query.all()
+    # Fetch all (without the large text columns), then filter by action status in Python
+    all_meetings = query.options(defer(Meeting.agenda), defer(Meeting.minutes), defer(Meeting.action_items)).all()
 
     meetings_data_full = []
-    default_logo_filename = 'default_logo.png'
-    logo_mapping = {'Rabe Al Mustaqbal': 'rabe_al_mustaqbal.png','Rahkar Gasht': 'rahkar_gasht.png','EazyMig': 'eazymig.png','Abu Dhabi': 'abu_dhabi.png','Other': default_logo_filename}
+    locale = select_locale()
+    overdue_by_meeting = dict(overdue_filter(db.session.query(ActionDeadline.meeting_id, db.func.count(ActionDeadline.id)))
+                              .filter(ActionDeadline.user_id == current_user.id).group_by(ActionDeadline.meeting_id).all())
 
-    today = datetime.date.today()
     for meeting in all_meetings:
-        company_name = meeting.company
-        if getattr(meeting, 'company_logo', None):
-            logo_filename = meeting.company_logo
-        else:
-            logo_filename = logo_mapping.get(company_name, default_logo_filename)
-        if not logo_filename:
-            logo_filename = default_logo_filename
-        logo_path_check = os.path.join(basedir, 'static', 'images', logo_filename)
-        if not os.path.exists(logo_path_check):
-            logo_filename = default_logo_filename
-            default_logo_path_check = os.path.join(basedir, 'static', 'images', default_logo_filename)
-            if not os.path.exists(default_logo_path_check):
-                logo_filename = None
-        # Action stats per meeting
-        try:
-            items = json.loads(meeting.action_items or '[]')
-        except Exception:
-            items = []
-        total_actions_m = 0
-        done_actions_m = 0
-        overdue_actions_m = 0
-        for it in items:
-            if isinstance(it, dict):
-                total_actions_m += 1
-                is_done = bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
-                if is_done:
-                    done_actions_m += 1
-                else:
-                    dl = it.get('deadline')
-                    try:
-                        if dl and datetime.date.fromisoformat(dl) < today:
-                            overdue_actions_m += 1
-                    except Exception:
-                        pass
+        logo_filename = resolve_meeting_logo(meeting)
+        # Action stats per meeting (hot counters, maintained on save)
+        total_actions_m = meeting.action_total or 0
+        done_actions_m = meeting.action_done or 0
+        overdue_actions_m = overdue_by_meeting.get(meeting.id, 0)
         # Jalali date for display (derived from Gregorian meeting_date)
         try:
             jalali_date_str = format_jalali(meeting.meeting_date)
@@ -523,7 +2341,7 @@ def meetings_list():
         meetings_data_full.append({
             'meeting': meeting,
             'logo_filename': logo_filename,
-            'company_display': meeting.company_other_name or meeting.company,
+            'company_display': meeting_company_display(meeting, locale),
             'meeting_date_jalali': jalali_date_str,
             'total_actions': total_actions_m,
             'done_actions': done_actions_m,
@@ -550,7 +2368,7 @@ def meetings_list():
     start = (page - 1) * per_page
     end = start + per_page
     meetings_data = meetings_data_filtered[start:end]
-    companies = ['Rabe Al Mustaqbal', 'Rahkar Gasht', 'EazyMig', 'Abu Dhabi', 'Other']
+    companies = company_choices(locale)[1:]  # (value, label) pairs, without the placeholder
 
     return render_template('meetings.html', title=_('My Meetings'), meetings_data=meetings_data,
                            page=page, total_pages=total_pages, total=total, q=q,
@@ -558,6 +2376,8 @@ def meetings_list():
                            status=status,
                            companies=companies)
 
+EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')  # fullmatch; also rules out header-breaking newlines
+
 @app.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
@@ -566,35 +2386,49 @@ def settings():
         lang = select_locale()
         try:
             if section == 'profile':
-                current_user.display_name = (request.form.get('display_name') or '').strip() or None
-                current_user.email = (request.form.get('email') or '').strip() or None
-                db.session.commit()
-                flash(_('Profile updated.'), 'success')
+                email = (request.form.get('email') or '').strip() or None
+                if email and not EMAIL_RE.fullmatch(email):
+                    flash(_('Please enter a valid email address.'), 'warning')
+                else:
+                    current_user.display_name = (request.form.get('display_name') or '').strip() or None
+                    current_user.email = email
+                    db.session.commit()
+                    flash(_('Profile updated.'), 'success')
             elif section == 'password':
                 current_pwd = request.form.get('current_password') or ''
                 new_pwd = request.form.get('new_password') or ''
                 confirm_pwd = request.form.get('confirm_password') or ''
-                if not bcrypt.check_password_hash(current_user.password_hash, current_pwd):
+                if not check_password_hash(current_user.password_hash, current_pwd):
                     flash(_('Current password is incorrect.'), 'danger')
                 elif not new_pwd or new_pwd != confirm_pwd:
                     flash(_('New passwords do not match.'), 'warning')
                 else:
-                    current_user.password_hash = bcrypt.generate_password_hash(new_pwd).decode('utf-8')
+                    current_user.password_hash = generate_password_hash(new_pwd)
                     db.session.commit()
                     flash(_('Password changed successfully.'), 'success')
             elif section == 'avatar':
                 file = request.files.get('avatar')
                 if file and file.filename:
-                    name, ext = os.path.splitext(secure_filename(file.filename))
-                    if ext.lower() in {'.png','.jpg','.jpeg','.webp'}:
-                        unique = f"{name}_{int(datetime.datetime.utcnow().timestamp())}{ext.lower()}"
-                        path = os.path.join(app.config['AVATAR_UPLOAD_FOLDER'], unique)
-                        file.save(path)
-                        current_user.avatar_path = f"avatars/{unique}"
-                        db.session.commit()
-                        flash(_('Avatar updated.'), 'success')
+                    try:
+                        avatar_relpath = store_upload(file, app.config['AVATAR_UPLOAD_FOLDER'], 'avatars', ALLOWED_AVATAR_EXTENSIONS)
+                    except UploadTooLarge:
+                        flash(_('The uploaded avatar is too large.'), 'warning')
                     else:
-                        flash(_('Invalid avatar file type.'), 'warning')
+                        if avatar_relpath:
+                            current_user.avatar_path = avatar_relpath
+                            db.session.commit()
+                            flash(_('Avatar updated.'), 'success')
+                        else:
+                            flash(_('Invalid avatar file type.'), 'warning')
+            elif section == 'calendar':
+                if request.form.get('action') == 'disable':
+                    current_user.calendar_token = None
+                    flash(_('Calendar link disabled.'), 'info')
+                else:
+                    # (Re)generating invalidates any previously shared link
+                    current_user.calendar_token = secrets.token_urlsafe(32)
+                    flash(_('New calendar link created.'), 'success')
+                db.session.commit()
             else:
                 # Fonts (existing behavior)
                 if lang == 'fa':
@@ -607,17 +2441,38 @@ def settings():
                     if chosen and chosen in GOOGLE_FONTS:
                         session['ui_font_en'] = chosen
                         flash(_('Font updated successfully.'), 'success')
+        except PasswordHasherBusy:
+            raise
         except Exception:
             flash(_('Something went wrong. Please try again.'), 'danger')
         return redirect(url_for('settings'))
 
     return render_template('settings.html', title=_('Settings'))
 
+@app.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    # The unguessable token is the credential: calendar apps cannot log in
+    user = User.query.filter_by(calendar_token=token).first_or_404()
+    etag = calendar_feeds.etag(user)
+    last_modified = user.data_changed_at
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response('', 304)
+    else:
+        response = make_response(calendar_feeds.feed(user)['body'])
+        response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route("/meeting/<int:meeting_id>")
 @login_required
+@conditional_page
 def meeting_detail(meeting_id):
     meeting = Meeting.query.get_or_404(meeting_id)
     if meeting.author != current_user: abort(403)
+    load_archived_text(meeting)
     try: agenda_list = json.loads(meeting.agenda or '[]')
     except: agenda_list = []
     try: attendees_list = json.loads(meeting.attendees or '[]')
@@ -625,42 +2480,20 @@ def meeting_detail(meeting_id):
     try: action_items_list = json.loads(meeting.action_items or '[]')
     except: action_items_list = []
 
-    # Compute action item status
-    today = datetime.date.today()
-    total_actions = 0
-    done_actions = 0
-    overdue_actions = 0
-    for it in action_items_list:
-        if isinstance(it, dict):
-            total_actions += 1
-            is_done = bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
-            if is_done:
-                done_actions += 1
-            else:
-                dl = it.get('deadline')
-                try:
-                    if dl and datetime.date.fromisoformat(dl) < today:
-                        overdue_actions += 1
-                except Exception:
-                    pass
-
-    company_name = meeting.company
-    default_logo_filename = 'default_logo.png'
-    logo_mapping = {'Rabe Al Mustaqbal': 'rabe_al_mustaqbal.png','Rahkar Gasht': 'rahkar_gasht.png','EazyMig': 'eazymig.png','Abu Dhabi': 'abu_dhabi.png','Other': default_logo_filename}
-    logo_filename = meeting.company_logo if getattr(meeting, 'company_logo', None) else logo_mapping.get(company_name, default_logo_filename)
-    if not logo_filename: logo_filename = default_logo_filename
-    logo_path_check = os.path.join(basedir, 'static', 'images', logo_filename)
-    if not os.path.exists(logo_path_check):
-        logo_filename = default_logo_filename
-        default_logo_path_check = os.path.join(basedir, 'static', 'images', default_logo_filename)
-        if not os.path.exists(default_logo_path_check): logo_filename = None
+    # Action item status; overdue flags come from the daily digest job
+    overdue_indices = overdue_item_indices(meeting.id)
+    counters = action_counters(action_items_list, overdue_indices)
+    total_actions, done_actions, overdue_actions = counters['total'], counters['done'], counters['overdue']
+
+    logo_filename = resolve_meeting_logo(meeting)
+    company_display = meeting_company_display(meeting, select_locale())
     # Jalali date for display
     try:
         jalali_date_str = format_jalali(meeting.meeting_date)
     except Exception:
         jalali_date_str = None
     # Title comes from DB, no need to translate here
-    return render_template('meeting_detail.html', title=meeting.title, meeting=meeting, agenda_list=agenda_list, attendees_list=attendees_list, action_items_list=action_items_list, logo_filename=logo_filename, total_actions=total_actions, done_actions=done_actions, overdue_actions=overdue_actions, meeting_date_jalali=jalali_date_str)
+    return render_template('meeting_detail.html', title=meeting.title, meeting=meeting, agenda_list=agenda_list, attendees_list=attendees_list, action_items_list=action_items_list, logo_filename=logo_filename, company_display=company_display, total_actions=total_actions, done_actions=done_actions, overdue_actions=overdue_actions, overdue_indices=overdue_indices, meeting_date_jalali=jalali_date_str)
 
 @app.route('/meeting/<int:meeting_id>/action/<int:item_index>/toggle_done', methods=['POST'])
 @login_required
@@ -668,6 +2501,8 @@ def toggle_action_done(meeting_id, item_index):
     meeting = Meeting.query.get_or_404(meeting_id)
     if meeting.author != current_user:
         abort(403)
+    restore_meeting(meeting)
+    before = meeting_state(meeting)
     try:
         items = json.loads(meeting.action_items or '[]')
     except Exception:
@@ -675,31 +2510,20 @@ def toggle_action_done(meeting_id, item_index):
     if not isinstance(items, list) or item_index < 0 or item_index >= len(items):
         return jsonify({'ok': False, 'error': 'index_out_of_range'}), 400
     item = items[item_index] if isinstance(items[item_index], dict) else {}
-    current_done = bool(item.get('is_done')) or str(item.get('status', '')).lower() in ('done', 'closed', 'completed', 'true', '1')
+    current_done = action_item_done(item)
     target_done = not current_done
     item['is_done'] = target_done
     item['done_at'] = datetime.datetime.utcnow().isoformat() if target_done else None
     items[item_index] = item
     meeting.action_items = json.dumps(items)
+    sync_action_deadlines(meeting, items)
+    record_revision(meeting, before)
+    previous_revision = bump_data_revision(current_user)
     db.session.commit()
+    attendee_index.update(current_user, previous_revision)
 
-    # recompute counters
-    today = datetime.date.today()
-    total = 0; done = 0; overdue = 0
-    for it in items:
-        if isinstance(it, dict):
-            total += 1
-            is_done = bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
-            if is_done:
-                done += 1
-            else:
-                dl = it.get('deadline')
-                try:
-                    if dl and datetime.date.fromisoformat(dl) < today:
-                        overdue += 1
-                except Exception:
-                    pass
-    return jsonify({'ok': True, 'is_done': target_done, 'counters': {'total': total, 'done': done, 'overdue': overdue}})
+    counters = action_counters(items, overdue_item_indices(meeting.id))
+    return jsonify({'ok': True, 'is_done': target_done, 'counters': counters})
 
 @app.route('/meeting/<int:meeting_id>/actions/bulk', methods=['POST'])
 @login_required
@@ -714,6 +2538,8 @@ def bulk_update_actions(meeting_id: int):
     except Exception:
         return jsonify({'ok': False, 'error': 'bad_request'}), 400
 
+    restore_meeting(meeting)
+    before = meeting_state(meeting)
     try:
         items = json.loads(meeting.action_items or '[]')
     except Exception:
@@ -732,34 +2558,110 @@ def bulk_update_actions(meeting_id: int):
         updated.append(idx)
 
     meeting.action_items = json.dumps(items)
+    sync_action_deadlines(meeting, items)
+    record_revision(meeting, before)
+    previous_revision = bump_data_revision(current_user)
     db.session.commit()
+    attendee_index.update(current_user, previous_revision)
 
-    # recompute counters
-    today = datetime.date.today()
-    total = 0; done = 0; overdue = 0
-    for it in items:
-        if isinstance(it, dict):
-            total += 1
-            is_done = bool(it.get('is_done')) or str(it.get('status', '')).lower() in ('done','closed','completed','true','1')
-            if is_done:
-                done += 1
-            else:
-                dl = it.get('deadline')
-                try:
-                    if dl and datetime.date.fromisoformat(dl) < today:
-                        overdue += 1
-                except Exception:
-                    pass
-    return jsonify({'ok': True, 'updated': updated, 'counters': {'total': total, 'done': done, 'overdue': overdue}, 'done': target_done})
+    counters = action_counters(items, overdue_item_indices(meeting.id))
+    return jsonify({'ok': True, 'updated': updated, 'counters': counters, 'done': target_done})
+
+@app.route('/api/v1/meetings')
+@app.route('/api/meetings')
+@login_required
+def api_meeting_changes():
+    since = max(request.args.get('since', default=0, type=int), 0)
+    limit = max(1, min(request.args.get('limit', default=app.config['SYNC_PAGE_SIZE'], type=int), 500))
+    return jsonify(meeting_changes(current_user, since, limit))
+
+@app.route('/api/v1/meetings/batch', methods=['POST'])
+@app.route('/api/meetings/batch', methods=['POST'])
+@login_required
+def api_meeting_batch():
+    # All mutations commit together or not at all; the reply carries the changes
+    # since the client's cursor, so one round-trip both writes and refreshes.
+    payload = request.get_json(silent=True)
+    mutations = payload.get('mutations') if isinstance(payload, dict) else None
+    if not isinstance(mutations, list):
+        return jsonify({'ok': False, 'error': 'bad_request'}), 400
+    since = payload.get('since') if isinstance(payload.get('since'), int) else 0
+    results = []
+    orphan_logos = set()
+    if mutations:
+        bump_data_revision(current_user)
+        for index, mutation in enumerate(mutations):
+            try:
+                results.append(apply_mutation(mutation, orphan_logos))
+            except MutationError as e:
+                db.session.rollback()
+                return jsonify({'ok': False, 'error': e.code, 'index': index}), e.status
+        db.session.commit()
+        if orphan_logos:
+            collect_orphan_uploads(candidates=orphan_logos)
+        for result in results:
+            if result['op'] == 'delete_meeting':
+                discard_meeting_pdfs(result['id'])
+    response = meeting_changes(current_user, since, app.config['SYNC_PAGE_SIZE'])
+    response['results'] = results
+    return jsonify(response)
+
+@app.route('/attendees/suggest')
+@login_required
+def attendee_suggest():
+    q = request.args.get('q', default='', type=str)
+    limit = max(1, min(request.args.get('limit', default=app.config['ATTENDEE_SUGGEST_LIMIT'], type=int), 50))
+    return jsonify({'ok': True, 'suggestions': attendee_index.suggest(current_user, q, limit)})
+
+@app.route("/meeting/<int:meeting_id>/history")
+@login_required
+def meeting_history(meeting_id):
+    meeting = Meeting.query.get_or_404(meeting_id)
+    if meeting.author != current_user:
+        abort(403)
+    rows = (db.session.query(MeetingRevision.number, MeetingRevision.kind, MeetingRevision.changed,
+                             MeetingRevision.created_at, db.func.length(MeetingRevision.payload))
+            .filter(MeetingRevision.meeting_id == meeting.id).order_by(MeetingRevision.number.desc()).all())
+    # Version 1 is always the original; rows written before that rule list every filled field
+    history = [{'number': number, 'kind': kind, 'created_at': created_at, 'size': size,
+                'labels': list(dict.fromkeys(str(REVISION_FIELD_LABELS[f]) for f in changed.split(',') if f in REVISION_FIELD_LABELS))
+                          if number > 1 else []}
+               for number, kind, changed, created_at, size in rows]
+    return render_template('meeting_history.html', title=_('History'), meeting=meeting, revisions=history)
+
+@app.route("/meeting/<int:meeting_id>/history/<int:number>")
+@login_required
+def meeting_revision(meeting_id, number):
+    meeting = Meeting.query.get_or_404(meeting_id)
+    if meeting.author != current_user:
+        abort(403)
+    version = meeting_version(meeting.id, number)
+    if version is None:
+        abort(404)
+    # Diff against the previous version unless ?against=N picks another one
+    against = request.args.get('against', default=number - 1, type=int)
+    previous = meeting_version(meeting.id, against) if 0 < against != number else None
+    if previous is None:
+        against = None
+    latest = db.session.query(db.func.max(MeetingRevision.number)).filter(MeetingRevision.meeting_id == meeting.id).scalar()
+    return render_template('meeting_revision.html', title=version['title'], meeting=meeting, version=version,
+                           number=number, latest=latest, against=against,
+                           diff=revision_diff(previous, version) if previous is not None else [],
+                           action_item_text=action_item_text)
 
 @app.route("/meeting/<int:meeting_id>/edit", methods=['GET', 'POST'])
 @login_required
 def edit_meeting(meeting_id):
     meeting = Meeting.query.get_or_404(meeting_id)
     if meeting.author != current_user: abort(403)
+    load_archived_text(meeting)
     form = MeetingForm()
+    form.company.choices = company_choices(select_locale())
     if form.validate_on_submit():
         # ... (POST logic) ...
+        old_people = meeting_people(meeting.attendees, meeting.action_items)
+        before = meeting_state(meeting)
+        restore_meeting(meeting)
         agenda_list_from_form = form.agenda_items.data; agenda_list_filtered = [item for item in agenda_list_from_form if isinstance(item, str) and item.strip()]; agenda_json_string = json.dumps(agenda_list_filtered)
         attendees_list_from_form = form.attendees.data; attendees_list_filtered = [item for item in attendees_list_from_form if isinstance(item, str) and item.strip()]; attendees_json_string = json.dumps(attendees_list_filtered)
         action_items_data = form.action_items.data; serializable_action_items = []
@@ -770,17 +2672,22 @@ def edit_meeting(meeting_id):
             serializable_action_items.append(item)
         action_items_json_string = json.dumps(serializable_action_items)
         meeting.title = form.title.data; meeting.meeting_date = form.meeting_date.data; meeting.attendees = attendees_json_string; meeting.agenda = agenda_json_string; meeting.minutes = form.minutes.data; meeting.action_items = action_items_json_string; meeting.company = form.company.data; meeting.company_other_name = request.form.get('company_other_name') or meeting.company_other_name
+        company = company_registry.get(form.company.data)
+        meeting.company_id = company['id'] if company else None
         if form.company.data == 'Other':
             file = request.files.get('company_logo')
             if file and file.filename:
-                filename = secure_filename(file.filename)
-                name, ext = os.path.splitext(filename)
-                if ext.lower() in ALLOWED_LOGO_EXTENSIONS:
-                    unique_name = f"{name}_{int(datetime.datetime.utcnow().timestamp())}{ext.lower()}"
-                    save_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_name)
-                    file.save(save_path)
-                    meeting.company_logo = f"custom/{unique_name}"
+                try:
+                    logo_relpath = store_upload(file, app.config['UPLOAD_FOLDER'], 'custom', ALLOWED_LOGO_EXTENSIONS)
+                    if logo_relpath:
+                        meeting.company_logo = logo_relpath
+                except UploadTooLarge:
+                    flash(_('The uploaded logo is too large.'), 'warning')
+        sync_action_deadlines(meeting, serializable_action_items)
+        record_revision(meeting, before)
+        previous_revision = bump_data_revision(current_user)
         db.session.commit()
+        attendee_index.update(current_user, previous_revision, old_people, meeting_people(attendees_json_string, action_items_json_string))
         flash(_('Your meeting has been updated!'), 'success')
         return redirect(url_for('meeting_detail', meeting_id=meeting.id))
     elif request.method == 'GET':
@@ -811,142 +2718,47 @@ def edit_meeting(meeting_id):
 def delete_meeting(meeting_id):
     meeting = Meeting.query.get_or_404(meeting_id)
     if meeting.author != current_user: abort(403)
+    logo_relpath = meeting.company_logo
+    load_archived_text(meeting)
+    old_people = meeting_people(meeting.attendees, meeting.action_items)
     db.session.delete(meeting)
+    previous_revision = bump_data_revision(current_user)
     db.session.commit()
+    attendee_index.update(current_user, previous_revision, old_people)
+    discard_meeting_pdfs(meeting_id)
+    if logo_relpath:
+        # Drop the custom logo unless another meeting still uses it (content-addressed, so shared)
+        collect_orphan_uploads(candidates={logo_relpath})
     flash(_('Your meeting has been deleted!'), 'success')
     return redirect(url_for('meetings_list'))
 # ======================================
 
-# --- Helper function for RTL text processing (Re-added BiDi) ---
-def shape_text(text):
-    if text is None:
-        return ""
-    text = str(text) # Ensure text is string
-    reshaped_text = arabic_reshaper.reshape(text)
-    # === Apply BiDi algorithm ===
-    bidi_text = get_display(reshaped_text)
-    # ============================
-    return bidi_text # Return text processed by both reshape and bidi
-
-# --- Updated MyPDF Class with Unicode Font and Conditional RTL Alignment ---
-class MyPDF(FPDF):
-    def __init__(self, orientation='P', unit='mm', format='A4', meeting_title="Meeting Minutes", company_name=None, logo_path=None, lang_code='en'): # Added lang_code
-        super().__init__(orientation, unit, format)
-        self.meeting_title = meeting_title
-        self.company_name = company_name
-        self.logo_path = logo_path
-        self.lang_code = lang_code # Store language code
-        self.creation_datetime_obj = datetime.datetime.now()
-        self.creation_date_str = self.creation_datetime_obj.strftime("%Y-%m-%d")
-        self.set_auto_page_break(auto=True, margin=15)
-        self.set_margins(left=15, top=15, right=15)
-
-        # Add Unicode Font
-        try:
-            font_regular_path = os.path.join(basedir, 'static', 'fonts', 'Vazirmatn-Regular.ttf')
-            font_bold_path = os.path.join(basedir, 'static', 'fonts', 'Vazirmatn-Bold.ttf')
-            if os.path.exists(font_regular_path): self.add_font('Vazirmatn', '', font_regular_path)
-            else: raise FileNotFoundError("Vazirmatn-Regular.ttf not found")
-            if os.path.exists(font_bold_path): self.add_font('Vazirmatn', 'B', font_bold_path)
-            else: print(f"WARNING: Vazirmatn-Bold.ttf not found.")
-            self.set_font('Vazirmatn', '', 9)
-        except Exception as e:
-             print(f"Error adding font: {e}. Falling back to default font.")
-             self.set_font('Arial', '', 9)
-
-    def header(self):
-        header_start_y = self.t_margin - 5
-        logo_start_x = self.l_margin + 2
-        logo_start_y = header_start_y + 1
-        logo_width = 35
-        logo_placeholder_height = 15
-
-        if self.logo_path and os.path.exists(self.logo_path):
-            try:
-                logo_placeholder_height = 20
-                self.image(self.logo_path, x=logo_start_x, y=logo_start_y, w=logo_width)
-            except Exception as e:
-                print(f"Error adding logo in header: {e}")
-                self.set_xy(logo_start_x, logo_start_y)
-                self.set_font('Vazirmatn', '', 7)
-                self.cell(logo_width, 8, shape_text('[Logo Error]'), border=0) # Use shape_text
-                logo_placeholder_height = 8
-        else: logo_placeholder_height = 5
-
-        title_start_x = logo_start_x + logo_width + 5
-        title_width = self.w - self.r_margin - title_start_x - 25
-        self.set_xy(title_start_x, logo_start_y)
-        self.set_font('Vazirmatn', 'B', 11)
-        line_height_title = 5
-        shaped_title = shape_text(self.meeting_title) # Shape title FIRST
-        lines_title = len(self.multi_cell(title_width, line_height_title, shaped_title, border=0, align='C', dry_run=True, output='LINES'))
-        title_actual_height = lines_title * line_height_title
-        self.set_xy(title_start_x, logo_start_y)
-        self.multi_cell(title_width, line_height_title, shaped_title, border=0, align='C')
-
-        company_y = logo_start_y + title_actual_height + 1
-        company_actual_height = 0
-        if self.company_name:
-            self.set_xy(title_start_x, company_y)
-            self.set_font('Vazirmatn', '', 9)
-            line_height_company = 4
-            shaped_company = shape_text(self.company_name) # Shape company name
-            lines_company = len(self.multi_cell(title_width, line_height_company, shaped_company, border=0, align='C', dry_run=True, output='LINES'))
-            company_actual_height = lines_company * line_height_company
-            self.set_xy(title_start_x, company_y)
-            self.multi_cell(title_width, line_height_company, shaped_company, border=0, align='C') # Use shaped text
-            company_y += company_actual_height
-        else: company_y = logo_start_y + title_actual_height
-
-        date_start_x = self.w - self.r_margin - 25
-        self.set_xy(date_start_x, logo_start_y + 2)
-        self.set_font('Vazirmatn', '', 9)
-        self.cell(23, 5, shape_text(f"Date: {self.creation_date_str}"), border=0, align='R') # Use shape_text
-
-        max_header_y = max(logo_start_y + logo_placeholder_height, company_y)
-        self.set_y(max_header_y + 8)
-        self.set_font('Vazirmatn', '', 9)
-
-    def footer(self):
-        footer_y = -15
-        self.set_y(footer_y)
-        self.set_draw_color(200, 200, 200)
-        self.line(self.l_margin, self.get_y(), self.w - self.r_margin, self.get_y())
-        self.ln(2)
-        self.set_font('Vazirmatn', '', 8)
-        self.cell(0, 4, shape_text('Powered by Rasha Press'), align='L') # Use shape_text
-        self.set_x(self.w - self.r_margin - 30)
-        self.set_font('Vazirmatn', '', 8)
-        self.cell(0, 4, shape_text(f'Page {self.page_no()}/{{nb}}'), align='R') # Use shape_text
-
-# --- Updated generate_meeting_pdf Function (Pyppeteer HTML->PDF) ---
-# This assumes 'app' is the Flask app instance and is available in this scope
-# Also assumes 'Meeting', 'db', 'basedir', '_' are defined/imported
-import asyncio
-from pyppeteer import launch
-@app.route("/meeting/<int:meeting_id>/pdf")
-@login_required
-def generate_meeting_pdf(meeting_id):
-    meeting = Meeting.query.get_or_404(meeting_id)
-    if meeting.author != current_user:
-        abort(403)
-
-    # Prepare lists from JSON fields
-    try:
-        agenda_list = json.loads(meeting.agenda or '[]')
-    except Exception:
-        agenda_list = []
-    try:
-        attendees_list = json.loads(meeting.attendees or '[]')
-    except Exception:
-        attendees_list = []
-    try:
-        action_items_list = json.loads(meeting.action_items or '[]')
-    except Exception:
-        action_items_list = []
+# --- Native fpdf2 renderer (pdf_native.py): same layout as templates/pdf/meeting.html, no browser ---
+def render_meeting_pdf_fpdf(*render_args) -> bytes:
+    from pdf_native import render_meeting_pdf  # fpdf2 + shaping libs load on first use
+    return render_meeting_pdf(*render_args)
+
+# --- Chromium renderer: pdf_service.py (in-process stand-in or remote renderer nodes) ---
+_pdf_renderer = None
+_pdf_renderer_pid = None
+_pdf_renderer_lock = threading.Lock()
+
+def pdf_renderer():
+    """Per-process render client: PDF_RENDERER_URLS if configured, else the local stand-in."""
+    global _pdf_renderer, _pdf_renderer_pid
+    with _pdf_renderer_lock:
+        # A client created before fork would share pooled sockets with the parent
+        if _pdf_renderer is None or _pdf_renderer_pid != os.getpid():
+            urls = app.config['PDF_RENDERER_URLS']
+            if urls:
+                _pdf_renderer = PdfRenderClient(urls, timeout=app.config['PDF_RENDER_TIMEOUT'],
+                                                retries=app.config['PDF_RENDER_RETRIES'])
+            else:
+                _pdf_renderer = LocalRenderService()
+            _pdf_renderer_pid = os.getpid()
+        return _pdf_renderer
 
-    # Language and direction
-    lang = str(get_locale())
+def meeting_pdf_context(meeting, agenda_list, attendees_list, action_items_list, lang, company_display, date_jalali, logo_fs_path, asset_url):
     text_dir = 'rtl' if lang == 'fa' else 'ltr'
 
     # Helper: Persian digits
@@ -958,22 +2770,6 @@ def generate_meeting_pdf(meeting_id):
             s = value
         return s.translate(mapping) if lang == 'fa' else s
 
-    # Logo mapping
-    default_logo_filename = 'default_logo.png'
-    logo_mapping = {
-        'Rabe Al Mustaqbal': 'rabe_al_mustaqbal.png',
-        'Rahkar Gasht': 'rahkar_gasht.png',
-        'EazyMig': 'eazymig.png',
-        'Abu Dhabi': 'abu_dhabi.png',
-        'Other': default_logo_filename
-    }
-    # Prefer custom logo if set
-    logo_filename = meeting.company_logo if getattr(meeting, 'company_logo', None) else (logo_mapping.get(meeting.company, default_logo_filename) or default_logo_filename)
-
-    def to_file_url(path: str) -> str:
-        return 'file:///' + os.path.abspath(path).replace('\\', '/')
-
-    logo_fs_path = os.path.join(basedir, 'static', 'images', logo_filename)
     css_fs_path = os.path.join(basedir, 'static', 'css', 'pdf.css')
     # Determine UI-selected font for current language
     ui_font_fa = session.get('ui_font_fa', 'Vazirmatn')
@@ -983,70 +2779,20 @@ def generate_meeting_pdf(meeting_id):
     font_regular_fs = os.path.join(basedir, 'static', 'fonts', selected_fa_files.get('regular') or 'Vazirmatn-Regular.ttf')
     font_bold_fs = os.path.join(basedir, 'static', 'fonts', selected_fa_files.get('bold') or 'Vazirmatn-Bold.ttf')
 
-    def image_to_data_uri(path: str) -> str:
-        try:
-            ext = os.path.splitext(path)[1].lower()
-            mime = 'image/png' if ext == '.png' else ('image/jpeg' if ext in ['.jpg', '.jpeg'] else 'image/png')
-            with open(path, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('ascii')
-                return f"data:{mime};base64,{b64}"
-        except Exception:
-            return None
-
-    logo_data_uri = image_to_data_uri(logo_fs_path) if os.path.exists(logo_fs_path) else None
-
-    # Embed fonts as base64 data URIs so Chromium always loads them offline
-    def to_data_uri(path: str) -> str:
-        try:
-            with open(path, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('ascii')
-                return f"data:font/ttf;base64,{b64}"
-        except Exception:
-            return None
-
-    # Prepare PDF font urls as data URIs to ensure loading in headless Chromium
-    def font_mime_and_format(path: str):
-        ext = os.path.splitext(path)[1].lower()
-        if ext == '.woff2':
-            return 'font/woff2', 'woff2'
-        return 'font/ttf', 'truetype'
-
-    def to_font_data_uri(path: str):
-        try:
-            mime, fformat = font_mime_and_format(path)
-            with open(path, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('ascii')
-                return f"data:{mime};base64,{b64}", fformat
-        except Exception:
-            return None, None
+    # Fonts, CSS and logo are referenced through asset_url (shipped to the renderer with the job)
+    def font_url(path: str):
+        return asset_url(path), 'woff2' if os.path.splitext(path)[1].lower() == '.woff2' else 'truetype'
 
     pdf_font_regular_url = None
     pdf_font_bold_url = None
     pdf_font_regular_format = None
     pdf_font_bold_format = None
     if os.path.exists(font_regular_fs):
-        pdf_font_regular_url, pdf_font_regular_format = to_font_data_uri(font_regular_fs)
+        pdf_font_regular_url, pdf_font_regular_format = font_url(font_regular_fs)
     if os.path.exists(font_bold_fs):
-        pdf_font_bold_url, pdf_font_bold_format = to_font_data_uri(font_bold_fs)
-
-    css_text = None
-    try:
-        if os.path.exists(css_fs_path):
-            with open(css_fs_path, 'r', encoding='utf-8') as f:
-                css_text = f.read()
-    except Exception:
-        css_text = None
+        pdf_font_bold_url, pdf_font_bold_format = font_url(font_bold_fs)
 
-    # Prefer custom company name if present
-    company_display = meeting.company_other_name or (_(meeting.company) if meeting.company else None)
-    # Jalali date for PDF meta
-    try:
-        date_jalali = format_jalali(meeting.meeting_date)
-    except Exception:
-        date_jalali = None
-
-    html = render_template(
-        'pdf/meeting.html',
+    return dict(
         meeting=meeting,
         agenda_list=agenda_list,
         attendees_list=attendees_list,
@@ -1056,33 +2802,218 @@ def generate_meeting_pdf(meeting_id):
         company_display=company_display,
         date_jalali=date_jalali,
         pnum=to_persian_digits,
-        logo_url=(logo_data_uri or (to_file_url(logo_fs_path) if os.path.exists(logo_fs_path) else None)),
-        css_file_url=to_file_url(css_fs_path) if os.path.exists(css_fs_path) else None,
+        logo_url=asset_url(logo_fs_path) if os.path.exists(logo_fs_path) else None,
+        css_file_url=asset_url(css_fs_path) if os.path.exists(css_fs_path) else None,
         pdf_font_family=('PDFAppFont'),
         pdf_font_regular_url=pdf_font_regular_url,
         pdf_font_bold_url=pdf_font_bold_url,
         pdf_font_regular_format=pdf_font_regular_format,
         pdf_font_bold_format=pdf_font_bold_format,
-        css_text=css_text,
     )
 
-    async def render_pdf(content: str) -> bytes:
-        browser = await launch(args=['--no-sandbox'], handleSIGINT=False, handleSIGTERM=False, handleSIGHUP=False, headless=True)
-        page = await browser.newPage()
-        await page.setContent(content)
-        await page.waitForSelector('body')
-        pdf_bytes = await page.pdf(format='A4', margin={'top': '5mm', 'bottom': '6mm', 'left': '5mm', 'right': '5mm'}, printBackground=True)
-        await browser.close()
-        return pdf_bytes
+def build_meeting_pdf_job(*render_args):
+    """HTML for the renderer service plus the assets it references: (html, {ref: fs path})."""
+    assets = {}
 
-    pdf_bytes = asyncio.run(render_pdf(html))
+    def asset_url(path):
+        ref = asset_ref(path)
+        assets[ref] = path
+        return ref
 
-    response = make_response(pdf_bytes)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'attachment; filename="meeting_report.pdf"'
+    html = render_template('pdf/meeting.html', **meeting_pdf_context(*render_args, asset_url=asset_url))
+    return html, assets
+
+# --- Rendered PDF cache: one file per meeting version, language, engine and assets ---
+def meeting_pdf_cache_entry(render_args, engine):
+    """(etag, path) of the cached export for these render arguments."""
+    meeting, _agenda, _attendees, _actions, lang, company_display, _date_jalali, logo_fs_path = render_args
+    try:
+        logo_mtime = os.stat(logo_fs_path).st_mtime_ns
+    except OSError:
+        logo_mtime = None
+    key = json.dumps([meeting.id, iso_utc(meeting.updated_at), lang, engine, session.get('ui_font_fa'),
+                      company_display, logo_fs_path, logo_mtime], ensure_ascii=False, default=str)
+    etag = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+    # Microseconds: two saves within one second are still different versions
+    version = int(meeting.updated_at.timestamp() * 1_000_000) if meeting.updated_at else 0
+    return etag, os.path.join(app.config['PDF_CACHE_DIR'], f"{meeting.id}-{version}-{etag}.pdf")
+
+def store_meeting_pdf(meeting_id, pdf_path, cached_path):
+    os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+    tmp = f"{cached_path}.{secrets.token_hex(8)}.tmp"
+    shutil.copyfile(pdf_path, tmp)
+    os.replace(tmp, cached_path)
+    # Exports of older versions of this meeting can no longer be requested
+    discard_meeting_pdfs(meeting_id, keep_version=os.path.basename(cached_path).split('-')[1])
+
+def discard_meeting_pdfs(meeting_id, keep_version=None):
+    folder = app.config['PDF_CACHE_DIR']
+    if not os.path.isdir(folder):
+        return
+    for fname in os.listdir(folder):
+        path = os.path.join(folder, fname)
+        parts = fname.split('-')
+        if parts[0] == str(meeting_id) and len(parts) == 3 and fname.endswith('.pdf') and parts[1] != keep_version:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# --- PDF export route: engine chosen by ?engine= or PDF_ENGINE config ---
+@app.route("/meeting/<int:meeting_id>/pdf")
+@login_required
+def generate_meeting_pdf(meeting_id):
+    meeting = Meeting.query.get_or_404(meeting_id)
+    if meeting.author != current_user:
+        abort(403)
+    load_archived_text(meeting)
+
+    # Prepare lists from JSON fields
+    try:
+        agenda_list = json.loads(meeting.agenda or '[]')
+    except Exception:
+        agenda_list = []
+    try:
+        attendees_list = json.loads(meeting.attendees or '[]')
+    except Exception:
+        attendees_list = []
+    try:
+        action_items_list = json.loads(meeting.action_items or '[]')
+    except Exception:
+        action_items_list = []
+
+    lang = str(get_locale())
+    engine = request.args.get('engine') or app.config['PDF_ENGINE']
+    if engine not in PDF_ENGINES:
+        engine = app.config['PDF_ENGINE']
+
+    # Prefer custom logo / company name if set, else the registry entry
+    logo_filename = resolve_meeting_logo(meeting) or DEFAULT_LOGO_FILENAME
+    logo_fs_path = os.path.join(basedir, 'static', 'images', logo_filename)
+    company_display = meeting_company_display(meeting, lang)
+    # Jalali date for PDF meta
+    try:
+        date_jalali = format_jalali(meeting.meeting_date)
+    except Exception:
+        date_jalali = None
+
+    render_args = (meeting, agenda_list, attendees_list, action_items_list, lang, company_display, date_jalali, logo_fs_path)
+    etag, cached_path = meeting_pdf_cache_entry(render_args, engine)
+    if os.path.exists(cached_path):
+        # Repeat downloads, Range requests and revalidations: same bytes, same ETag, no render
+        return send_file(cached_path, mimetype='application/pdf', as_attachment=True, download_name='meeting_report.pdf',
+                         conditional=True, etag=etag, max_age=0)
+    admit('generate_meeting_pdf')
+    # Render into a per-request temp dir, then publish into the cache with an atomic rename.
+    # send_file has already opened the PDF when it returns, so the directory can be
+    # removed right away; the open handle keeps the data readable.
+    workdir = tempfile.mkdtemp(prefix='meeting_pdf_', dir=app.config['PDF_TMP_DIR'])
+    pdf_path = os.path.join(workdir, 'meeting_report.pdf')
+    try:
+        rendered = False
+        if engine == 'chromium':
+            try:
+                html, assets = build_meeting_pdf_job(*render_args)
+                pdf_renderer().render(html, assets, pdf_path)
+                rendered = True
+            except Exception as e:
+                if not app.config['PDF_ENGINE_FALLBACK']:
+                    raise
+                app.logger.warning("Chromium PDF rendering failed (%s); falling back to fpdf", e)
+        if not rendered:
+            with open(pdf_path, 'wb') as f:
+                f.write(render_meeting_pdf_fpdf(*render_args))
+        if rendered or engine == 'fpdf':
+            store_meeting_pdf(meeting.id, pdf_path, cached_path)
+            return send_file(cached_path, mimetype='application/pdf', as_attachment=True,
+                             download_name='meeting_report.pdf', conditional=True, etag=etag, max_age=0)
+        # A fallback render is not cached under the Chromium key: serve it once, without
+        # validators, so a resumed download cannot splice it with a later Chromium render
+        response = send_file(pdf_path, mimetype='application/pdf', as_attachment=True,
+                             download_name='meeting_report.pdf', conditional=False, etag=False, max_age=0)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
     return response
 
 
+# --- Template precompilation (deploy step: `flask templates compile`) ---
+def compile_templates():
+    """Load every template once, writing its bytecode to the cache. Returns the names."""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    if app.jinja_env.cache is not None:
+        app.jinja_env.cache.clear()  # templates already in memory would not reach the bytecode cache
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+templates_cli = AppGroup('templates', help='Template bytecode cache.')
+
+@templates_cli.command('compile')
+@click.option('--clear', is_flag=True, help='Drop existing cache entries first (stale ones are never reused, only kept).')
+def compile_templates_command(clear):
+    cache = app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException('JINJA_BYTECODE_CACHE_DIR is not set')
+    if clear:
+        cache.clear()
+    start = time.perf_counter()
+    names = compile_templates()
+    click.echo(f"Compiled {len(names)} templates into {cache.directory} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+@templates_cli.command('clear')
+def clear_templates_command():
+    cache = app.jinja_env.bytecode_cache
+    if cache is not None:
+        cache.clear()
+        click.echo(f"Cleared {cache.directory}")
+
+app.cli.add_command(templates_cli)
+
+
+# --- Optional prewarm hook ---
+def prewarm(chromium=True):
+    """Pay one-off startup costs up front instead of on a worker's first request.
+
+    Intended for the master process of a preloading server before it forks
+    (passenger_wsgi.py with APP_PREWARM=1, or gunicorn --preload), so workers
+    inherit the result: schema check, font registry, native PDF renderer and
+    shaping libraries, compiled templates and the Chromium binary download.
+    No browser is launched here; a live Chromium process cannot be shared
+    across forked workers, and the database pools are disposed at the end so
+    no connection opened here is shared with the children either. Returns
+    per-step timings in milliseconds.
+    """
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            app.logger.warning("prewarm step %s failed: %s", name, e)
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    def dispose_engines():
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    def warm_chromium():
+        from pyppeteer.chromium_downloader import check_chromium, download_chromium
+        if not check_chromium():
+            download_chromium()
+
+    step('schema', ensure_schema)
+    step('fonts', discover_fa_fonts)
+    step('pdf_native', lambda: __import__('pdf_native'))
+    step('templates', compile_templates)
+    if chromium:
+        step('chromium', warm_chromium)
+    step('dispose_db', dispose_engines)
+    app.logger.info("prewarm: %s", ', '.join(f"{k}={v:.1f}ms" for k, v in timings.items()))
+    return timings
+
+
 # === Main Execution Block ===
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,362 @@
+"""Micro-benchmarks for the meeting minutes app.
+
+Usage:
+    python bench.py pdf [--runs N]
+    python bench.py shaping [--runs N] [--paragraphs N]
+    python bench.py startup [--runs N] [--top N]
+    python bench.py passwords [--logins N] [--concurrency N] [--rounds N]
+    python bench.py templates [--runs N]
+    python bench.py revisions [--edits N] [--intervals N,N,...]
+
+Benchmarks build transient (unsaved) objects and call the app helpers
+directly inside a test request context, so no database is required
+(`templates` seeds a throwaway SQLite database of its own).
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+import app as app_module
+import passwords
+import revisions
+from app import (app, User, Meeting, basedir, format_jalali, render_meeting_pdf_fpdf,
+                 build_meeting_pdf_job, pdf_renderer, check_password_hash, meeting_state)
+from flask import render_template
+from pdf_native import reshape_text, bidi_display, shape_texts
+
+
+def sample_meeting(paragraphs=20, actions=15):
+    author = User(username='bench', display_name='بنچمارک')
+    minutes = '\n'.join(
+        f"بند {i}: گزارش پیشرفت پروژه و تصمیمات گرفته شده در جلسه با حضور مدیران ارشد و نمایندگان واحدها." * 3
+        for i in range(paragraphs))
+    action_items = [{'description': f"پیگیری مورد شماره {i} با واحد مالی", 'assigned_to': 'علی رضایی',
+                     'deadline': (datetime.date(2025, 1, 1) + datetime.timedelta(days=i)).isoformat()}
+                    for i in range(actions)]
+    return Meeting(title='جلسه هیئت مدیره', meeting_date=datetime.datetime(2025, 3, 1),
+                   attendees=json.dumps(['علی رضایی', 'سارا محمدی', 'John Smith']),
+                   agenda=json.dumps(['بودجه', 'استخدام', 'Roadmap']), minutes=minutes,
+                   action_items=json.dumps(action_items), company='Rahkar Gasht',
+                   date_posted=datetime.datetime(2025, 3, 1, 10, 0), author=author)
+
+
+def meeting_render_args(meeting, lang):
+    logo_fs_path = os.path.join(basedir, 'static', 'images', 'rahkar_gasht.png')
+    return (meeting, json.loads(meeting.agenda), json.loads(meeting.attendees),
+            json.loads(meeting.action_items), lang, meeting.company,
+            format_jalali(meeting.meeting_date), logo_fs_path)
+
+
+def timeit(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<28} median {statistics.median(samples):9.2f} ms   "
+          f"min {min(samples):9.2f} ms   max {max(samples):9.2f} ms   (n={len(samples)})")
+
+
+def bench_pdf(args):
+    meeting = sample_meeting()
+    for lang in ('en', 'fa'):
+        render_args = meeting_render_args(meeting, lang)
+        with app.test_request_context('/', headers={'Accept-Language': lang}):
+            report(f"fpdf [{lang}]", timeit(lambda: render_meeting_pdf_fpdf(*render_args), args.runs))
+            try:
+                # Same path as the export route: PDF_RENDERER_URLS nodes if configured, else local
+                renderer = pdf_renderer()
+                html, assets = build_meeting_pdf_job(*render_args)
+                with tempfile.TemporaryDirectory() as workdir:
+                    pdf_path = os.path.join(workdir, 'meeting.pdf')
+                    report(f"chromium [{lang}]", timeit(lambda: renderer.render(html, assets, pdf_path), args.runs))
+            except Exception as e:
+                print(f"{f'chromium [{lang}]':<28} unavailable: {e.__class__.__name__}")
+
+
+def bench_shaping(args):
+    meeting = sample_meeting(paragraphs=args.paragraphs)
+    lines = meeting.minutes.splitlines()
+    names = [it['assigned_to'] for it in json.loads(meeting.action_items)] * 10
+    print(f"{len(lines)} minutes lines, {sum(map(len, lines))} chars; {len(names)} assignee strings")
+
+    def uncached():
+        for line in lines + names:
+            get_display(arabic_reshaper.reshape(line), base_dir='R')
+
+    def clear():
+        reshape_text.cache_clear()
+        bidi_display.cache_clear()
+
+    def cold():
+        clear()
+        shape_texts(lines + names, 'R')
+
+    report("uncached", timeit(uncached, args.runs))
+    report("cached, cold", timeit(cold, args.runs))
+    report("cached, warm", timeit(lambda: shape_texts(lines + names, 'R'), args.runs))
+
+    # Header/footer strings: per-page shaping (old MyPDF) vs. shaped once per document
+    header = [meeting.title, 'Rahkar Gasht', 'تاریخ: ۲۰۲۵-۰۳-۰۱', 'تولید شده توسط نرم افزار صورت جلسه']
+    pages = 50
+    report(f"header x{pages} pages, uncached",
+           timeit(lambda: [get_display(arabic_reshaper.reshape(s)) for _ in range(pages) for s in header], args.runs))
+    clear()
+    report(f"header x{pages} pages, once", timeit(lambda: shape_texts(header, 'R'), args.runs))
+    print(f"cache: reshape {reshape_text.cache_info()}, bidi {bidi_display.cache_info()}")
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=basedir,
+                            capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def bench_startup(args):
+    # Each sample is a fresh interpreter, like a newly spawned worker
+    timer = "import time; t = time.perf_counter(); {}; print((time.perf_counter() - t) * 1000)"
+    cases = [
+        ('import app', 'import app'),
+        ('import app + heavy PDF deps', 'import app, fpdf, arabic_reshaper, bidi.algorithm, pyppeteer'),
+        ('import app + prewarm()', 'import app; app.prewarm(chromium=False)'),
+    ]
+    for label, code in cases:
+        samples = [float(run_python(timer.format(code))[0].split()[-1]) for _ in range(args.runs)]
+        report(label, samples)
+
+    # -X importtime breakdown: top-level imports triggered by `import app`
+    _, stderr = run_python('import app')
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:  # modules imported directly by app.py
+            rows.append((int(cumulative_us), name.strip()))
+    print(f"\nTop {args.top} direct imports of app.py by cumulative time:")
+    for cumulative_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {name:<28} {cumulative_us / 1000:9.2f} ms")
+
+
+def bench_passwords(args):
+    # A login burst (args.logins checks from args.concurrency request threads) while
+    # another thread keeps rendering a page; compares hashing on the request thread
+    # with the bounded process pool.
+    pw_hash = passwords.hash_password('correct horse', args.rounds)
+    app.config['BCRYPT_LOG_ROUNDS'] = args.rounds
+    app.config['PASSWORD_HASH_MAX_PENDING'] = max(args.concurrency, 1)
+
+    def page():
+        with app.test_request_context('/login'):
+            render_template('login.html', title='Login', form=app_module.LoginForm(meta={'csrf': False}))
+
+    page()
+    report("page, idle", timeit(page, 50))
+    for workers in sorted({0, 1, 2, os.cpu_count() or 2}):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        app_module._password_executor = None
+        if workers:
+            check_password_hash(pw_hash, 'correct horse')  # start the pool outside the timing
+        stop = threading.Event()
+        page_samples = []
+
+        def page_load():
+            while not stop.is_set():
+                page_samples.extend(timeit(page, 1))
+
+        loader = threading.Thread(target=page_load)
+        loader.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda _: check_password_hash(pw_hash, 'correct horse'), range(args.logins)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loader.join()
+        mode = 'request thread' if workers == 0 else f"pool, {workers} proc"
+        print(f"{mode:<28} {args.logins / elapsed:9.1f} logins/s")
+        report("  page during burst", page_samples)
+
+
+TEMPLATE_ROUTES = ['/', '/meetings', '/meeting/1', '/meeting/new', '/meeting/1/edit', '/settings',
+                   '/meeting/1/pdf?engine=chromium']
+
+SEED_DB = """
+import datetime, json, app as m
+with m.app.app_context():
+    m.db.create_all()
+    m.ensure_schema()
+    user = m.User(username='bench', password_hash='x')
+    m.db.session.add(user)
+    m.db.session.add(m.Meeting(title='Board', meeting_date=datetime.datetime(2025, 3, 1), company='Rahkar Gasht',
+                               attendees=json.dumps(['Sara']), agenda=json.dumps(['Budget']), minutes='Notes',
+                               action_items=json.dumps([{'description': 'Report', 'assigned_to': 'Sara',
+                                                         'deadline': '2025-01-01'}]), author=user))
+    m.db.session.commit()
+"""
+
+# One fresh worker: time the first request to each route. A JSON route goes first so
+# schema check and DB connect are not charged to the first template route.
+FIRST_REQUESTS = """
+import json, time, app as m
+from pdf_service import LocalRenderService
+m.app.config.update(ADMISSION_ENABLED=False, TESTING=True)
+m._pdf_renderer = LocalRenderService(lambda html_path, pdf_path: open(pdf_path, 'wb').write(b'%PDF'))
+m._pdf_renderer_pid = m.os.getpid()
+client = m.app.test_client()
+with client.session_transaction() as s:
+    s['_user_id'] = '1'
+    s['_fresh'] = True
+client.get('/attendees/suggest?q=s')
+timings = {}
+for route in ROUTES:
+    start = time.perf_counter()
+    status = client.get(route).status_code
+    timings[route] = (time.perf_counter() - start) * 1000
+    assert status == 200, (route, status)
+print(json.dumps(timings))
+"""
+
+
+def bench_templates(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'),
+                   JINJA_BYTECODE_CACHE_DIR='')
+        subprocess.run([sys.executable, '-c', SEED_DB], cwd=basedir, env=env, check=True)
+        cache_dir = os.path.join(workdir, 'jinja')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'templates', 'compile'], cwd=basedir,
+                       env=dict(env, JINJA_BYTECODE_CACHE_DIR=cache_dir), check=True)
+        code = FIRST_REQUESTS.replace('ROUTES', repr(TEMPLATE_ROUTES))
+        results = {}
+        for label, directory in (('no cache', ''), ('bytecode cache', cache_dir)):
+            runs = [json.loads(subprocess.run([sys.executable, '-c', code], cwd=basedir, capture_output=True, text=True,
+                                              env=dict(env, JINJA_BYTECODE_CACHE_DIR=directory), check=True).stdout)
+                    for _ in range(args.runs)]
+            results[label] = {route: [run[route] for run in runs] for route in TEMPLATE_ROUTES}
+        print(f"First request per route in a fresh worker, median of {args.runs} (ms):")
+        print(f"  {'route':<34} {'no cache':>10} {'bytecode':>10}")
+        for route in TEMPLATE_ROUTES + ['total']:
+            if route == 'total':
+                cold, warm = (sum(statistics.median(v) for v in results[k].values()) for k in results)
+            else:
+                cold, warm = (statistics.median(results[k][route]) for k in results)
+            print(f"  {route:<34} {cold:10.2f} {warm:10.2f}")
+
+
+def edit_history(edits, seed=1):
+    # States after each of `edits` typical saves: a reworded minutes line, a new or
+    # dropped line, attendee/agenda changes and action items toggled or added.
+    rng = random.Random(seed)
+    state = meeting_state(sample_meeting(paragraphs=60))
+    states = [state]
+    for n in range(edits):
+        state = {k: (list(v) if isinstance(v, list) else v) for k, v in state.items()}
+        lines = state['minutes'].splitlines()
+        roll = rng.random()
+        i = rng.randrange(len(lines) + 1)
+        if roll < 0.5 and lines:
+            lines[min(i, len(lines) - 1)] += f" اصلاحیه {n}."
+        elif roll < 0.7:
+            lines.insert(i, f"بند جدید {n}: توضیحات تکمیلی درباره تصمیمات جلسه.")
+        elif roll < 0.8 and len(lines) > 10:
+            del lines[min(i, len(lines) - 1)]
+        state['minutes'] = '\n'.join(lines)
+        if rng.random() < 0.2:
+            state['attendees'].append(f"Guest {n}")
+        if rng.random() < 0.1:
+            state['agenda'].append(f"Topic {n}")
+        items = state['action_items'] = [dict(it) for it in state['action_items']]
+        if rng.random() < 0.3:
+            item = rng.choice(items)
+            item['is_done'] = not item.get('is_done')
+        if rng.random() < 0.1:
+            items.append({'description': f"پیگیری {n}", 'assigned_to': 'Sara', 'deadline': '2025-06-01'})
+        states.append(state)
+    return states
+
+
+def bench_revisions(args):
+    states = edit_history(args.edits)
+    raw_size = sum(len(json.dumps(st, ensure_ascii=False).encode('utf-8')) for st in states)
+    zipped_size = sum(len(revisions.encode(st)) for st in states)
+    print(f"{len(states)} versions; minutes {len(states[-1]['minutes'])} chars at the end")
+    print(f"{'full copies, raw':<28} {raw_size / 1024:10.1f} KiB")
+    print(f"{'full copies, zlib':<28} {zipped_size / 1024:10.1f} KiB")
+    for interval in args.intervals:
+        chain = []
+        since = 0
+        encode_ms = []
+        for i, st in enumerate(states):
+            start = time.perf_counter()
+            kind, payload, _changed = revisions.encode_revision(states[i - 1] if i else None, st, since, interval)
+            encode_ms.append((time.perf_counter() - start) * 1000)
+            since = 0 if kind == 'snapshot' else since + 1
+            chain.append((kind, payload))
+        stored = sum(len(p) for _kind, p in chain)
+        snapshots = sum(1 for kind, _p in chain if kind == 'snapshot')
+
+        def rebuild(n):
+            start = max(i for i in range(n + 1) if chain[i][0] == 'snapshot')
+            return revisions.rebuild(chain[start:n + 1])
+
+        targets = random.Random(2).sample(range(len(states)), min(50, len(states)))
+        assert all(rebuild(n) == states[n] for n in targets)
+        rebuild_ms = []
+        for n in targets:
+            t0 = time.perf_counter()
+            rebuild(n)
+            rebuild_ms.append((time.perf_counter() - t0) * 1000)
+        print(f"snapshot every {interval:<4} {stored / 1024:10.1f} KiB ({snapshots} snapshots, "
+              f"{stored / zipped_size:5.1%} of zlib copies)")
+        report("  record (delta encode)", encode_ms)
+        report("  rebuild random version", rebuild_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('pdf', help='fpdf vs. Chromium PDF export')
+    p.add_argument('--runs', type=int, default=5)
+    p.set_defaults(func=bench_pdf)
+    p = sub.add_parser('shaping', help='Arabic reshaping + BiDi, cached vs. uncached')
+    p.add_argument('--runs', type=int, default=20)
+    p.add_argument('--paragraphs', type=int, default=200)
+    p.set_defaults(func=bench_shaping)
+    p = sub.add_parser('startup', help='worker import time with import-time breakdown')
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--top', type=int, default=15)
+    p.set_defaults(func=bench_startup)
+    p = sub.add_parser('passwords', help='login burst throughput and page latency under hashing load')
+    p.add_argument('--logins', type=int, default=40)
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--rounds', type=int, default=12)
+    p.set_defaults(func=bench_passwords)
+    p = sub.add_parser('templates', help='first request per route in a fresh worker, with/without bytecode cache')
+    p.add_argument('--runs', type=int, default=5)
+    p.set_defaults(func=bench_templates)
+    p = sub.add_parser('revisions', help='revision history storage growth and reconstruction time')
+    p.add_argument('--edits', type=int, default=500)
+    p.add_argument('--intervals', type=lambda v: [int(x) for x in v.split(',')], default=[10, 20, 50])
+    p.set_defaults(func=bench_revisions)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,8 @@
-from app import app as application
\ No newline at end of file
+import os
+
+from app import app as application, prewarm
+
+# Passenger's smart spawning loads this file once in a preloader and forks
+# workers from it; prewarming here is inherited by every worker.
+if os.environ.get('APP_PREWARM'):
+    prewarm()
@@ -0,0 +1,31 @@
+"""bcrypt helpers executed in the password-hashing process pool.
+
+Kept free of Flask/app imports so the jobs themselves pull in nothing but
+bcrypt. Pool processes are started by a forkserver (or spawned), and like any
+such child they re-import the parent's `__main__` module before running a job:
+under `python app.py` that is app.py itself, under gunicorn or Passenger only
+the server's loader script. A script that imports the app and then hashes
+passwords must therefore keep its work under `if __name__ == '__main__':`,
+otherwise every pool process re-runs it and the hash never completes (503).
+"""
+import bcrypt
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def check_password(pw_hash: str, password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), pw_hash.encode('utf-8'))
+    except ValueError:
+        # Malformed/legacy hash
+        return False
+
+
+def hash_rounds(pw_hash: str):
+    """Work factor stored in a bcrypt hash ('$2b$12$...' -> 12), or None if unparseable."""
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
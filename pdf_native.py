@@ -0,0 +1,262 @@
+"""Native (browser-free) PDF rendering for meeting exports.
+
+Holds the RTL text shaping service and the fpdf2-based MyPDF renderer. This
+module pulls in fpdf2, arabic_reshaper and python-bidi, so app.py imports it
+lazily on the first fpdf export (or from prewarm()) instead of at startup.
+"""
+import os
+import datetime
+from functools import lru_cache
+
+from flask_babel import gettext as _
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# --- RTL text shaping service (Arabic reshaping + BiDi), memoized ---
+# Reshaping and BiDi reordering are pure functions of (text, direction), and the
+# same strings (titles, names, labels) recur across pages and documents.
+SHAPE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def reshape_text(text: str) -> str:
+    """Arabic/Persian glyph reshaping only (logical order is kept)."""
+    return arabic_reshaper.reshape(text)
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def bidi_display(text: str, direction=None) -> str:
+    """BiDi reordering of already-reshaped text. direction: None (auto), 'R' or 'L'."""
+    return get_display(text, base_dir=direction)
+
+def shape_text(text, direction=None):
+    if text is None: return ""
+    return bidi_display(reshape_text(str(text)), direction)
+
+def shape_texts(texts, direction=None):
+    """Batch variant of shape_text: each distinct string is shaped once."""
+    shaped = {}
+    result = []
+    for text in texts:
+        key = "" if text is None else str(text)
+        if key not in shaped:
+            shaped[key] = shape_text(key, direction)
+        result.append(shaped[key])
+    return result
+
+# --- Updated MyPDF Class with Unicode Font and Conditional RTL Alignment ---
+class MyPDF(FPDF):
+    def __init__(self, orientation='P', unit='mm', format='A4', meeting_title="Meeting Minutes", company_name=None, logo_path=None, lang_code='en', date_str=None): # Added lang_code
+        super().__init__(orientation, unit, format)
+        self.meeting_title = meeting_title
+        self.company_name = company_name
+        self.logo_path = logo_path
+        self.lang_code = lang_code # Store language code
+        self.is_rtl = lang_code == 'fa'
+        self.align_start = 'R' if self.is_rtl else 'L'
+        self.text_direction = 'R' if self.is_rtl else None
+        self.creation_datetime_obj = datetime.datetime.now()
+        self.creation_date_str = date_str or self.creation_datetime_obj.strftime("%Y-%m-%d")
+        # Header/footer strings are constant for the document: shape them once, not once per page
+        date_label = 'تاریخ' if self.is_rtl else 'Date'
+        powered_by = 'تولید شده توسط نرم افزار صورت جلسه' if self.is_rtl else 'Generated by Meeting Minutes'
+        (self.shaped_title, self.shaped_company, self.shaped_date, self.shaped_footer) = shape_texts(
+            [meeting_title, company_name, f"{date_label}: {self.pnum(self.creation_date_str)}", powered_by],
+            self.text_direction)
+        self.set_auto_page_break(auto=True, margin=15)
+        self.set_margins(left=15, top=15, right=15)
+
+        # Add Unicode Font
+        try:
+            font_regular_path = os.path.join(basedir, 'static', 'fonts', 'Vazirmatn-Regular.ttf')
+            font_bold_path = os.path.join(basedir, 'static', 'fonts', 'Vazirmatn-Bold.ttf')
+            if os.path.exists(font_regular_path): self.add_font('Vazirmatn', '', font_regular_path)
+            else: raise FileNotFoundError("Vazirmatn-Regular.ttf not found")
+            if os.path.exists(font_bold_path): self.add_font('Vazirmatn', 'B', font_bold_path)
+            else: print("WARNING: Vazirmatn-Bold.ttf not found.")
+            self.set_font('Vazirmatn', '', 9)
+        except Exception as e:
+             print(f"Error adding font: {e}. Falling back to default font.")
+             self.set_font('Arial', '', 9)
+
+    def pnum(self, value):
+        s = '' if value is None else str(value)
+        return s.translate(str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')) if self.is_rtl else s
+
+    def header(self):
+        header_start_y = self.t_margin - 5
+        logo_start_x = self.l_margin + 2
+        logo_start_y = header_start_y + 1
+        logo_width = 35
+        logo_placeholder_height = 15
+
+        if self.logo_path and os.path.exists(self.logo_path):
+            try:
+                logo_placeholder_height = 20
+                self.image(self.logo_path, x=logo_start_x, y=logo_start_y, w=logo_width)
+            except Exception as e:
+                print(f"Error adding logo in header: {e}")
+                self.set_xy(logo_start_x, logo_start_y)
+                self.set_font('Vazirmatn', '', 7)
+                self.cell(logo_width, 8, shape_text('[Logo Error]'), border=0) # Use shape_text
+                logo_placeholder_height = 8
+        else: logo_placeholder_height = 5
+
+        title_start_x = logo_start_x + logo_width + 5
+        title_width = self.w - self.r_margin - title_start_x - 25
+        self.set_xy(title_start_x, logo_start_y)
+        self.set_font('Vazirmatn', 'B', 11)
+        line_height_title = 5
+        shaped_title = self.shaped_title # Shaped once in __init__
+        lines_title = len(self.multi_cell(title_width, line_height_title, shaped_title, border=0, align='C', dry_run=True, output='LINES'))
+        title_actual_height = lines_title * line_height_title
+        self.set_xy(title_start_x, logo_start_y)
+        self.multi_cell(title_width, line_height_title, shaped_title, border=0, align='C')
+
+        company_y = logo_start_y + title_actual_height + 1
+        company_actual_height = 0
+        if self.company_name:
+            self.set_xy(title_start_x, company_y)
+            self.set_font('Vazirmatn', '', 9)
+            line_height_company = 4
+            shaped_company = self.shaped_company # Shaped once in __init__
+            lines_company = len(self.multi_cell(title_width, line_height_company, shaped_company, border=0, align='C', dry_run=True, output='LINES'))
+            company_actual_height = lines_company * line_height_company
+            self.set_xy(title_start_x, company_y)
+            self.multi_cell(title_width, line_height_company, shaped_company, border=0, align='C') # Use shaped text
+            company_y += company_actual_height
+        else: company_y = logo_start_y + title_actual_height
+
+        date_start_x = self.w - self.r_margin - 25
+        self.set_xy(date_start_x, logo_start_y + 2)
+        self.set_font('Vazirmatn', '', 9)
+        self.cell(23, 5, self.shaped_date, border=0, align='R')
+
+        max_header_y = max(logo_start_y + logo_placeholder_height, company_y)
+        self.set_y(max_header_y + 8)
+        self.set_font('Vazirmatn', '', 9)
+
+    def footer(self):
+        footer_y = -15
+        self.set_y(footer_y)
+        self.set_draw_color(200, 200, 200)
+        self.line(self.l_margin, self.get_y(), self.w - self.r_margin, self.get_y())
+        self.ln(2)
+        self.set_font('Vazirmatn', '', 8)
+        self.cell(0, 4, self.shaped_footer, align=self.align_start)
+        self.set_x(self.r_margin if self.is_rtl else self.w - self.r_margin - 30)
+        self.set_font('Vazirmatn', '', 8)
+        self.cell(30, 4, f'Page {self.page_no()}/{{nb}}', align='L' if self.is_rtl else 'R')
+
+    # Wrap on the logical (reshaped) text first, then reorder each line, so
+    # multi-line RTL paragraphs keep their top-to-bottom reading order.
+    def shaped_lines(self, text, w):
+        reshaped = reshape_text('' if text is None else str(text))
+        lines = self.multi_cell(w, 5, reshaped, align=self.align_start, dry_run=True, output='LINES')
+        return [bidi_display(line, self.text_direction) for line in lines]
+
+    def shaped_blocks(self, texts, w):
+        """Batch variant of shaped_lines for list fields (agenda, table columns): each
+        distinct string is wrapped and shaped once, however often it repeats."""
+        blocks = {}
+        result = []
+        for text in texts:
+            key = '' if text is None else str(text)
+            if key not in blocks:
+                blocks[key] = self.shaped_lines(key, w)
+            result.append(blocks[key])
+        return result
+
+    def paragraph(self, text, h=5, w=None):
+        w = w or self.epw
+        self.shaped_paragraph(self.shaped_lines(text, w), h, w)
+
+    def shaped_paragraph(self, lines, h=5, w=None):
+        w = w or self.epw
+        for line in lines:
+            self.set_x(self.l_margin)
+            self.cell(w, h, line, align=self.align_start, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def section_title(self, text):
+        self.ln(3)
+        self.set_font('Vazirmatn', 'B', 12)
+        self.cell(0, 7, shape_text(text, self.text_direction), align=self.align_start, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.set_draw_color(229, 231, 235)
+        self.line(self.l_margin, self.get_y(), self.w - self.r_margin, self.get_y())
+        self.ln(2)
+        self.set_font('Vazirmatn', '', 10)
+
+    def action_items_table(self, action_items_list):
+        headers = [_('Description'), _('Assigned To'), _('Deadline')]
+        col_widths = [60, 25, 15]
+        rows = [[it.get('description', '') or '', it.get('assigned_to', '') or '', self.pnum(it.get('deadline', '') or '')]
+                for it in action_items_list if isinstance(it, dict)]
+        if self.is_rtl:
+            headers = headers[::-1]
+            col_widths = col_widths[::-1]
+            rows = [row[::-1] for row in rows]
+        text_widths = [self.epw * cw / sum(col_widths) - 2 for cw in col_widths]
+        self.set_font('Vazirmatn', '', 9)
+        # Shape column by column: assignees and deadlines repeat down a column
+        columns = [self.shaped_blocks([row[c] for row in rows], tw) for c, tw in enumerate(text_widths)]
+        with self.table(col_widths=col_widths, text_align='RIGHT' if self.is_rtl else 'LEFT',
+                        line_height=5, padding=1) as table:
+            heading = table.row()
+            for header in shape_texts(headers, self.text_direction):
+                heading.cell(header)
+            for cells in zip(*columns):
+                row = table.row()
+                for lines in cells:
+                    row.cell('\n'.join(lines))
+
+# --- Native fpdf2 renderer: same layout as templates/pdf/meeting.html, no browser ---
+def render_meeting_pdf(meeting, agenda_list, attendees_list, action_items_list, lang, company_display, date_jalali, logo_fs_path):
+    pdf = MyPDF(meeting_title=meeting.title, company_name=company_display,
+                logo_path=logo_fs_path if os.path.exists(logo_fs_path) else None,
+                lang_code=lang, date_str=meeting.meeting_date.strftime('%Y-%m-%d'))
+    is_fa = lang == 'fa'
+    pdf.add_page()
+    pdf.set_font('Vazirmatn', '', 9)
+    pdf.set_text_color(102, 102, 102)
+
+    # Meta: dates, author, counters
+    gregorian = pdf.pnum(meeting.meeting_date.strftime('%Y-%m-%d'))
+    meta = f"{'میلادی' if is_fa else 'Gregorian'}: {gregorian}"
+    if date_jalali:
+        meta += f" • {'شمسی' if is_fa else 'Jalali'}: {pdf.pnum(date_jalali)}"
+    pdf.paragraph(meta)
+    author = meeting.author.display_name or meeting.author.username
+    pdf.paragraph(f"{_('Recorded By')}: {author}")
+    if is_fa:
+        counters = [('تعداد شرکت کنندگان', len(attendees_list)), ('تعداد دستور جلسه', len(agenda_list)), ('موارد اقدام', len(action_items_list))]
+    else:
+        counters = [('Attendees', len(attendees_list)), ('Agenda', len(agenda_list)), ('Action Items', len(action_items_list))]
+    pdf.paragraph(' • '.join(f"{label}: {pdf.pnum(count)}" for label, count in counters))
+    pdf.set_text_color(17, 17, 17)
+
+    pdf.section_title(_('Attendees'))
+    pdf.paragraph(('، ' if is_fa else ', ').join(str(p) for p in attendees_list) if attendees_list else _('N/A'))
+
+    pdf.section_title(_('Agenda'))
+    if agenda_list:
+        for lines in pdf.shaped_blocks([f"{pdf.pnum(i)}. {item}" for i, item in enumerate(agenda_list, start=1)], pdf.epw):
+            pdf.shaped_paragraph(lines)
+    else:
+        pdf.paragraph(_('N/A'))
+
+    if meeting.minutes:
+        pdf.section_title(_('Minutes'))
+        for line in meeting.minutes.splitlines():
+            if line.strip():
+                pdf.paragraph(pdf.pnum(line))
+            else:
+                pdf.ln(3)
+
+    pdf.section_title(f"{_('Action Items')} ({pdf.pnum(len(action_items_list))})")
+    if action_items_list:
+        pdf.action_items_table(action_items_list)
+    else:
+        pdf.paragraph(_('N/A'))
+    return bytes(pdf.output())
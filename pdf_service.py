@@ -0,0 +1,530 @@
+"""Standalone HTML->PDF renderer service and its client.
+
+The web app sends prebuilt HTML plus content-addressed asset references
+(fonts, CSS, logo); a renderer process keeps one Chromium alive and prints the
+page. Run one or more renderer nodes with:
+
+    python pdf_service.py serve --bind 127.0.0.1:8701 --workers 4
+    python pdf_service.py serve --bind unix:/run/meeting-pdf.sock --workers 2
+
+Workers are forked from one listening socket and restarted if they die, so a
+Chromium crash costs one render, not a web worker. Kept free of Flask/app
+imports so renderer processes stay small.
+
+Protocol (HTTP/1.1, keep-alive):
+    POST /render  {"html": str, "assets": [{"ref": "assets/<sha256><ext>", "data": base64?}], "timeout": s}
+                  -> 200 application/pdf, or 409 {"missing": [ref, ...]} when the
+                     node does not have some assets yet (the client resends them)
+    GET  /health  -> {"ok": true, "pid": ..., "rendered": ...}
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+PDF_STREAM_CHUNK_SIZE = 256 * 1024
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+SERVER_IDLE_TIMEOUT = 300  # seconds a renderer keeps an idle keep-alive connection open
+ASSET_REF_RE = re.compile(r'^assets/[0-9a-f]{64}(\.[a-z0-9]{1,8})?$')
+
+
+class RenderServiceError(RuntimeError):
+    pass
+
+
+class RenderServiceUnavailable(RenderServiceError):
+    """No renderer endpoint answered within the retry budget."""
+
+
+def to_file_url(path: str) -> str:
+    return 'file:///' + os.path.abspath(path).replace('\\', '/').lstrip('/')
+
+
+# --- Chromium rendering (pyppeteer) ---
+async def print_pdf_to_file(page, pdf_path: str):
+    # Page.printToPDF with transferMode=ReturnAsStream lets Chromium hand the PDF
+    # over in chunks (IO.read), so it is never held in full as a base64 string.
+    # Older Chromium builds ignore transferMode and return inline data instead.
+    mm = 1 / 25.4
+    result = await page._client.send('Page.printToPDF', {
+        'paperWidth': 210 * mm, 'paperHeight': 297 * mm,
+        'marginTop': 5 * mm, 'marginBottom': 6 * mm, 'marginLeft': 5 * mm, 'marginRight': 5 * mm,
+        'printBackground': True,
+        'transferMode': 'ReturnAsStream',
+    })
+    with open(pdf_path, 'wb') as f:
+        handle = result.get('stream')
+        if not handle:
+            f.write(base64.b64decode(result.get('data', '')))
+            return
+        try:
+            while True:
+                chunk = await page._client.send('IO.read', {'handle': handle, 'size': PDF_STREAM_CHUNK_SIZE})
+                data = chunk.get('data', '')
+                f.write(base64.b64decode(data) if chunk.get('base64Encoded') else data.encode('latin-1'))
+                if chunk.get('eof'):
+                    break
+        finally:
+            await page._client.send('IO.close', {'handle': handle})
+
+
+async def launch_browser():
+    from pyppeteer import launch  # heavy; only loaded where PDFs are rendered
+    return await launch(args=['--no-sandbox', '--allow-file-access-from-files'], handleSIGINT=False,
+                        handleSIGTERM=False, handleSIGHUP=False, headless=True)
+
+
+async def render_page(browser, html_path: str, pdf_path: str):
+    page = await browser.newPage()
+    try:
+        # Load the document from disk instead of pushing it through setContent,
+        # so fonts/logo/CSS are fetched by Chromium as file:// subresources.
+        await page.goto(to_file_url(html_path), waitUntil='load')
+        await page.waitForSelector('body')
+        await print_pdf_to_file(page, pdf_path)
+    finally:
+        await page.close()
+
+
+async def render_pdf_chromium(html_path: str, pdf_path: str):
+    """One-shot render with a browser of its own (launched and closed per call)."""
+    browser = await launch_browser()
+    try:
+        await render_page(browser, html_path, pdf_path)
+    finally:
+        await browser.close()
+
+
+class ChromiumRenderer:
+    """Keeps one browser per renderer process; relaunched after a failure."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.browser = None
+
+    def __call__(self, html_path, pdf_path, timeout=None):
+        try:
+            self.loop.run_until_complete(asyncio.wait_for(self._render(html_path, pdf_path), timeout))
+        except Exception:
+            self.close()
+            raise
+
+    async def _render(self, html_path, pdf_path):
+        if self.browser is None:
+            self.browser = await launch_browser()
+        await render_page(self.browser, html_path, pdf_path)
+
+    def close(self):
+        browser, self.browser = self.browser, None
+        if browser is not None:
+            try:
+                self.loop.run_until_complete(browser.close())
+            except Exception:
+                pass
+
+
+# --- Content-addressed assets ---
+@lru_cache(maxsize=256)
+def _asset_ref(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    ext = os.path.splitext(path)[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,8}', ext):
+        ext = ''
+    return f"assets/{digest.hexdigest()}{ext}"
+
+
+def asset_ref(path):
+    """Reference ('assets/<sha256><ext>') of a local file, relative to the rendered HTML."""
+    st = os.stat(path)
+    return _asset_ref(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def stage_job(workdir, html, assets):
+    """Lay out html + assets ({ref: local path}) in workdir; returns the HTML path."""
+    os.makedirs(os.path.join(workdir, 'assets'), exist_ok=True)
+    for ref, path in assets.items():
+        target = os.path.join(workdir, ref)
+        if not os.path.exists(target):
+            try:
+                os.symlink(os.path.abspath(path), target)
+            except OSError:
+                shutil.copyfile(path, target)
+    html_path = os.path.join(workdir, 'index.html')
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return html_path
+
+
+class LocalRenderService:
+    """In-process stand-in with the client's interface (tests, single-box setups).
+
+    render_fn(html_path, pdf_path) defaults to a one-shot Chromium render.
+    """
+
+    def __init__(self, render_fn=None):
+        self.render_fn = render_fn or (lambda html_path, pdf_path: asyncio.run(render_pdf_chromium(html_path, pdf_path)))
+
+    def render(self, html, assets, pdf_path, timeout=None):
+        with tempfile.TemporaryDirectory(prefix='render_', dir=os.path.dirname(os.path.abspath(pdf_path))) as workdir:
+            self.render_fn(stage_job(workdir, html, assets), pdf_path)
+
+
+# --- Client: pooled connections, least-outstanding dispatch, timeouts, retry ---
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+class _Endpoint:
+    def __init__(self, url, pool_size, max_idle):
+        self.url = url
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.max_idle = max_idle
+        self.in_flight = 0
+        self.down_until = 0.0
+
+    def connection(self, timeout, fresh=False):
+        """(connection, reused): a pooled keep-alive connection unless `fresh` or none is usable."""
+        conn = None
+        while not fresh:
+            try:
+                conn, idle_since = self.pool.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - idle_since < self.max_idle:
+                break
+            conn.close()  # the server has dropped it by now
+            conn = None
+        reused = conn is not None
+        if conn is None:
+            if self.url.startswith('unix:'):
+                conn = UnixHTTPConnection(self.url[len('unix:'):], timeout=timeout)
+            else:
+                host = self.url.split('://', 1)[-1].rstrip('/')
+                conn = http.client.HTTPConnection(host, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def release(self, conn):
+        try:
+            self.pool.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            conn.close()
+
+
+class PdfRenderClient:
+    """Dispatches renders to renderer endpoints ('http://host:port' or 'unix:/path').
+
+    Each request goes to the endpoint with the fewest renders in flight from this
+    process (round-robin among ties). Connection errors, timeouts and 5xx replies
+    take the endpoint out of rotation for `cooldown` seconds and the render is
+    retried on another one, up to `retries` times. A pooled connection the server
+    closed while idle is replaced by a fresh one without counting as a failure.
+    """
+
+    def __init__(self, endpoints, timeout=60, retries=2, pool_size=4, cooldown=10,
+                 max_idle=SERVER_IDLE_TIMEOUT / 2):
+        if not endpoints:
+            raise ValueError('at least one renderer endpoint is required')
+        self.endpoints = [_Endpoint(url, pool_size, max_idle) for url in endpoints]
+        self.timeout = timeout
+        self.retries = retries
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _acquire(self, exclude):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e not in exclude and e.down_until <= now]
+            if not candidates:
+                # Everything is cooling down: try the one that failed longest ago
+                candidates = [min((e for e in self.endpoints if e not in exclude), key=lambda e: e.down_until, default=None)]
+                if candidates[0] is None:
+                    return None
+            self._next += 1
+            ordered = candidates[self._next % len(candidates):] + candidates[:self._next % len(candidates)]
+            endpoint = min(ordered, key=lambda e: e.in_flight)
+            endpoint.in_flight += 1
+            return endpoint
+
+    def _release(self, endpoint, failed=False):
+        with self._lock:
+            endpoint.in_flight -= 1
+            if failed:
+                endpoint.down_until = time.monotonic() + self.cooldown
+
+    def _send(self, endpoint, payload, timeout):
+        conn, reused = endpoint.connection(timeout)
+        try:
+            conn.request('POST', '/render', body=payload, headers={'Content-Type': 'application/json'})
+            return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+        # The pooled connection died while idle (nothing was rendered): once more on a new one
+        conn, _reused = endpoint.connection(timeout, fresh=True)
+        try:
+            conn.request('POST', '/render', body=payload, headers={'Content-Type': 'application/json'})
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def _post(self, endpoint, payload, pdf_path, timeout):
+        conn, resp = self._send(endpoint, payload, timeout)
+        ok = False
+        try:
+            if resp.status == 200:
+                with open(pdf_path, 'wb') as f:
+                    while True:
+                        chunk = resp.read(PDF_STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                ok = True
+                return None
+            body = resp.read()
+            ok = True
+            if resp.status == 409:
+                return json.loads(body).get('missing') or []
+            raise RenderServiceError(f"{endpoint.url}: HTTP {resp.status}: {body[:200]!r}")
+        finally:
+            if ok and not resp.will_close:
+                endpoint.release(conn)
+            else:
+                conn.close()
+
+    def render(self, html, assets, pdf_path, timeout=None):
+        """Render html (assets: {ref: local path}) into pdf_path."""
+        timeout = timeout or self.timeout
+        refs = [{'ref': ref} for ref in assets]
+        tried = []
+        last_error = None
+        for _attempt in range(self.retries + 1):
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            try:
+                payload = json.dumps({'html': html, 'assets': refs, 'timeout': timeout}).encode('utf-8')
+                missing = self._post(endpoint, payload, pdf_path, timeout + 5)
+                if missing is not None:
+                    # The node lacks some assets: resend once with their bytes
+                    with_data = [{'ref': ref, 'data': base64.b64encode(open(assets[ref], 'rb').read()).decode('ascii')}
+                                 if ref in missing else {'ref': ref} for ref in assets]
+                    payload = json.dumps({'html': html, 'assets': with_data, 'timeout': timeout}).encode('utf-8')
+                    if self._post(endpoint, payload, pdf_path, timeout + 5) is not None:
+                        raise RenderServiceError(f"{endpoint.url}: assets still missing after upload")
+            except (OSError, http.client.HTTPException, RenderServiceError) as e:
+                self._release(endpoint, failed=True)
+                last_error = e
+                continue
+            self._release(endpoint)
+            return
+        raise RenderServiceUnavailable(f"no renderer could render the document: {last_error}")
+
+
+# --- Server ---
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MeetingPdfRenderer/1'
+    timeout = SERVER_IDLE_TIMEOUT  # drop idle keep-alive connections
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self.send_json(404, {'error': 'not_found'})
+        self.send_json(200, {'ok': True, 'pid': os.getpid(), 'rendered': self.server.rendered})
+
+    def do_POST(self):
+        if self.path != '/render':
+            return self.send_json(404, {'error': 'not_found'})
+        length = int(self.headers.get('Content-Length') or 0)
+        if not 0 < length <= MAX_REQUEST_BYTES:
+            return self.send_json(413, {'error': 'bad_length'})
+        try:
+            job = json.loads(self.rfile.read(length))
+            html = job['html']
+            assets = job.get('assets') or []
+            if not isinstance(html, str) or not all(ASSET_REF_RE.match(a.get('ref', '')) for a in assets):
+                raise ValueError('bad job')
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return self.send_json(400, {'error': 'bad_request'})
+
+        store = self.server.asset_dir
+        missing = []
+        for asset in assets:
+            path = os.path.join(store, os.path.basename(asset['ref']))
+            if os.path.exists(path):
+                continue
+            if not asset.get('data'):
+                missing.append(asset['ref'])
+                continue
+            data = base64.b64decode(asset['data'])
+            if not os.path.basename(asset['ref']).startswith(hashlib.sha256(data).hexdigest()):
+                return self.send_json(400, {'error': 'asset_digest_mismatch', 'ref': asset['ref']})
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        if missing:
+            return self.send_json(409, {'missing': missing})
+
+        workdir = tempfile.mkdtemp(prefix='job_', dir=self.server.work_dir)
+        try:
+            os.symlink(store, os.path.join(workdir, 'assets'))
+            html_path = os.path.join(workdir, 'index.html')
+            with open(html_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            pdf_path = os.path.join(workdir, 'out.pdf')
+            try:
+                with self.server.render_lock:
+                    self.server.renderer(html_path, pdf_path, timeout=min(float(job.get('timeout') or 60), 600))
+                    self.server.rendered += 1
+            except Exception as e:
+                return self.send_json(500, {'error': 'render_failed', 'detail': f"{e.__class__.__name__}: {e}"})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(os.path.getsize(pdf_path)))
+            self.end_headers()
+            with open(pdf_path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, PDF_STREAM_CHUNK_SIZE)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+class RenderServer(socketserver.ThreadingMixIn, HTTPServer):
+    # Threads only hold (possibly idle keep-alive) connections; renders in one
+    # process are serialized on its browser, parallelism comes from the workers.
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, family, state_dir, renderer, verbose=False):
+        self.address_family = family
+        self.asset_dir = os.path.join(state_dir, 'assets')
+        self.work_dir = os.path.join(state_dir, 'jobs')
+        os.makedirs(self.asset_dir, exist_ok=True)
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.renderer = renderer
+        self.verbose = verbose
+        self.rendered = 0
+        self.render_lock = threading.Lock()
+        super().__init__(address, RenderHandler)
+
+    def server_bind(self):
+        if self.address_family == socket.AF_UNIX:
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+            socketserver.TCPServer.server_bind(self)
+            self.server_name, self.server_port = 'unix', 0
+        else:
+            super().server_bind()
+
+
+def make_server(bind, state_dir, renderer=None, verbose=False):
+    if bind.startswith('unix:'):
+        address, family = bind[len('unix:'):], socket.AF_UNIX
+    else:
+        host, _, port = bind.rpartition(':')
+        address, family = (host or '127.0.0.1', int(port)), socket.AF_INET
+    return RenderServer(address, family, state_dir, renderer or ChromiumRenderer(), verbose)
+
+
+def serve(bind, workers, state_dir, verbose=False):
+    """Pre-fork `workers` renderer processes on one listening socket and keep them alive."""
+    server = make_server(bind, state_dir, renderer=lambda *a, **k: None, verbose=verbose)
+    children = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # SystemExit unwinds serve_forever, so the finally below closes Chromium
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            server.renderer = ChromiumRenderer()  # created after fork: one browser per worker
+            try:
+                server.serve_forever()
+            finally:
+                with server.render_lock:  # let an in-flight render finish with the browser
+                    server.renderer.close()
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"pdf renderer listening on {bind} with {workers} workers", flush=True)
+    while True:
+        pid, _status = os.wait()
+        if children.pop(pid, None) is not None:
+            time.sleep(0.5)  # avoid a tight respawn loop if Chromium cannot start at all
+            spawn()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('serve', help='run a renderer node')
+    p.add_argument('--bind', default='127.0.0.1:8701', help="host:port or unix:/path/to.sock")
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    p.add_argument('--state-dir', default=os.path.join(tempfile.gettempdir(), 'meeting-pdf-renderer'))
+    p.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    serve(args.bind, args.workers, args.state_dir, args.verbose)
+
+
+if __name__ == '__main__':
+    main()
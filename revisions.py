@@ -0,0 +1,115 @@
+"""Delta encoding for meeting revision history.
+
+A meeting state is a dict of the versioned fields: strings and dates as plain
+values, `minutes` as text, `agenda`/`attendees`/`action_items` as lists.
+A revision is stored either as a full snapshot of that dict or as a delta
+against the previous state: changed scalars verbatim, minutes as a line diff,
+the lists as element diffs. Both are zlib-compressed JSON.
+
+Kept free of Flask/app imports so bench.py can exercise it without a database.
+"""
+import difflib
+import json
+import zlib
+
+SCALAR_FIELDS = ('title', 'meeting_date', 'company', 'company_other_name', 'company_logo')
+TEXT_FIELDS = ('minutes',)
+LIST_FIELDS = ('agenda', 'attendees', 'action_items')
+FIELDS = SCALAR_FIELDS + TEXT_FIELDS + LIST_FIELDS
+
+
+def encode(obj):
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode(payload):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def diff_sequence(old, new):
+    """Edit script turning list `old` into `new`: [n] keeps n items, [-n] drops n, [[...]] inserts."""
+    # Elements may be dicts (action items): compare their canonical JSON
+    keys_old = [json.dumps(x, sort_keys=True, ensure_ascii=False) for x in old]
+    keys_new = [json.dumps(x, sort_keys=True, ensure_ascii=False) for x in new]
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, keys_old, keys_new, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new[j1:j2])
+    return ops
+
+
+def patch_sequence(old, ops):
+    out = []
+    pos = 0
+    for op in ops:
+        if isinstance(op, list):
+            out.extend(op)
+        elif op >= 0:
+            out.extend(old[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return out
+
+
+def make_delta(old, new):
+    """Delta from state `old` to state `new`; empty dict when nothing changed."""
+    delta = {}
+    for field in SCALAR_FIELDS:
+        if old.get(field) != new.get(field):
+            delta[field] = new.get(field)
+    for field in TEXT_FIELDS:
+        a, b = old.get(field) or '', new.get(field) or ''
+        if a != b:
+            delta[field] = diff_sequence(a.splitlines(keepends=True), b.splitlines(keepends=True))
+    for field in LIST_FIELDS:
+        a, b = old.get(field) or [], new.get(field) or []
+        if a != b:
+            delta[field] = diff_sequence(a, b)
+    return delta
+
+
+def apply_delta(state, delta):
+    new = dict(state)
+    for field, value in delta.items():
+        if field in TEXT_FIELDS:
+            new[field] = ''.join(patch_sequence((state.get(field) or '').splitlines(keepends=True), value))
+        elif field in LIST_FIELDS:
+            new[field] = patch_sequence(state.get(field) or [], value)
+        else:
+            new[field] = value
+    return new
+
+
+def rebuild(chain):
+    """State at the end of `chain`, a list of (kind, payload) starting with a snapshot."""
+    state = None
+    for kind, payload in chain:
+        data = decode(payload)
+        state = data if kind == 'snapshot' else apply_delta(state, data)
+    return state
+
+
+def encode_revision(old, new, since_snapshot, snapshot_interval):
+    """(kind, payload, changed fields) for the revision turning `old` into `new`.
+
+    A full snapshot is written for the first revision, every `snapshot_interval`
+    revisions (bounding reconstruction to that many deltas), and whenever the
+    delta would not be smaller than the snapshot.
+    """
+    snapshot = encode(new)
+    if old is None:
+        return 'snapshot', snapshot, [f for f in FIELDS if new.get(f)]
+    delta = make_delta(old, new)
+    changed = list(delta)
+    if since_snapshot + 1 >= snapshot_interval:
+        return 'snapshot', snapshot, changed
+    payload = encode(delta)
+    if len(payload) >= len(snapshot):
+        return 'snapshot', snapshot, changed
+    return 'delta', payload, changed
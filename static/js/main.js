@@ -177,6 +177,7 @@ document.addEventListener('DOMContentLoaded', function() {
             newInput.classList.add('form-control');
             newInput.placeholder = (locale==='fa'? t.fa.attendeePlaceholder : t.en.attendeePlaceholder);
             newInput.setAttribute('autocomplete','off');
+            newInput.setAttribute('list','attendee-suggestions');
 
             const removeButton = document.createElement('button');
             removeButton.type = 'button';
@@ -195,6 +196,36 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // ===== Attendee autocomplete (per-user name index on the server) =====
+    const attendeeSuggestions = document.getElementById('attendee-suggestions');
+    if (attendeeSuggestions && attendeesContainer) {
+        const suggestUrl = attendeeSuggestions.getAttribute('data-url');
+        let suggestTimer = null;
+        let lastQuery = null;
+        attendeesContainer.addEventListener('input', function(event) {
+            const input = event.target.closest('input[name^="attendees-"]');
+            if (!input) return;
+            clearTimeout(suggestTimer);
+            suggestTimer = setTimeout(() => {
+                const q = (input.value || '').trim();
+                if (!q || q === lastQuery) return;
+                lastQuery = q;
+                fetch(`${suggestUrl}?q=${encodeURIComponent(q)}`, { headers: { 'Accept': 'application/json' } })
+                    .then(r => r.ok ? r.json() : null)
+                    .then(data => {
+                        if (!data || !data.ok || q !== lastQuery) return;
+                        attendeeSuggestions.innerHTML = '';
+                        data.suggestions.forEach(name => {
+                            const opt = document.createElement('option');
+                            opt.value = name;
+                            attendeeSuggestions.appendChild(opt);
+                        });
+                    })
+                    .catch(() => {});
+            }, 60);
+        });
+    }
+
     const addActionButton = document.getElementById('add-action-item-button');
     const actionItemsContainer = document.getElementById('action-items-container');
     function collectAttendees(){
@@ -0,0 +1,957 @@
+"""Tests for the meeting app: PDF rendering, replica routing, sync, history, caches and background jobs.
+
+Run with `python -m pytest test.py`. The app reads its database URLs at import
+time, so a temporary primary and one SQLite replica are configured first.
+"""
+import datetime
+import gzip
+import http.client
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+_tmp = tempfile.mkdtemp(prefix='meeting_app_test_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'primary.db')
+os.environ['DATABASE_REPLICA_URLS'] = 'sqlite:///' + os.path.join(_tmp, 'replica.db')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ['JINJA_BYTECODE_CACHE_DIR'] = os.path.join(_tmp, 'jinja')
+
+import admission  # noqa: E402
+import app as meeting_app  # noqa: E402
+import passwords  # noqa: E402
+import pdf_service  # noqa: E402
+import revisions  # noqa: E402
+from app import app, db, Meeting, User  # noqa: E402
+
+app.config['WTF_CSRF_ENABLED'] = False
+with app.app_context():
+    db.create_all()
+    meeting_app.ensure_schema()
+
+
+# --- Fixtures ---
+@pytest.fixture
+def user():
+    with app.app_context():
+        u = User(username=f"user-{uuid.uuid4().hex[:8]}", password_hash='!')
+        db.session.add(u)
+        db.session.flush()
+        meeting = Meeting(title='Original', meeting_date=datetime.datetime(2025, 3, 1), user_id=u.id,
+                          attendees=json.dumps(['Sara']), agenda=json.dumps(['Budget']), minutes='First line\n',
+                          action_items=json.dumps([{'description': 'Report', 'assigned_to': 'Sara',
+                                                    'deadline': '2025-04-01'}]))
+        db.session.add(meeting)
+        db.session.commit()
+        return u.id, meeting.id
+
+
+@pytest.fixture
+def client(user):
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s['_user_id'] = str(user[0])
+        s['_fresh'] = True
+    return c
+
+
+@pytest.fixture
+def primary_only(monkeypatch):
+    monkeypatch.setitem(app.config, 'DB_REPLICA_BINDS', [])
+
+
+def sync_replica():
+    result = app.test_cli_runner().invoke(args=['replica', 'sync'])
+    assert result.exit_code == 0, result.output
+
+
+def batch(client, mutations, since=0):
+    r = client.post('/api/v1/meetings/batch', json={'mutations': mutations, 'since': since})
+    assert r.status_code == 200, r.get_data(as_text=True)
+    return r.get_json()
+
+
+# --- PDF renderer client against in-process renderer nodes ---
+class Node:
+    """A renderer node on a free local port; `renderer` replaces Chromium."""
+
+    def __init__(self, renderer):
+        self.calls = 0
+
+        def render(html_path, pdf_path, timeout=None):
+            self.calls += 1
+            renderer(html_path, pdf_path)
+
+        self.server = pdf_service.make_server('127.0.0.1:0', tempfile.mkdtemp(dir=_tmp), renderer=render)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def write_pdf(html_path, pdf_path):
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-1.4 ' + open(html_path, 'rb').read())
+
+
+def fail(html_path, pdf_path):
+    raise RuntimeError('browser crashed')
+
+
+@pytest.fixture
+def nodes():
+    started = []
+    yield lambda renderer: started.append(Node(renderer)) or started[-1]
+    for node in started:
+        node.close()
+
+
+def test_render_client_retries_on_another_node_and_cools_down_the_failed_one(nodes):
+    bad, good = nodes(fail), nodes(write_pdf)
+    client = pdf_service.PdfRenderClient([bad.url, good.url], timeout=5, retries=1, cooldown=60)
+    pdf_path = os.path.join(tempfile.mkdtemp(dir=_tmp), 'out.pdf')
+    for _ in range(4):
+        client.render('<p>hello</p>', {}, pdf_path)
+        assert open(pdf_path, 'rb').read() == b'%PDF-1.4 <p>hello</p>'
+    # Round-robin sends one render to the failing node; it is retried on the
+    # other node and the failing one sits out its cooldown
+    assert bad.calls == 1 and good.calls == 4
+    assert client.endpoints[0].down_until > time.monotonic()
+    assert client.endpoints[1].down_until == 0.0
+
+
+def test_render_client_gives_up_when_every_node_fails(nodes):
+    client = pdf_service.PdfRenderClient([nodes(fail).url, nodes(fail).url], timeout=5, retries=1)
+    with pytest.raises(pdf_service.RenderServiceUnavailable):
+        client.render('<p>x</p>', {}, os.path.join(_tmp, 'never.pdf'))
+
+
+def test_render_client_uploads_missing_assets_once(nodes):
+    node = nodes(write_pdf)
+    asset = os.path.join(tempfile.mkdtemp(dir=_tmp), 'logo.png')
+    with open(asset, 'wb') as f:
+        f.write(os.urandom(64))
+    ref = pdf_service.asset_ref(asset)
+    client = pdf_service.PdfRenderClient([node.url], timeout=5)
+    pdf_path = os.path.join(tempfile.mkdtemp(dir=_tmp), 'out.pdf')
+    client.render(f'<img src="{ref}">', {ref: asset}, pdf_path)
+    client.render(f'<img src="{ref}">', {ref: asset}, pdf_path)
+    assert node.calls == 2
+    assert os.path.exists(os.path.join(node.server.asset_dir, os.path.basename(ref)))
+
+
+def test_render_client_replaces_a_connection_the_node_closed_while_idle(nodes, monkeypatch):
+    monkeypatch.setattr(pdf_service.RenderHandler, 'timeout', 0.3)
+    node = nodes(write_pdf)
+    client = pdf_service.PdfRenderClient([node.url], timeout=5, retries=0)
+    pdf_path = os.path.join(tempfile.mkdtemp(dir=_tmp), 'out.pdf')
+    client.render('<p>1</p>', {}, pdf_path)
+    assert client.endpoints[0].pool.qsize() == 1
+    time.sleep(0.8)  # the node drops the pooled keep-alive connection
+    client.render('<p>2</p>', {}, pdf_path)
+    assert node.calls == 2 and client.endpoints[0].down_until == 0.0
+
+
+def test_render_client_discards_connections_idle_longer_than_max_idle(nodes):
+    node = nodes(write_pdf)
+    client = pdf_service.PdfRenderClient([node.url], timeout=5, max_idle=0.1)
+    pdf_path = os.path.join(tempfile.mkdtemp(dir=_tmp), 'out.pdf')
+    client.render('<p>1</p>', {}, pdf_path)
+    stale, _idle_since = client.endpoints[0].pool.queue[0]
+    time.sleep(0.2)
+    conn, reused = client.endpoints[0].connection(5)
+    assert not reused and conn is not stale and stale.sock is None
+    assert isinstance(conn, http.client.HTTPConnection)
+
+
+# --- Replica routing: read-your-writes ---
+def meeting_title(client, meeting_id):
+    meetings = {m['id']: m for m in client.get('/api/v1/meetings').get_json()['meetings']}
+    return meetings[meeting_id]['title']
+
+
+def test_reads_stick_to_the_primary_after_a_write(user, client):
+    _user_id, meeting_id = user
+    sync_replica()
+    assert meeting_title(client, meeting_id) == 'Original'
+
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Edited'}}])
+    # The replica has not caught up, but this client just wrote: it reads the primary
+    assert meeting_title(client, meeting_id) == 'Edited'
+    with client.session_transaction() as s:
+        assert s['db_primary_until'] > time.time()
+        s['db_primary_until'] = 0
+    assert meeting_title(client, meeting_id) == 'Original'
+
+    sync_replica()
+    assert meeting_title(client, meeting_id) == 'Edited'
+
+
+def test_reads_without_writes_do_not_stick(user, client):
+    sync_replica()
+    client.get('/api/v1/meetings')
+    with client.session_transaction() as s:
+        assert 'db_primary_until' not in s
+
+
+# --- Delta sync ---
+def changes(client, since, **params):
+    query = '&'.join(f"{k}={v}" for k, v in {'since': since, **params}.items())
+    r = client.get(f'/api/v1/meetings?{query}')
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_delta_sync_returns_only_changes_after_the_cursor(user, client, primary_only):
+    _user_id, meeting_id = user
+    first = changes(client, 0)
+    assert [m['id'] for m in first['meetings']] == [meeting_id] and first['deleted'] == []
+    cursor = first['cursor']
+    page = changes(client, cursor)
+    assert (page['meetings'], page['deleted'], page['cursor'], page['has_more']) == ([], [], cursor, False)
+
+    created = batch(client, [{'op': 'create_meeting', 'client_ref': 'c1',
+                              'fields': {'title': 'Second', 'meeting_date': '2025-03-02'}}], since=cursor)
+    new_id = created['results'][0]['id']
+    assert created['results'][0]['client_ref'] == 'c1'
+    assert [m['id'] for m in created['meetings']] == [new_id]
+
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'minutes': 'Changed'}}])
+    page = changes(client, cursor, limit=1)
+    assert [m['id'] for m in page['meetings']] == [new_id] and page['has_more']
+    page = changes(client, page['cursor'], limit=1)
+    assert [m['id'] for m in page['meetings']] == [meeting_id] and not page['has_more']
+    assert page['meetings'][0]['minutes'] == 'Changed'
+    cursor = page['cursor']
+
+    batch(client, [{'op': 'delete_meeting', 'meeting_id': new_id}])
+    page = changes(client, cursor)
+    assert page['meetings'] == [] and page['deleted'] == [new_id] and page['cursor'] > cursor
+    assert changes(client, page['cursor'])['deleted'] == []
+
+
+def test_delta_sync_batch_is_all_or_nothing(user, client, primary_only):
+    _user_id, meeting_id = user
+    cursor = changes(client, 0)['cursor']
+    r = client.post('/api/v1/meetings/batch', json={'mutations': [
+        {'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Kept?'}},
+        {'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': ''}},
+    ]})
+    assert r.status_code == 400 and r.get_json() == {'ok': False, 'error': 'invalid_title', 'index': 1}
+    assert changes(client, cursor)['meetings'] == []
+
+
+def test_delta_sync_reports_archiving_and_overdue_flags(user, client, primary_only):
+    _user_id, meeting_id = user
+    with app.app_context():
+        meeting_app.sync_action_deadlines(db.session.get(Meeting, meeting_id))
+        db.session.commit()
+    cursor = changes(client, 0)['cursor']
+    with app.app_context():
+        assert meeting_app.run_overdue_digest(datetime.date(2025, 5, 1)) is not None
+    page = changes(client, cursor)
+    assert [m['action_items'][0]['overdue'] for m in page['meetings']] == [True]
+
+    with app.app_context():
+        meeting_app.archive_meeting(db.session.get(Meeting, meeting_id))
+        db.session.commit()
+    page = changes(client, page['cursor'])
+    assert [(m['id'], m['archived'], m['minutes']) for m in page['meetings']] == [(meeting_id, True, 'First line\n')]
+
+
+# --- Revision history ---
+def states():
+    state = {'title': 'Board', 'meeting_date': '2025-03-01T00:00:00', 'company': 'Rahkar Gasht',
+             'company_other_name': None, 'company_logo': None, 'minutes': 'a\nb\nc\n',
+             'agenda': ['Budget', 'Hiring'], 'attendees': ['Sara', 'Ali'],
+             'action_items': [{'description': 'Report', 'assigned_to': 'Sara', 'deadline': None}]}
+    yield state
+    edits = [
+        {'minutes': 'a\nB\nc\nd\n'},
+        {'agenda': ['Hiring', 'Budget', 'Roadmap']},
+        {'title': 'Board (final)', 'attendees': ['Ali']},
+        {'action_items': [{'description': 'Report', 'assigned_to': 'Sara', 'deadline': None, 'is_done': True},
+                          {'description': 'Hire', 'assigned_to': '', 'deadline': '2025-04-01'}]},
+        {'minutes': ''},
+        {'minutes': 'جلسه\nبا متن فارسی\n', 'agenda': []},
+        {'company': None, 'company_other_name': 'Other Co'},
+    ]
+    for edit in edits:
+        state = {**state, **edit}
+        yield state
+
+
+def test_revision_deltas_rebuild_every_version():
+    interval = 3
+    chain, expected, old = [], [], None
+    for state in states():
+        since_snapshot = len(chain) - max(i for i, (kind, _p) in enumerate(chain) if kind == 'snapshot') if chain else 0
+        kind, payload, changed = revisions.encode_revision(old, state, since_snapshot, interval)
+        if old is not None:
+            assert changed == [f for f in revisions.FIELDS if old.get(f) != state.get(f)]
+        chain.append((kind, payload))
+        expected.append(state)
+        old = state
+    assert chain[0][0] == 'snapshot' and 'delta' in {kind for kind, _p in chain}
+    for number in range(len(chain)):
+        start = max(i for i in range(number + 1) if chain[i][0] == 'snapshot')
+        assert number - start < interval
+        assert revisions.rebuild(chain[start:number + 1]) == expected[number]
+
+
+def test_sequence_diff_round_trip():
+    old = [{'a': 1}, 'x', 'y', 'z', {'b': 2}]
+    new = ['y', {'a': 1}, 'z', 'w', {'b': 3}]
+    assert revisions.patch_sequence(old, revisions.diff_sequence(old, new)) == new
+    assert revisions.make_delta({'minutes': 'same'}, {'minutes': 'same'}) == {}
+
+
+def test_meeting_version_matches_every_save(user, client, primary_only, monkeypatch):
+    _user_id, meeting_id = user
+    monkeypatch.setitem(app.config, 'REVISION_SNAPSHOT_INTERVAL', 3)
+    saved = []
+    for i in range(7):
+        batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id,
+                        'fields': {'minutes': 'First line\n' + ''.join(f"line {n}\n" for n in range(i + 1))}}])
+        with app.app_context():
+            saved.append(meeting_app.meeting_state(db.session.get(Meeting, meeting_id)))
+    with app.app_context():
+        numbers = [r.number for r in meeting_app.MeetingRevision.query.filter_by(meeting_id=meeting_id)
+                   .order_by(meeting_app.MeetingRevision.number)]
+        # Revision 1 is the state the meeting had before history existed
+        assert numbers == list(range(1, 9))
+        assert meeting_app.meeting_version(meeting_id, 1)['minutes'] == 'First line\n'
+        for number, state in enumerate(saved, start=2):
+            assert meeting_app.meeting_version(meeting_id, number) == state
+        assert meeting_app.meeting_version(meeting_id, 99) is None
+
+
+def test_first_revision_of_a_legacy_meeting_is_the_original(user, client, primary_only):
+    _user_id, meeting_id = user
+    with app.app_context():
+        meeting = db.session.get(Meeting, meeting_id)
+        meeting.title = 'Renamed'
+        meeting_app.record_revision(meeting)  # no prior state: the first version recorded is the base
+        db.session.commit()
+        first = meeting_app.MeetingRevision.query.filter_by(meeting_id=meeting_id, number=1).one()
+        assert first.changed == ''
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Renamed again'}}])
+    with app.app_context():
+        second = meeting_app.MeetingRevision.query.filter_by(meeting_id=meeting_id, number=2).one()
+        assert second.changed == 'title'
+    page = client.get(f"/meeting/{meeting_id}/history").get_data(as_text=True)
+    assert 'Original version' in page
+
+
+# --- Admission control ---
+def test_memory_backend_drops_refilled_buckets_and_released_leases(monkeypatch):
+    backend = admission.MemoryBackend()
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: clock[0])
+    backend._next_sweep = clock[0] + backend.SWEEP_INTERVAL
+    for n in range(100):
+        assert backend.take([admission.Bucket(f"ip:{n}", rate=1, burst=5)]) == 0.0
+    assert len(backend._buckets) == 100
+    clock[0] += backend.SWEEP_INTERVAL
+    backend.take([admission.Bucket('ip:new', rate=1, burst=5)])
+    assert list(backend._buckets) == ['ip:new']
+    lease = backend.acquire('pdf', limit=2, timeout=0, ttl=60)
+    backend.release(lease)
+    assert backend._leases == {}
+
+
+@pytest.fixture
+def admission_backend(monkeypatch):
+    backend = admission.MemoryBackend()
+    monkeypatch.setattr(meeting_app, '_admission_backend', backend)
+    monkeypatch.setattr(meeting_app, '_admission_backend_pid', os.getpid())
+    return backend
+
+
+def test_admission_rejects_past_the_burst_with_retry_after(client, admission_backend, primary_only, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMISSION_RULES', {'attendee_suggest': {'user_per_minute': 6, 'user_burst': 2}})
+    assert [client.get('/attendees/suggest?q=sa').status_code for _n in range(2)] == [200, 200]
+    r = client.get('/attendees/suggest?q=sa', headers={'Accept': 'application/json'})
+    assert r.status_code == 429
+    assert 1 <= int(r.headers['Retry-After']) <= 10
+    assert r.get_json()['error'] == 'rate_limited'
+    other = app.test_client()  # anonymous callers are not counted unless the rule says so
+    assert other.get('/attendees/suggest?q=sa').status_code != 429
+
+
+def test_admission_caps_concurrent_requests_and_releases_the_lease(client, admission_backend, primary_only, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMISSION_RULES', {'attendee_suggest': {'concurrency': 1, 'queue_timeout': 0}})
+    held = admission_backend.acquire('attendee_suggest:slots', 1, 0, 300)
+    assert client.get('/attendees/suggest?q=sa').status_code == 429
+    admission_backend.release(held)
+    assert client.get('/attendees/suggest?q=sa').status_code == 200
+    assert admission_backend._leases == {}
+
+
+def test_sqlite_backend_shares_buckets_and_reclaims_expired_leases():
+    path = os.path.join(_tmp, f"admission-{uuid.uuid4().hex}.db")
+    first, second = admission.SQLiteBackend(path), admission.SQLiteBackend(path)
+    bucket = admission.Bucket('pdf:user:1', rate=1 / 60, burst=1)
+    assert first.take([bucket]) == 0.0
+    assert second.take([bucket]) > 0
+    assert first.acquire('pdf:slots', 1, 0, ttl=-1) is not None  # holder died: already expired
+    lease = second.acquire('pdf:slots', 1, 0, ttl=60)
+    assert lease is not None
+    assert first.acquire('pdf:slots', 1, 0, ttl=60) is None
+    second.release(lease)
+    assert first.acquire('pdf:slots', 1, 0, ttl=60) is not None
+
+
+# --- Response compression and conditional GET ---
+def test_pages_are_gzipped_for_clients_that_accept_it(user, client, primary_only, monkeypatch):
+    _user_id, meeting_id = user
+    monkeypatch.setattr(meeting_app, 'brotli', None)  # br is only offered when the package is installed
+    plain = client.get(f"/meeting/{meeting_id}")
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    r = client.get(f"/meeting/{meeting_id}", headers={'Accept-Encoding': 'br, gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(r.data) == plain.data
+
+
+def test_pages_prefer_brotli_when_available(user, client, primary_only):
+    brotli = pytest.importorskip('brotli')
+    _user_id, meeting_id = user
+    plain = client.get(f"/meeting/{meeting_id}")
+    r = client.get(f"/meeting/{meeting_id}", headers={'Accept-Encoding': 'gzip, br'})
+    assert r.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(r.data) == plain.data
+
+
+def test_unchanged_page_returns_304_until_the_data_changes(user, client, primary_only):
+    _user_id, meeting_id = user
+    r = client.get(f"/meeting/{meeting_id}", headers={'Accept-Encoding': 'gzip'})
+    etag, weak = r.get_etag()
+    assert weak  # compressed bytes differ per encoding, so the validator is weak
+    again = client.get(f"/meeting/{meeting_id}", headers={'If-None-Match': f'W/"{etag}"', 'Accept-Encoding': 'gzip'})
+    assert again.status_code == 304
+    assert again.data == b''
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Changed'}}])
+    changed = client.get(f"/meeting/{meeting_id}", headers={'If-None-Match': f'W/"{etag}"'})
+    assert changed.status_code == 200
+    assert 'Changed' in changed.get_data(as_text=True)
+
+
+# --- Upload pipeline ---
+@pytest.fixture
+def upload_dirs(monkeypatch):
+    custom, avatars = tempfile.mkdtemp(dir=_tmp), tempfile.mkdtemp(dir=_tmp)
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', custom)
+    monkeypatch.setitem(app.config, 'AVATAR_UPLOAD_FOLDER', avatars)
+    monkeypatch.setattr(meeting_app, 'submit_upload_job', lambda fn, *args: fn(*args))  # run inline
+    return custom, avatars
+
+
+def png_bytes(size=(40, 20), color='red'):
+    from PIL import Image
+    out = io.BytesIO()
+    Image.new('RGB', size, color).save(out, 'PNG')
+    return out.getvalue()
+
+
+def upload(data, filename):
+    """store_upload inside a request that finishes, so its processing job is queued."""
+    with app.test_request_context('/upload', method='POST'):
+        relpath = meeting_app.store_upload(FileStorage(io.BytesIO(data), filename), app.config['UPLOAD_FOLDER'],
+                                           'custom', set(meeting_app.UPLOAD_IMAGE_FORMATS))
+        app.process_response(app.response_class())
+    return relpath
+
+
+def test_identical_uploads_are_stored_once(upload_dirs, monkeypatch):
+    custom, _avatars = upload_dirs
+    processed = []
+    monkeypatch.setattr(meeting_app, 'submit_upload_job', lambda fn, *args: processed.append(args[1]))
+    first, second = upload(png_bytes(), 'logo.PNG'), upload(png_bytes(), 'other-name.png')
+    assert first == second and first.startswith('custom/') and first.endswith('.png')
+    assert os.listdir(custom) == [first.split('/', 1)[1]]
+    assert processed == [first]  # the duplicate reuses the already queued file
+    assert upload(png_bytes(), 'logo.exe') is None
+
+
+def test_upload_past_the_size_cap_leaves_no_file(upload_dirs, monkeypatch):
+    custom, _avatars = upload_dirs
+    monkeypatch.setitem(app.config, 'UPLOAD_MAX_BYTES', 100)
+    with pytest.raises(meeting_app.UploadTooLarge):
+        upload(png_bytes(size=(400, 400)) + os.urandom(200), 'big.png')
+    assert os.listdir(custom) == []
+
+
+def test_valid_upload_is_downscaled_in_the_background(upload_dirs, monkeypatch):
+    from PIL import Image
+    custom, _avatars = upload_dirs
+    monkeypatch.setitem(app.config, 'UPLOAD_MAX_DIMENSION', 16)
+    relpath = upload(png_bytes(size=(64, 32)), 'logo.png')
+    with Image.open(os.path.join(custom, relpath.split('/', 1)[1])) as img:
+        assert img.size == (16, 8)
+
+
+def test_upload_that_is_not_the_claimed_image_type_is_rejected_and_unset(user, upload_dirs, primary_only, monkeypatch):
+    custom, _avatars = upload_dirs
+    user_id, meeting_id = user
+    monkeypatch.setattr(meeting_app, 'submit_upload_job', lambda fn, *args: None)
+    relpath = upload(b'<?php echo 1; ?>' * 10, 'logo.png')
+    with app.app_context():
+        db.session.get(Meeting, meeting_id).company_logo = relpath
+        db.session.get(User, user_id).avatar_path = relpath
+        db.session.commit()
+        revision = db.session.get(User, user_id).data_revision
+    meeting_app.process_uploaded_image(os.path.join(custom, relpath.split('/', 1)[1]), relpath)
+    assert os.listdir(custom) == []
+    with app.app_context():
+        assert db.session.get(Meeting, meeting_id).company_logo is None
+        assert db.session.get(User, user_id).avatar_path is None
+        assert db.session.get(User, user_id).data_revision != revision
+        assert meeting_app.meeting_version(meeting_id, 1)['company_logo'] == relpath  # the edit is in history
+
+
+def test_collect_orphan_uploads_keeps_referenced_and_recent_files(user, upload_dirs):
+    custom, avatars = upload_dirs
+    _user_id, meeting_id = user
+    old = time.time() - 2 * app.config['UPLOAD_ORPHAN_GRACE_SECONDS']
+    for folder, name, mtime in ((custom, 'used.png', old), (custom, 'orphan.png', old),
+                                (custom, 'fresh.png', time.time()), (avatars, 'orphan.jpg', old)):
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'x')
+        os.utime(os.path.join(folder, name), (mtime, mtime))
+    with app.app_context():
+        db.session.get(Meeting, meeting_id).company_logo = 'custom/used.png'
+        db.session.commit()
+        assert meeting_app.collect_orphan_uploads(candidates={'custom/orphan.png'}) == ['custom/orphan.png']
+        assert meeting_app.collect_orphan_uploads() == ['avatars/orphan.jpg']
+    assert sorted(os.listdir(custom)) == ['fresh.png', 'used.png']
+
+
+# --- Password hashing pool ---
+def password_user(password, rounds):
+    with app.app_context():
+        u = User(username=f"pw-{uuid.uuid4().hex[:8]}", password_hash=passwords.hash_password(password, rounds))
+        db.session.add(u)
+        db.session.commit()
+        return u.username, u.id
+
+
+def test_login_rehashes_to_the_configured_work_factor(primary_only, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 0)
+    monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 5)
+    username, user_id = password_user('secret', 4)
+    r = app.test_client().post('/login', data={'username': username, 'password': 'secret'})
+    assert r.status_code == 302
+    with app.app_context():
+        pw_hash = db.session.get(User, user_id).password_hash
+    assert passwords.hash_rounds(pw_hash) == 5
+    assert passwords.check_password(pw_hash, 'secret')
+
+
+def test_login_is_turned_away_with_503_when_the_pool_is_full(primary_only, monkeypatch):
+    username, _user_id = password_user('secret', 4)
+    exhausted = threading.BoundedSemaphore(1)
+    exhausted.acquire()
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 2)
+    monkeypatch.setattr(meeting_app, 'password_executor', lambda broken=None: (None, exhausted))
+    r = app.test_client().post('/login', data={'username': username, 'password': 'secret'})
+    assert r.status_code == 503
+    assert r.headers['Retry-After'] == '5'
+
+
+def test_password_pool_hashes_in_worker_processes(monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(meeting_app, '_password_executor', None)
+    with app.app_context():
+        pw_hash = meeting_app.generate_password_hash('secret')
+        assert meeting_app.check_password_hash(pw_hash, 'secret')
+        assert not meeting_app.check_password_hash(pw_hash, 'wrong')
+    executor, slots = meeting_app.password_executor()
+    executor.shutdown()
+    assert slots.acquire(blocking=False)  # every slot came back once its job ended
+
+
+# --- Company registry ---
+def company_cli(*args):
+    result = app.test_cli_runner().invoke(args=['company', *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_company_registry_sees_changes_made_through_the_orm_at_once(primary_only, monkeypatch):
+    monkeypatch.setitem(app.config, 'COMPANY_CACHE_TTL', 3600)
+    name = f"Acme {uuid.uuid4().hex[:6]}"
+    with app.app_context():
+        before = meeting_app.company_registry.revision()
+    company_cli('add', name, '--fa', 'آکمه')
+    with app.app_context():
+        assert meeting_app.company_registry.get(name)['names'] == {'en': name, 'fa': 'آکمه'}
+        assert meeting_app.company_registry.revision() != before
+        assert (name, name) in meeting_app.company_choices('en')
+    company_cli('remove', name)
+    with app.app_context():
+        assert meeting_app.company_registry.get(name) is None
+
+
+def test_company_registry_notices_other_processes_after_the_ttl(primary_only, monkeypatch):
+    monkeypatch.setitem(app.config, 'COMPANY_CACHE_TTL', 3600)
+    name = f"Elsewhere {uuid.uuid4().hex[:6]}"
+    with app.app_context():
+        meeting_app.company_registry.all()
+        # Written behind the ORM's back, as another worker process would
+        db.session.execute(db.text("INSERT INTO company (name, sort_order, updated_at) VALUES (:n, 0, :t)"),
+                           {'n': name, 't': datetime.datetime.utcnow()})
+        db.session.commit()
+        assert meeting_app.company_registry.get(name) is None  # still within the TTL
+        monkeypatch.setitem(app.config, 'COMPANY_CACHE_TTL', 0)
+        assert meeting_app.company_registry.get(name)['name'] == name
+
+
+# --- Attendee autocomplete ---
+def test_person_names_normalize_spelling_variants():
+    normalize = meeting_app.normalize_person_name
+    assert normalize('علي') == normalize('علی') == normalize('عَلی')
+    assert normalize('كريم') == normalize('کریم')
+    assert normalize('نرگس‌خانم') == 'نرگس خانم'
+    assert normalize('  Sara   SMITH ') == normalize('Ｓａｒａ smith') == 'sara smith'
+    assert meeting_app.name_keys('علی رضایی') == {'علی رضایی', 'رضایی'}
+
+
+def suggest(client, q):
+    r = client.get('/attendees/suggest', query_string={'q': q})
+    assert r.status_code == 200
+    return r.get_json()['suggestions']
+
+
+def test_attendee_suggest_ranks_by_use_and_collapses_variants(user, client, primary_only):
+    def create(attendees):
+        batch(client, [{'op': 'create_meeting', 'fields': {'title': 'M', 'meeting_date': '2025-05-01T10:00:00',
+                                                             'attendees': attendees}}])
+    assert suggest(client, 'sa') == ['Sara']
+    create(['علی رضایی', 'Sam', 'Sara'])
+    create(['علی رضایی', 'Sara Smith'])
+    create(['علي رضایی'])  # Arabic yeh: the same person, less used spelling
+    assert suggest(client, 'sa') == ['Sara', 'Sam', 'Sara Smith']
+    assert suggest(client, 'smi') == ['Sara Smith']
+    assert suggest(client, 'رضا') == ['علی رضایی']
+    assert suggest(client, 'علي') == ['علی رضایی']
+    assert suggest(client, ' ') == []
+
+
+def test_attendee_index_reads_archived_assignees_and_forgets_deleted_meetings(user, client, primary_only):
+    user_id, _meeting_id = user
+    with app.app_context():
+        meeting = Meeting(title='Old', meeting_date=datetime.datetime(2020, 1, 1), user_id=user_id, attendees='[]', agenda='[]',
+                          action_items=json.dumps([{'description': 'x', 'assigned_to': 'Dana', 'deadline': None}]))
+        db.session.add(meeting)
+        db.session.commit()
+        meeting_app.archive_meeting(meeting)
+        db.session.commit()
+        owner = db.session.get(User, user_id)
+        assert meeting_app.AttendeeIndex().suggest(owner, 'da') == ['Dana']
+        meeting_app.bump_data_revision(owner)
+        db.session.commit()
+        old_id = meeting.id
+    assert suggest(client, 'da') == ['Dana']
+    batch(client, [{'op': 'delete_meeting', 'meeting_id': old_id}])
+    assert suggest(client, 'da') == []
+
+
+# --- Calendar feed ---
+def test_calendar_feed_answers_304_and_rebuilds_only_changed_meetings(user, client, primary_only, monkeypatch):
+    user_id, meeting_id = user
+    token = uuid.uuid4().hex
+    with app.app_context():
+        db.session.get(User, user_id).calendar_token = token
+        db.session.commit()
+    batch(client, [{'op': 'create_meeting', 'fields': {'title': 'Second', 'meeting_date': '2025-05-01T10:00:00',
+                                                         'attendees': ['Sam'], 'action_items': [
+                                                             {'description': 'Call', 'assigned_to': 'Sam',
+                                                              'deadline': '2025-06-01'}]}}])
+    serialized = []
+    real_events = meeting_app.meeting_ics_events
+    monkeypatch.setattr(meeting_app, 'meeting_ics_events', lambda m: serialized.append(m.id) or real_events(m))
+    feed = app.test_client()  # calendar apps have no session
+    r = feed.get(f"/calendar/{token}.ics")
+    assert r.status_code == 200 and r.mimetype == 'text/calendar'
+    body = r.get_data(as_text=True)
+    assert 'SUMMARY:Report' in body and 'SUMMARY:Call' in body and 'DTSTART;VALUE=DATE:20250401' in body
+    assert len(serialized) == 2
+    etag = r.headers['ETag']
+    again = feed.get(f"/calendar/{token}.ics", headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert feed.get(f"/calendar/{token}.ics").status_code == 200
+    assert len(serialized) == 2  # unchanged revision: served from the cache
+    batch(client, [{'op': 'set_action_done', 'meeting_id': meeting_id, 'index': 0, 'done': True}])
+    changed = feed.get(f"/calendar/{token}.ics", headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert 'SUMMARY:Report' not in changed.get_data(as_text=True)  # done items leave the calendar
+    assert serialized[2:] == [meeting_id]
+    assert feed.get('/calendar/not-a-token.ics').status_code == 404
+
+
+# --- Overdue digests ---
+def mirror_deadlines(meeting_id):
+    """The fixture meeting is inserted directly; saves mirror deadlines like this."""
+    meeting_app.sync_action_deadlines(db.session.get(Meeting, meeting_id))
+    db.session.commit()
+
+
+def user_digests(user_id):
+    return meeting_app.OverdueDigest.query.filter_by(user_id=user_id).order_by(meeting_app.OverdueDigest.digest_date).all()
+
+
+def test_digest_runs_once_per_day_and_flags_each_item_once(user, monkeypatch):
+    user_id, meeting_id = user
+    outbox = tempfile.mkdtemp(dir=_tmp)
+    monkeypatch.setitem(app.config, 'DIGEST_OUTBOX_DIR', outbox)
+    with app.app_context():
+        db.session.get(User, user_id).email = 'owner@example.com'
+        mirror_deadlines(meeting_id)
+        run = meeting_app.run_overdue_digest(datetime.date(2031, 1, 1))
+        assert run is not None and run.finished_at is not None
+        assert meeting_app.run_overdue_digest(datetime.date(2031, 1, 1)) is None
+        assert meeting_app.run_overdue_digest(datetime.date(2031, 1, 2)) is not None
+        digests = user_digests(user_id)
+        assert [(d.digest_date, d.item_count) for d in digests] == [(datetime.date(2031, 1, 1), 1)]
+        assert json.loads(digests[0].items)[0]['description'] == 'Report'
+        assert meeting_app.overdue_item_indices(meeting_id) == {0}
+    assert len(os.listdir(outbox)) == 1
+
+
+def test_digest_takes_over_a_run_left_unfinished_by_a_killed_job(user):
+    user_id, meeting_id = user
+    with app.app_context():
+        mirror_deadlines(meeting_id)
+        stale = datetime.datetime.utcnow() - datetime.timedelta(seconds=app.config['DIGEST_RUN_TIMEOUT'] + 60)
+        db.session.add(meeting_app.DigestRun(run_date=datetime.date(2031, 2, 1), started_at=stale))
+        db.session.add(meeting_app.DigestRun(run_date=datetime.date(2031, 2, 2)))  # still running elsewhere
+        db.session.commit()
+        assert meeting_app.run_overdue_digest(datetime.date(2031, 2, 2)) is None
+        run = meeting_app.run_overdue_digest(datetime.date(2031, 2, 1))
+        assert run is not None and run.finished_at is not None
+        assert [d.digest_date for d in user_digests(user_id)] == [datetime.date(2031, 2, 1)]
+
+
+def test_overdue_flag_follows_the_item_when_action_items_are_reordered(user, client, primary_only):
+    _user_id, meeting_id = user
+    with app.app_context():
+        mirror_deadlines(meeting_id)
+        meeting_app.run_overdue_digest(datetime.date(2031, 3, 1))
+        assert meeting_app.overdue_item_indices(meeting_id) == {0}
+    report = {'description': 'Report', 'assigned_to': 'Sara', 'deadline': '2025-04-01'}
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'action_items': [
+        {'description': 'New task', 'assigned_to': 'Sara', 'deadline': '2031-06-01'}, report]}}])
+    with app.app_context():
+        assert meeting_app.overdue_item_indices(meeting_id) == {1}
+        assert meeting_app.run_overdue_digest(datetime.date(2031, 3, 2)).item_count == 0
+
+
+# --- Archive tier ---
+def test_archived_meetings_stay_searchable_and_restore_on_edit(user, client, primary_only):
+    user_id, meeting_id = user
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id,
+                    'fields': {'minutes': 'Budget approved for Q3.\nSecond line'}}])
+    with app.app_context():
+        now = datetime.datetime.utcnow() + datetime.timedelta(days=2)
+        archived, raw_bytes = meeting_app.archive_old_meetings(max_age_days=1, now=now)
+        assert archived >= 1 and raw_bytes > 0
+        meeting = db.session.get(Meeting, meeting_id)
+        assert meeting.archived and meeting.minutes is None and meeting.action_items is None
+        assert meeting.archive.terms.split() == sorted({'budget', 'approved', 'for', 'q3', 'second', 'line'})
+        own = Meeting.query.filter_by(user_id=user_id)
+        assert meeting_app.search_archived_minutes(own, 'APPROVED for') == [meeting_id]
+        assert meeting_app.search_archived_minutes(own, 'line second') == []  # every word, but not the phrase
+        assert meeting_app.archive_stats()['archived_meetings'] >= 1
+
+    def listed(q):
+        return 'Original' in client.get('/meetings', query_string={'q': q}).get_data(as_text=True)
+    assert listed('approved for q3')
+    assert not listed('rejected')
+    assert 'Budget approved for Q3.' in client.get(f"/meeting/{meeting_id}").get_data(as_text=True)
+
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Restored'}}])
+    with app.app_context():
+        meeting = db.session.get(Meeting, meeting_id)
+        assert not meeting.archived and meeting.archive is None
+        assert meeting.minutes == 'Budget approved for Q3.\nSecond line'
+        assert json.loads(meeting.action_items)[0]['description'] == 'Report'
+
+
+# --- Template bytecode cache ---
+def test_templates_compile_fills_the_bytecode_cache_and_edits_miss_it():
+    cache = app.jinja_env.bytecode_cache
+    result = app.test_cli_runner().invoke(args=['templates', 'compile', '--clear'])
+    assert result.exit_code == 0, result.output
+    names = app.jinja_env.list_templates(extensions=['html'])
+    assert len(os.listdir(cache.directory)) == len(names)
+    source, filename, _uptodate = app.jinja_loader.get_source(app.jinja_env, 'login.html')
+    bucket = cache.get_bucket(app.jinja_env, 'login.html', filename, source)
+    assert bucket.code is not None
+    assert cache.get_bucket(app.jinja_env, 'login.html', filename, source + '{# edited #}').code is None
+    result = app.test_cli_runner().invoke(args=['templates', 'clear'])
+    assert result.exit_code == 0 and os.listdir(cache.directory) == []
+
+
+def test_unwritable_bytecode_cache_dir_disables_the_cache():
+    path = os.path.join(_tmp, 'not-a-dir')
+    with open(path, 'w') as f:
+        f.write('x')
+    assert meeting_app.make_bytecode_cache(path) is None
+    assert meeting_app.make_bytecode_cache('') is None
+
+
+# --- Startup: lazy imports and prewarm ---
+def test_app_import_leaves_pdf_libraries_unloaded():
+    code = ("import sys, app; heavy = {'pdf_native', 'fpdf', 'pyppeteer', 'arabic_reshaper', 'bidi', 'PIL'};"
+            "print(sorted(heavy & set(sys.modules)))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(meeting_app.__file__)),
+                         env=os.environ, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_prewarm_loads_the_renderer_and_disposes_the_pools(caplog):
+    with app.app_context():
+        pools = {key: engine.pool for key, engine in db.engines.items()}
+    timings = meeting_app.prewarm(chromium=False)
+    assert list(timings) == ['schema', 'fonts', 'pdf_native', 'templates', 'dispose_db']
+    with app.app_context():
+        # dispose() swaps in a fresh pool: forked workers open their own connections
+        assert all(engine.pool is not pools[key] for key, engine in db.engines.items())
+    assert not [r for r in caplog.records if 'prewarm step' in r.getMessage()]
+    assert 'pdf_native' in sys.modules
+
+
+# --- Native PDF text shaping ---
+def test_shape_texts_shapes_each_distinct_string_once_and_reorders_rtl():
+    import pdf_native
+    assert pdf_native.shape_text(None) == '' and pdf_native.shape_text('Budget') == 'Budget'
+    persian = pdf_native.shape_text('سلام دنیا', 'R')
+    assert persian != 'سلام دنیا' and persian.split(' ')[0] == pdf_native.reshape_text('دنیا')[::-1]
+    pdf_native.bidi_display.cache_clear()
+    shaped = pdf_native.shape_texts(['سلام', None, 'سلام', 'Sara'], 'R')
+    assert shaped[0] is shaped[2] and shaped[1] == '' and shaped[3] == 'Sara'
+    assert pdf_native.bidi_display.cache_info().misses == 3
+
+
+def test_pdf_list_fields_are_wrapped_and_shaped_once_per_distinct_value(monkeypatch):
+    import pdf_native
+    with app.test_request_context():
+        pdf = pdf_native.MyPDF(meeting_title='جلسه', lang_code='fa')
+        pdf.add_page()
+        wrapped = []
+        real_lines = pdf.shaped_lines
+        monkeypatch.setattr(pdf, 'shaped_lines', lambda text, w: wrapped.append(text) or real_lines(text, w))
+        long_text = 'گزارش بودجه ' * 30
+        blocks = pdf.shaped_blocks(['سارا', 'سارا', None, long_text], 40)
+    assert wrapped == ['سارا', '', long_text]
+    assert blocks[0] is blocks[1] and blocks[2] == ['']
+    assert len(blocks[3]) > 1  # wrapped on the logical text, each line reordered on its own
+    assert all(line == pdf_native.bidi_display(line_logical, 'R') for line, line_logical in
+               zip(blocks[3], pdf.multi_cell(40, 5, pdf_native.reshape_text(long_text), dry_run=True, output='LINES')))
+
+
+# --- PDF export: engine selection, fallback and the rendered-PDF cache ---
+@pytest.fixture
+def pdf_export(primary_only, admission_backend, monkeypatch):
+    """Temporary cache dir, a fake Chromium renderer and render counters per engine."""
+    renders = {'chromium': 0, 'fpdf': 0}
+    state = {'renderer': write_pdf}
+
+    def chromium(html_path, pdf_path):
+        renders['chromium'] += 1
+        state['renderer'](html_path, pdf_path)
+
+    real_fpdf = meeting_app.render_meeting_pdf_fpdf
+
+    def fpdf(*render_args):
+        renders['fpdf'] += 1
+        return real_fpdf(*render_args)
+    monkeypatch.setitem(app.config, 'PDF_CACHE_DIR', tempfile.mkdtemp(dir=_tmp))
+    monkeypatch.setattr(meeting_app, '_pdf_renderer', pdf_service.LocalRenderService(chromium))
+    monkeypatch.setattr(meeting_app, '_pdf_renderer_pid', os.getpid())
+    monkeypatch.setattr(meeting_app, 'render_meeting_pdf_fpdf', fpdf)
+    state['renders'] = renders
+    return state
+
+
+def test_pdf_engine_is_chosen_per_request(user, client, pdf_export):
+    _user_id, meeting_id = user
+    chromium = client.get(f"/meeting/{meeting_id}/pdf")
+    assert chromium.status_code == 200 and chromium.mimetype == 'application/pdf'
+    assert b'Original' in chromium.data  # the fake renderer echoes the HTML job
+    native = client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf")
+    assert native.data.startswith(b'%PDF-') and native.headers['ETag'] != chromium.headers['ETag']
+    assert client.get(f"/meeting/{meeting_id}/pdf?engine=bogus").headers['ETag'] == chromium.headers['ETag']
+    assert pdf_export['renders'] == {'chromium': 1, 'fpdf': 1}
+
+
+def test_pdf_falls_back_to_fpdf_without_caching_the_fallback(user, client, pdf_export, monkeypatch):
+    _user_id, meeting_id = user
+    pdf_export['renderer'] = fail
+    r = client.get(f"/meeting/{meeting_id}/pdf?engine=chromium")
+    assert r.status_code == 200 and r.data.startswith(b'%PDF-')
+    assert 'ETag' not in r.headers and 'Accept-Ranges' not in r.headers
+    assert os.listdir(app.config['PDF_CACHE_DIR']) == []
+    pdf_export['renderer'] = write_pdf
+    assert client.get(f"/meeting/{meeting_id}/pdf?engine=chromium").status_code == 200
+    assert pdf_export['renders'] == {'chromium': 2, 'fpdf': 1}
+    monkeypatch.setitem(app.config, 'PDF_ENGINE_FALLBACK', False)
+    pdf_export['renderer'] = fail
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Renamed'}}])
+    assert client.get(f"/meeting/{meeting_id}/pdf?engine=chromium").status_code == 500
+
+
+def test_cached_pdf_serves_ranges_and_304s_without_rendering_or_admission(user, client, pdf_export, monkeypatch):
+    _user_id, meeting_id = user
+    monkeypatch.setitem(app.config, 'ADMISSION_RULES', {'generate_meeting_pdf': {
+        'user_per_minute': 1, 'user_burst': 1, 'in_view': True}})
+    first = client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf")
+    etag = first.headers['ETag']
+    part = client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf", headers={'Range': 'bytes=0-99', 'If-Range': etag})
+    assert part.status_code == 206 and part.data == first.data[:100]
+    assert client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf", headers={'If-None-Match': etag}).status_code == 304
+    assert pdf_export['renders']['fpdf'] == 1
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Renamed'}}])
+    # A new version has to render, and that render is what the admission rule charges
+    assert client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf", headers={'If-None-Match': etag}).status_code == 429
+    assert len(os.listdir(app.config['PDF_CACHE_DIR'])) == 1
+
+
+def test_new_meeting_version_replaces_its_cached_pdf_and_delete_clears_it(user, client, pdf_export):
+    _user_id, meeting_id = user
+    etag = client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf").headers['ETag']
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'title': 'Renamed'}}])
+    r = client.get(f"/meeting/{meeting_id}/pdf?engine=fpdf", headers={'If-None-Match': etag})
+    assert r.status_code == 200 and r.headers['ETag'] != etag
+    assert len(os.listdir(app.config['PDF_CACHE_DIR'])) == 1  # the old version's file was pruned
+    batch(client, [{'op': 'delete_meeting', 'meeting_id': meeting_id}])
+    assert os.listdir(app.config['PDF_CACHE_DIR']) == []
+
+
+def test_native_engine_is_the_configured_default_and_renders_both_layouts(user, client, pdf_export, monkeypatch):
+    _user_id, meeting_id = user
+    monkeypatch.setitem(app.config, 'PDF_ENGINE', 'fpdf')
+    english = client.get(f"/meeting/{meeting_id}/pdf")
+    with client.session_transaction() as s:
+        s['language'] = 'fa'
+    persian = client.get(f"/meeting/{meeting_id}/pdf")
+    assert english.data.startswith(b'%PDF-') and persian.data.startswith(b'%PDF-')
+    assert english.headers['ETag'] != persian.headers['ETag']
+    assert pdf_export['renders'] == {'chromium': 0, 'fpdf': 2}
+    items = [{'description': f"Task {n} " * 8, 'assigned_to': 'Sara', 'deadline': '2025-04-01'} for n in range(60)]
+    batch(client, [{'op': 'update_meeting', 'meeting_id': meeting_id, 'fields': {'action_items': items}}])
+    long = client.get(f"/meeting/{meeting_id}/pdf")
+    assert int(re.search(rb'/Count (\d+)', long.data).group(1)) > 1  # the action-item table breaks across pages